@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+
+# Copyright (c) 2016 Florian Wagner
+#
+# This file is part of GO-PCA.
+#
+# GO-PCA is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, Version 3,
+# as published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Compare GO-PCA results in single and double precision.
+
+For each benchmark dataset, GO-PCA is run with ``dtype=numpy.float64`` and
+with ``dtype=numpy.float32``. The script reports the largest difference
+between the PC loadings (up to the sign of each PC) and checks that the same
+signatures were generated. The exit code is 1 if any loading difference
+exceeds `gopca.go_pca.FLOAT32_LOADING_TOL`, or if the signatures differ.
+
+Example
+-------
+
+::
+
+    $ python benchmarks/check_float32.py -s small medium
+
+"""
+
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+from builtins import *
+
+import os
+import sys
+import logging
+import argparse
+
+import numpy as np
+
+import gopca
+from gopca import GOPCAParams, GOPCA
+from gopca.go_pca import FLOAT32_LOADING_TOL
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from synthetic import make_expression_matrix, make_gene_sets, make_ontology
+from run_benchmarks import SIZES
+
+logger = logging.getLogger(__name__)
+
+
+def get_signature_set(run):
+    """Returns the (PC, gene set ID, genes) tuple for each signature."""
+    return set((sig.pc, sig.gene_set.id, tuple(sorted(sig.genes)))
+               for sig in run.sig_matrix.signatures)
+
+
+def check_size(name, seed=0, num_permutations=15):
+    """Run GO-PCA in both precisions on a benchmark dataset."""
+    p, n, rank, num_gene_sets = SIZES[name]
+    module_size = min(200, p // (2 * rank))
+    matrix, modules = make_expression_matrix(
+        p, n, rank=rank, module_size=module_size, seed=seed)
+    gene_sets = make_gene_sets(matrix.genes.tolist(), modules,
+                               num_gene_sets=num_gene_sets, seed=seed)
+    gene_ontology = make_ontology(gene_sets, seed=seed)
+
+    params = GOPCAParams()
+    runs = []
+    for dtype in [np.float64, np.float32]:
+        M = GOPCA.simple_setup(matrix, params, gene_sets, gene_ontology,
+                               pc_num_permutations=num_permutations,
+                               pc_seed=seed, dtype=dtype)
+        runs.append(M.run())
+    run64, run32 = runs
+
+    if run64.W.shape != run32.W.shape:
+        logger.error('Size "%s": different numbers of PCs (%d vs. %d).',
+                     name, run64.W.shape[1], run32.W.shape[1])
+        return False
+
+    W64 = run64.W
+    W32 = run32.W.astype(np.float64)
+    signs = np.sign(np.sum(W64 * W32, axis=0))
+    max_diff = np.amax(np.abs(W64 - signs * W32))
+    same_signatures = (get_signature_set(run64) == get_signature_set(run32))
+
+    logger.info('Size "%s": max. loading difference = %.2e, '
+                'identical signatures: %s (%d signatures).',
+                name, max_diff, str(same_signatures), run64.sig_matrix.q)
+
+    return max_diff <= FLOAT32_LOADING_TOL and same_signatures
+
+
+def get_argument_parser():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+
+    parser.add_argument(
+        '-s', '--sizes', nargs='+', choices=list(SIZES.keys()),
+        default=['small', 'medium'],
+        help='Data sizes to check. [small medium]')
+
+    parser.add_argument(
+        '--seed', type=int, default=0,
+        help='Random number generator seed. [0]')
+
+    parser.add_argument(
+        '-p', '--pc-permutations', type=int, default=15,
+        help='Number of permutations for estimating the number of PCs. [15]')
+
+    return parser
+
+
+def main(args=None):
+    if args is None:
+        parser = get_argument_parser()
+        args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO,
+                        format='[%(asctime)s] %(levelname)s: %(message)s')
+    logging.getLogger(gopca.__name__).setLevel(logging.WARNING)
+
+    passed = True
+    for name in args.sizes:
+        if not check_size(name, seed=args.seed,
+                          num_permutations=args.pc_permutations):
+            passed = False
+
+    return 0 if passed else 1
+
+
+if __name__ == '__main__':
+    return_code = main()
+    sys.exit(return_code)
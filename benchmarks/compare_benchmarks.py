@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+
+# Copyright (c) 2016 Florian Wagner
+#
+# This file is part of GO-PCA.
+#
+# GO-PCA is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, Version 3,
+# as published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Compare two benchmark result files and report slower phases.
+
+Example
+-------
+
+::
+
+    $ python benchmarks/compare_benchmarks.py old.json new.json -t 1.2
+
+"""
+
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+from builtins import *
+
+import sys
+import io
+import json
+import argparse
+
+
+def read_results(path):
+    with io.open(path, encoding='UTF-8') as fh:
+        results = json.load(fh)
+    return dict((b['size'], b) for b in results['benchmarks']), results
+
+
+def get_argument_parser():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('old_file', help='Benchmark results (baseline).')
+    parser.add_argument('new_file', help='Benchmark results to compare.')
+    parser.add_argument(
+        '-t', '--thresh', type=float, default=1.2,
+        help='Report phases that are slower by at least this factor. [1.2]')
+    parser.add_argument(
+        '-m', '--min-time', type=float, default=0.05,
+        help='Ignore phases that take less than this many seconds. [0.05]')
+    return parser
+
+
+def main(args=None):
+    if args is None:
+        parser = get_argument_parser()
+        args = parser.parse_args()
+
+    old, old_results = read_results(args.old_file)
+    new, new_results = read_results(args.new_file)
+    print('Comparing GO-PCA %s (old) with GO-PCA %s (new).'
+          % (old_results['gopca_version'], new_results['gopca_version']))
+
+    num_slower = 0
+    for size in sorted(set(old.keys()) & set(new.keys())):
+        old_times = dict(old[size]['timings'])
+        old_times['total'] = old[size]['total_time']
+        new_times = dict(new[size]['timings'])
+        new_times['total'] = new[size]['total_time']
+        for phase in sorted(set(old_times.keys()) & set(new_times.keys())):
+            t_old, t_new = old_times[phase], new_times[phase]
+            if max(t_old, t_new) < args.min_time:
+                continue
+            ratio = t_new / t_old if t_old > 0 else float('inf')
+            flag = ''
+            if ratio >= args.thresh:
+                flag = '  <-- slower'
+                num_slower += 1
+            print('%-8s %-22s %9.3f s %9.3f s %6.2fx%s'
+                  % (size, phase, t_old, t_new, ratio, flag))
+
+    return 1 if num_slower > 0 else 0
+
+
+if __name__ == '__main__':
+    return_code = main()
+    sys.exit(return_code)
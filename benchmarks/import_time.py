@@ -0,0 +1,156 @@
+#!/usr/bin/env python
+
+# Copyright (c) 2016 Florian Wagner
+#
+# This file is part of GO-PCA.
+#
+# GO-PCA is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, Version 3,
+# as published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Measure the import time of the GO-PCA package and its scripts.
+
+Each module is imported in a fresh interpreter with ``python -X importtime``
+(requires Python 3.7 or later), and the cumulative import time of the
+module is reported (best of several repetitions). The script also checks
+that slow optional dependencies (scikit-learn, plotly, scipy.cluster,
+xlsxwriter) are not imported. Its exit code is 1 if any of these modules
+is imported, or if an import time exceeds the limit given by ``--max-ms``.
+
+Example
+-------
+
+::
+
+    $ python benchmarks/import_time.py --max-ms 1500 -o import_time.json
+
+"""
+
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+from builtins import *
+
+import sys
+import io
+import json
+import argparse
+import subprocess
+from collections import OrderedDict
+
+# the modules to import
+MODULES = [
+    'gopca',
+    'gopca.main',
+    'gopca.cli.print_info',
+    'gopca.cli.extract_signatures',
+    'gopca.cli.extract_signatures_excel',
+]
+
+# modules that should only be imported when they are used
+LAZY_MODULES = ['sklearn', 'plotly', 'scipy.cluster', 'xlsxwriter']
+
+
+def get_argument_parser():
+    parser = argparse.ArgumentParser(
+        description='Measure the import time of GO-PCA modules.')
+    parser.add_argument('-m', '--modules', nargs='+', default=MODULES,
+                        help='The modules to import.')
+    parser.add_argument('-r', '--repeat', type=int, default=5,
+                        help='Number of repetitions. [%(default)d]')
+    parser.add_argument('--max-ms', type=float, default=0,
+                        help='Maximum import time in ms (0 = no limit). '
+                             '[%(default)s]')
+    parser.add_argument('-o', '--output-file',
+                        help='JSON file to store the results in.')
+    return parser
+
+
+def get_import_time(module):
+    """Import a module in a new interpreter and return its import time.
+
+    Returns
+    -------
+    float
+        The cumulative import time (in ms).
+    list of str
+        The slow modules that were imported (see `LAZY_MODULES`).
+    """
+    code = ('import sys, %s; '
+            'print(",".join(m for m in %r if m in sys.modules))'
+            % (module, LAZY_MODULES))
+    proc = subprocess.Popen(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    out, err = proc.communicate()
+    if proc.returncode != 0:
+        raise RuntimeError('Importing "%s" failed:\n%s'
+                           % (module, err.decode('UTF-8')))
+
+    # lines look like this:
+    # "import time:  self [us] | cumulative | imported package"
+    # "import time:       123 |       4567 | gopca"
+    cumulative = None
+    for l in err.decode('UTF-8').splitlines():
+        if not l.startswith('import time:'):
+            continue
+        fields = l[len('import time:'):].split('|')
+        if len(fields) == 3 and fields[2].strip() == module:
+            cumulative = int(fields[1]) / 1000.0
+    if cumulative is None:
+        raise RuntimeError('No import time reported for "%s".' % module)
+
+    imported = [m for m in out.decode('UTF-8').strip().split(',') if m]
+    return cumulative, imported
+
+
+def main(args=None):
+
+    if sys.version_info < (3, 7):
+        print('Python 3.7 or later is required for "-X importtime".',
+              file=sys.stderr)
+        return 1
+
+    if args is None:
+        parser = get_argument_parser()
+        args = parser.parse_args()
+
+    results = OrderedDict()
+    failed = False
+    for module in args.modules:
+        times = []
+        for _ in range(args.repeat):
+            t, imported = get_import_time(module)
+            times.append(t)
+        best = min(times)
+        results[module] = OrderedDict([
+            ('import_time', best),
+            ('lazy_modules_imported', imported),
+        ])
+
+        msg = '%-40s %8.1f ms' % (module, best)
+        if imported:
+            msg += '  (imports %s)' % ', '.join(imported)
+            failed = True
+        if args.max_ms > 0 and best > args.max_ms:
+            msg += '  (exceeds %.0f ms)' % args.max_ms
+            failed = True
+        print(msg)
+
+    if args.output_file is not None:
+        with io.open(args.output_file, 'w', encoding='UTF-8') as ofh:
+            ofh.write(str(json.dumps(results, indent=2)))
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    return_code = main()
+    sys.exit(return_code)
@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+
+# Copyright (c) 2016 Florian Wagner
+#
+# This file is part of GO-PCA.
+#
+# GO-PCA is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, Version 3,
+# as published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Compare the permutation-based and analytic estimates of the number of PCs.
+
+For synthetic expression matrices of different sizes and planted ranks
+(see `synthetic.make_expression_matrix`), the number of PCs is estimated
+using both null distributions (see the ``pc_null_method`` option of
+`GOPCA`). The script reports the estimates, the planted rank, and the time
+required by each method, and writes all results to a JSON file.
+
+Example
+-------
+
+::
+
+    $ python benchmarks/pc_null_agreement.py -o pc_null.json
+
+"""
+
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+from builtins import *
+
+import os
+import sys
+import io
+import json
+import time
+import logging
+import argparse
+from collections import OrderedDict
+
+import numpy as np
+
+import gopca
+from gopca import GOPCAParams, GOPCAConfig, GOPCA
+from genometools.basic import GeneSetCollection
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from synthetic import make_expression_matrix
+
+logger = logging.getLogger(__name__)
+
+# (p genes, n samples)
+SHAPES = [(2000, 20), (2000, 50), (8000, 50), (8000, 200), (20000, 100)]
+
+# planted ranks
+RANKS = [0, 1, 3, 5]
+
+
+def compare_methods(p, n, rank, seed=0, num_permutations=15):
+    """Estimate the number of PCs using both null distributions."""
+    if rank > 0:
+        module_size = min(200, p // (2 * rank))
+    else:
+        module_size = 0
+    matrix, _ = make_expression_matrix(p, n, rank=rank,
+                                       module_size=module_size, seed=seed)
+
+    # the gene sets are not used for estimating the number of PCs
+    config = GOPCAConfig(GOPCAParams(), GeneSetCollection([]))
+
+    result = OrderedDict([
+        ('p', p),
+        ('n', n),
+        ('planted_rank', rank),
+        ('seed', seed),
+    ])
+    for method in ['permutation', 'analytic']:
+        M = GOPCA(matrix, [config], pc_null_method=method, pc_seed=seed,
+                  pc_num_permutations=num_permutations)
+        t0 = time.time()
+        d_est = M.estimate_num_components()
+        result[method] = int(d_est)
+        result['%s_time' % method] = time.time() - t0
+
+    logger.info('p=%d, n=%d, rank=%d: permutation=%d (%.2f s), '
+                'analytic=%d (%.3f s)', p, n, rank,
+                result['permutation'], result['permutation_time'],
+                result['analytic'], result['analytic_time'])
+    return result
+
+
+def get_argument_parser():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+
+    parser.add_argument(
+        '-n', '--num-seeds', type=int, default=3,
+        help='Number of datasets generated for each setting. [3]')
+
+    parser.add_argument(
+        '-p', '--pc-permutations', type=int, default=15,
+        help='Number of permutations for the permutation method. [15]')
+
+    parser.add_argument(
+        '-o', '--output-file', type=str, required=True,
+        help='Output JSON file.')
+
+    return parser
+
+
+def main(args=None):
+    if args is None:
+        parser = get_argument_parser()
+        args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO,
+                        format='[%(asctime)s] %(levelname)s: %(message)s')
+    logging.getLogger(gopca.__name__).setLevel(logging.WARNING)
+
+    results = []
+    for p, n in SHAPES:
+        for rank in RANKS:
+            for seed in range(args.num_seeds):
+                results.append(compare_methods(
+                    p, n, rank, seed=seed,
+                    num_permutations=args.pc_permutations))
+
+    agree = np.mean([r['permutation'] == r['analytic'] for r in results])
+    speedup = (np.sum([r['permutation_time'] for r in results]) /
+               np.sum([r['analytic_time'] for r in results]))
+    logger.info('The methods agreed in %.1f%% of all cases.', 100 * agree)
+    logger.info('The analytic method was %.1fx faster.', speedup)
+
+    output = OrderedDict([
+        ('gopca_version', gopca.__version__),
+        ('pc_permutations', args.pc_permutations),
+        ('agreement', agree),
+        ('speedup', speedup),
+        ('results', results),
+    ])
+    with io.open(args.output_file, 'w', encoding='UTF-8') as ofh:
+        ofh.write(str(json.dumps(output, indent=2)))
+    logger.info('Wrote results to "%s".', args.output_file)
+
+    return 0
+
+
+if __name__ == '__main__':
+    return_code = main()
+    sys.exit(return_code)
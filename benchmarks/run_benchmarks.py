@@ -0,0 +1,275 @@
+#!/usr/bin/env python
+
+# Copyright (c) 2016 Florian Wagner
+#
+# This file is part of GO-PCA.
+#
+# GO-PCA is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, Version 3,
+# as published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Time the phases of the GO-PCA pipeline on synthetic data.
+
+The results are written to a JSON file, so that timings can be compared
+between releases. All data are generated locally (no downloads).
+
+Example
+-------
+
+::
+
+    $ python benchmarks/run_benchmarks.py -s small medium -o results.json
+
+"""
+
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+from builtins import *
+
+import os
+import sys
+import io
+import json
+import time
+import logging
+import platform
+import argparse
+import datetime
+from collections import OrderedDict
+
+import numpy as np
+
+from genometools import enrichment
+from genometools.expression import ExpGenome
+from genometools.enrichment import GeneSetEnrichmentAnalysis
+
+import gopca
+from gopca import GOPCAParams, GOPCA, GOPCASignatureMatrix
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from synthetic import make_expression_matrix, make_gene_sets, make_ontology
+
+logger = logging.getLogger(__name__)
+
+# (p genes, n samples, planted rank, number of gene sets)
+SIZES = OrderedDict([
+    ('small', (2000, 50, 3, 300)),
+    ('medium', (8000, 200, 5, 1500)),
+    ('large', (20000, 500, 8, 5000)),
+])
+
+PHASES = ['pc_estimation', 'pca', 'enrichment_setup', 'enrichment',
+          'local_filter', 'signature_generation', 'global_filter',
+          'signature_matrix']
+
+
+class Timer(object):
+    """Accumulates the wall time spent in each phase."""
+    def __init__(self):
+        self.times = OrderedDict((phase, 0.0) for phase in PHASES)
+        self._phase = None
+        self._t0 = None
+
+    def __call__(self, phase):
+        self._phase = phase
+        return self
+
+    def __enter__(self):
+        self._t0 = time.time()
+        return self
+
+    def __exit__(self, *args):
+        self.times[self._phase] += (time.time() - self._t0)
+
+
+def run_phases(M, timer):
+    """Perform GO-PCA with a single configuration, timing each phase.
+
+    This mirrors `GOPCA.run`, but calls the individual steps directly.
+    """
+    assert M._finalize_configs()
+    config = M.configs[0]
+    params = config.params
+
+    with timer('pc_estimation'):
+        num_components = M._get_num_components()
+    if num_components == 0:
+        raise ValueError('No principal components to test.')
+
+    with timer('pca'):
+        W, Y, frac = M._perform_pca(num_components)
+
+    with timer('enrichment_setup'):
+        enr_logger = logging.getLogger(enrichment.__name__)
+        enr_logger.setLevel(logging.ERROR)
+        genome = ExpGenome.from_gene_names(M.matrix.genes.tolist())
+        gse_analysis = GeneSetEnrichmentAnalysis(genome, config.gene_sets)
+        enr_logger.setLevel(logging.NOTSET)
+
+    final_signatures = []
+    for d in range(num_components):
+        signatures = []
+        for pc in [d+1, -(d+1)]:
+            with timer('enrichment'):
+                ranked_genes = M._get_ranked_genes(M.matrix, W, pc)
+                enriched = M._get_enriched_gene_sets(
+                    params, gse_analysis, ranked_genes)
+            if not enriched:
+                continue
+
+            with timer('local_filter'):
+                if params.escore_thresh is not None:
+                    enriched = [enr for enr in enriched
+                                if enr.escore >= params.escore_thresh]
+                if not params.no_local_filter:
+                    enriched = M._local_filter(params, gse_analysis,
+                                               enriched, ranked_genes)
+
+            with timer('signature_generation'):
+                for enr in enriched:
+                    signatures.append(M._generate_signature(
+                        M.matrix, params, pc, enr))
+
+        with timer('global_filter'):
+            if not params.no_global_filter:
+                signatures = M._global_filter(
+                    params, signatures, final_signatures,
+                    config.gene_ontology)
+        final_signatures.extend(signatures)
+
+    with timer('signature_matrix'):
+        GOPCASignatureMatrix.from_signatures(final_signatures)
+
+    return num_components, len(final_signatures)
+
+
+def benchmark_size(name, repeat=3, seed=0, num_permutations=15,
+                   dtype=np.float64):
+    """Benchmark GO-PCA on synthetic data of a given size."""
+    p, n, rank, num_gene_sets = SIZES[name]
+    logger.info('Generating synthetic data "%s" (p=%d, n=%d, rank=%d, '
+                '%d gene sets)...', name, p, n, rank, num_gene_sets)
+    t0 = time.time()
+    module_size = min(200, p // (2 * rank))
+    matrix, modules = make_expression_matrix(
+        p, n, rank=rank, module_size=module_size, seed=seed)
+    gene_sets = make_gene_sets(matrix.genes.tolist(), modules,
+                               num_gene_sets=num_gene_sets, seed=seed)
+    gene_ontology = make_ontology(gene_sets, seed=seed)
+    data_time = time.time() - t0
+
+    params = GOPCAParams()
+    result = OrderedDict([
+        ('size', name),
+        ('p', p),
+        ('n', n),
+        ('planted_rank', rank),
+        ('num_gene_sets', num_gene_sets),
+        ('dtype', np.dtype(dtype).name),
+        ('data_generation_time', data_time),
+    ])
+
+    # each phase: best time of all repeats
+    best = OrderedDict((phase, float('inf')) for phase in PHASES)
+    best_total = float('inf')
+    for r in range(repeat):
+        M = GOPCA.simple_setup(matrix, params, gene_sets, gene_ontology,
+                               pc_num_permutations=num_permutations,
+                               pc_seed=seed, dtype=dtype)
+        timer = Timer()
+        num_components, num_signatures = run_phases(M, timer)
+        for phase, t in timer.times.items():
+            best[phase] = min(best[phase], t)
+
+        # end-to-end timing (includes logging etc.)
+        M = GOPCA.simple_setup(matrix, params, gene_sets, gene_ontology,
+                               pc_num_permutations=num_permutations,
+                               pc_seed=seed, dtype=dtype)
+        t0 = time.time()
+        M.run()
+        best_total = min(best_total, time.time() - t0)
+
+    result['num_components'] = int(num_components)
+    result['num_signatures'] = num_signatures
+    result['timings'] = best
+    result['total_time'] = best_total
+    logger.info('Size "%s": %d PCs, %d signatures, total %.2f s.',
+                name, num_components, num_signatures, best_total)
+    return result
+
+
+def get_argument_parser():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+
+    parser.add_argument(
+        '-s', '--sizes', nargs='+', choices=list(SIZES.keys()),
+        default=['small', 'medium'],
+        help='Data sizes to benchmark. [small medium]')
+
+    parser.add_argument(
+        '-r', '--repeat', type=int, default=3,
+        help='Number of repetitions (the best time is reported). [3]')
+
+    parser.add_argument(
+        '--seed', type=int, default=0,
+        help='Random number generator seed. [0]')
+
+    parser.add_argument(
+        '-p', '--pc-permutations', type=int, default=15,
+        help='Number of permutations for estimating the number of PCs. [15]')
+
+    parser.add_argument(
+        '--float32', action='store_true',
+        help='Run GO-PCA in single precision (see `GOPCA.dtype`).')
+
+    parser.add_argument(
+        '-o', '--output-file', type=str, required=True,
+        help='Output JSON file.')
+
+    return parser
+
+
+def main(args=None):
+    if args is None:
+        parser = get_argument_parser()
+        args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO,
+                        format='[%(asctime)s] %(levelname)s: %(message)s')
+    # only report benchmark progress
+    logging.getLogger(gopca.__name__).setLevel(logging.WARNING)
+
+    results = OrderedDict([
+        ('gopca_version', gopca.__version__),
+        ('timestamp', str(datetime.datetime.utcnow())),
+        ('python_version', platform.python_version()),
+        ('numpy_version', np.__version__),
+        ('platform', platform.platform()),
+        ('repeat', args.repeat),
+        ('seed', args.seed),
+        ('benchmarks', []),
+    ])
+    for name in args.sizes:
+        results['benchmarks'].append(benchmark_size(
+            name, repeat=args.repeat, seed=args.seed,
+            num_permutations=args.pc_permutations,
+            dtype=(np.float32 if args.float32 else np.float64)))
+
+    with io.open(args.output_file, 'w', encoding='UTF-8') as ofh:
+        ofh.write(str(json.dumps(results, indent=2)))
+    logger.info('Wrote benchmark results to "%s".', args.output_file)
+
+    return 0
+
+
+if __name__ == '__main__':
+    return_code = main()
+    sys.exit(return_code)
@@ -0,0 +1,183 @@
+# Copyright (c) 2016 Florian Wagner
+#
+# This file is part of GO-PCA.
+#
+# GO-PCA is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, Version 3,
+# as published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Seeded generators for synthetic GO-PCA inputs.
+
+The expression matrices contain a planted low-rank structure: Each rank-one
+component ("module") affects a disjoint set of genes. The gene sets are
+generated so that some of them overlap strongly with the planted modules,
+and the ontology is a random tree over the gene sets, so that all parts of
+the GO-PCA pipeline (including the global filter) have work to do.
+"""
+
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+from builtins import *
+
+import numpy as np
+
+from genometools.basic import GeneSet, GeneSetCollection
+from genometools.expression import ExpMatrix
+from genometools.ontology import GOTerm, GeneOntology
+
+
+def make_expression_matrix(p, n, rank=5, module_size=100, effect=3.0,
+                           seed=0):
+    """Generate an expression matrix with planted low-rank structure.
+
+    Parameters
+    ----------
+    p : int
+        The number of genes.
+    n : int
+        The number of samples.
+    rank : int, optional
+        The number of planted modules. [5]
+    module_size : int, optional
+        The number of genes in each module. [100]
+    effect : float, optional
+        The standard deviation of the strongest module effect, relative
+        to the (unit) noise. Module effects decrease linearly with their
+        index, so that each module corresponds to a different PC. [3.0]
+    seed : int, optional
+        The random number generator seed. [0]
+
+    Returns
+    -------
+    `genometools.expression.ExpMatrix`
+        The expression matrix.
+    list of (list of str)
+        The genes in each planted module.
+    """
+    assert rank * module_size <= p
+
+    rng = np.random.RandomState(seed)
+    genes = ['G%06d' % i for i in range(p)]
+    samples = ['S%05d' % j for j in range(n)]
+    X = rng.randn(p, n)
+
+    perm = rng.permutation(p)
+    modules = []
+    for k in range(rank):
+        idx = perm[(k*module_size):((k+1)*module_size)]
+        scores = rng.randn(n)
+        strength = effect * (rank - k) / rank
+        X[idx, :] += strength * np.outer(rng.uniform(0.5, 1.5, idx.size),
+                                         scores)
+        modules.append([genes[i] for i in idx])
+
+    matrix = ExpMatrix(genes=genes, samples=samples, X=X)
+    return matrix, modules
+
+
+def make_gene_sets(genes, modules, num_gene_sets=500, min_size=10,
+                   max_size=200, sets_per_module=3, planted_frac=0.5,
+                   seed=0):
+    """Generate gene sets that partially overlap with planted modules.
+
+    Parameters
+    ----------
+    genes : list of str
+        All genes.
+    modules : list of (list of str)
+        The planted modules (see `make_expression_matrix`).
+    num_gene_sets : int, optional
+        The total number of gene sets. [500]
+    min_size : int, optional
+        The minimum gene set size. [10]
+    max_size : int, optional
+        The maximum gene set size. [200]
+    sets_per_module : int, optional
+        The number of gene sets generated for each planted module. [3]
+    planted_frac : float, optional
+        The fraction of module genes contained in each of those gene sets.
+        The sets are filled up with random genes. [0.5]
+    seed : int, optional
+        The random number generator seed. [0]
+
+    Returns
+    -------
+    `genometools.basic.GeneSetCollection`
+        The gene sets. Their IDs have the same format as GO term IDs
+        (see `make_ontology`).
+    """
+    assert len(modules) * sets_per_module <= num_gene_sets
+
+    rng = np.random.RandomState(seed)
+    genes = np.array(genes)
+
+    members = []
+    for module in modules:
+        module = np.array(module)
+        k = int(planted_frac * module.size)
+        for _ in range(sets_per_module):
+            sel = rng.choice(module, size=k, replace=False)
+            fill = rng.choice(genes, size=rng.randint(0, k+1), replace=False)
+            members.append(set(sel) | set(fill))
+
+    while len(members) < num_gene_sets:
+        size = rng.randint(min_size, max_size + 1)
+        members.append(set(rng.choice(genes, size=size, replace=False)))
+
+    # shuffle, so that gene sets for planted modules are not all at the top
+    order = rng.permutation(len(members))
+    gene_sets = []
+    for i, j in enumerate(order):
+        id_ = 'GO:%07d' % (i+1)
+        gene_sets.append(GeneSet(id_, 'Synthetic gene set %d' % (i+1),
+                                 sorted(members[j]), source='GO',
+                                 collection='BP'))
+    return GeneSetCollection(gene_sets)
+
+
+def make_ontology(gene_sets, seed=0):
+    """Generate a random tree-shaped ontology over the gene sets.
+
+    Each gene set ID becomes a term whose parent is a randomly chosen term
+    created before it (or the root term).
+
+    Parameters
+    ----------
+    gene_sets : `genometools.basic.GeneSetCollection`
+        The gene sets (see `make_gene_sets`).
+    seed : int, optional
+        The random number generator seed. [0]
+
+    Returns
+    -------
+    `genometools.ontology.GeneOntology`
+        The ontology (with ancestors and descendants determined).
+    """
+    rng = np.random.RandomState(seed)
+    domain = 'biological_process'
+
+    root_id = 'GO:0000000'
+    ids = [root_id]
+    terms = [GOTerm(root_id, 'Synthetic root', domain, 'Root term.')]
+    for gs in gene_sets:
+        parent = ids[rng.randint(len(ids))]
+        terms.append(GOTerm(gs.id, gs.name, domain, 'Synthetic term.',
+                            is_a=[parent]))
+        ids.append(gs.id)
+
+    ontology = GeneOntology(terms)
+    for term in ontology:
+        for parent in term.is_a:
+            ontology[parent].children.add(term.id)
+    ontology._flatten_ancestors()
+    ontology._flatten_descendants()
+    ontology._flattened = True
+    return ontology
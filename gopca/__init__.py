@@ -2,8 +2,7 @@
 #                        print_function)
 from builtins import str as text
 
-import pkg_resources
-
+from ._version import __version__
 from .params import GOPCAParams
 from .config import GOPCAConfig
 from .signature import GOPCASignature
@@ -11,7 +10,7 @@ from .signature_matrix import GOPCASignatureMatrix
 from .run import GOPCARun
 from .go_pca import GOPCA
 
-__version__ = text(pkg_resources.require('gopca')[0].version)
+__version__ = text(__version__)
 
 __all__ = ['GOPCAParams', 'GOPCAConfig', 'GOPCA', 'GOPCARun',
            'GOPCASignatureMatrix', 'GOPCASignature']
@@ -0,0 +1,160 @@
+# Copyright (c) 2016 Florian Wagner
+#
+# This file is part of GO-PCA.
+#
+# GO-PCA is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, Version 3,
+# as published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Support for running GO-PCA in asyncio applications (Python 3.5+).
+
+Example
+-------
+
+::
+
+    async def handle(M):
+        job = M.run_async(timeout=600)
+        async for kind, data in job:
+            if kind == 'progress':
+                print('PC %d / %d' % (data['pc'], data['num_components']))
+        return await job
+
+"""
+
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+from builtins import *
+
+import logging
+import asyncio
+
+logger = logging.getLogger(__name__)
+
+
+class GOPCAAsyncRun(object):
+    """A GO-PCA run that is performed asynchronously.
+
+    The run is performed by the same generator as `GOPCA.run` (see
+    `GOPCA._generate`). Each step of this generator (determining the number
+    of PCs, the PCA, and the enrichment analysis and signature generation
+    for each PC) is executed in an executor, and control is returned to the
+    event loop in between.
+
+    Iterating over the object (``async for``) performs the run and yields
+    ``(kind, data)`` tuples for each phase, progress update and signature
+    (see `GOPCA._generate`). Awaiting the object performs the remainder of
+    the run and returns the `GOPCARun` (or ``None`` if the run failed).
+
+    If the task performing the run is cancelled, or the timeout expires, no
+    further steps are started. The step that is currently being executed
+    cannot be interrupted, but its results are discarded.
+
+    Parameters
+    ----------
+    gopca : `GOPCA`
+        The GO-PCA object.
+    checkpoint_dir : str, optional
+        See `GOPCA.run`. [None]
+    result_cache : `GOPCAResultCache`, optional
+        See `GOPCA.run`. [None]
+    executor : `concurrent.futures.Executor`, optional
+        The executor. If ``None``, the default executor of the event loop is
+        used. [None]
+    timeout : float, optional
+        The maximum run time (in seconds), counted from the first step. If
+        it is exceeded, `asyncio.TimeoutError` is raised. [None]
+    """
+    def __init__(self, gopca, checkpoint_dir=None, result_cache=None,
+                 executor=None, timeout=None):
+        if timeout is not None:
+            assert isinstance(timeout, (int, float)) and timeout >= 0
+
+        self.gopca = gopca
+        self.executor = executor
+        self.timeout = timeout
+
+        self._steps = gopca._generate(checkpoint_dir=checkpoint_dir,
+                                      result_cache=result_cache)
+        self._deadline = None
+        self._done = False
+        self._result = None
+
+    def __repr__(self):
+        return '<%s instance (gopca=%r, timeout=%s, done=%s)>' \
+               % (self.__class__.__name__, self.gopca, str(self.timeout),
+                  str(self._done))
+
+    @property
+    def done(self):
+        """Whether the run has finished (or was aborted)."""
+        return self._done
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while True:
+            item = await self._next_step()
+            if item is None:
+                raise StopAsyncIteration
+            kind, data = item
+            if kind == 'run':
+                self._result = data
+            else:
+                return item
+
+    def __await__(self):
+        return self._wait().__await__()
+
+    async def _wait(self):
+        async for _ in self:
+            pass
+        return self._result
+
+    async def _next_step(self):
+        """Execute the next step of the run in the executor."""
+        if self._done:
+            return None
+
+        loop = asyncio.get_event_loop()
+        if self.timeout is not None and self._deadline is None:
+            self._deadline = loop.time() + self.timeout
+
+        future = loop.run_in_executor(self.executor, next, self._steps, None)
+        # the future is shielded, so that the generator is not closed while
+        # the step is still being executed
+        try:
+            if self._deadline is None:
+                item = await asyncio.shield(future)
+            else:
+                item = await asyncio.wait_for(
+                    asyncio.shield(future),
+                    max(self._deadline - loop.time(), 0))
+        except (asyncio.CancelledError, asyncio.TimeoutError):
+            logger.info('Aborting GO-PCA run.')
+            self._abort(future)
+            raise
+        except Exception:
+            self._done = True
+            raise
+
+        if item is None:
+            self._done = True
+        return item
+
+    def _abort(self, future):
+        """Stop the run once the current step has finished."""
+        self._done = True
+        if future.done():
+            self._steps.close()
+        else:
+            future.add_done_callback(lambda f: self._steps.close())
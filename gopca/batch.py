@@ -0,0 +1,231 @@
+# Copyright (c) 2016 Florian Wagner
+#
+# This file is part of GO-PCA.
+#
+# GO-PCA is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, Version 3,
+# as published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Functions for running GO-PCA on many datasets with the same gene sets.
+
+The gene sets (and the Gene Ontology) are loaded only once, by the parent
+process. The datasets are then analyzed by a pool of worker processes. On
+platforms that support ``fork``, the workers share the parent's gene set
+and ontology objects (copy-on-write), so they do not need to be loaded,
+parsed or unpickled again. Each worker also keeps the
+`genometools.enrichment.GeneSetEnrichmentAnalysis` objects it creates,
+so datasets with the same genes reuse them.
+"""
+
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+from builtins import *
+
+import os
+import io
+import time
+import logging
+import multiprocessing
+from collections import OrderedDict
+
+import pandas as pd
+
+from genometools.basic import GeneSetCollection
+from genometools.ontology import GeneOntology
+
+from . import GOPCAParams, GOPCAConfig
+from .go_pca import GOPCA
+
+logger = logging.getLogger(__name__)
+
+# read-only data shared by all datasets
+# (set in the parent process before the worker processes are created)
+_shared = {}
+
+
+def read_manifest(path, encoding='UTF-8'):
+    """Read a manifest of expression files.
+
+    Each (non-empty) line of the manifest contains the path of an expression
+    file, optionally followed by a tab and a name for the dataset. If no name
+    is specified, the file name without extension is used. Relative paths
+    are interpreted relative to the location of the manifest. Lines starting
+    with "#" are ignored.
+
+    Parameters
+    ----------
+    path : str
+        The path of the manifest.
+    encoding : str, optional
+        The file encoding. ["UTF-8"]
+
+    Returns
+    -------
+    list of (str, str)
+        The name and path of each dataset.
+
+    Raises
+    ------
+    ValueError
+        If two datasets have the same name.
+    """
+    base_dir = os.path.dirname(os.path.abspath(path))
+    datasets = []
+    names = set()
+    with io.open(path, encoding=encoding) as fh:
+        for l in fh:
+            l = l.rstrip('\r\n')
+            if not l.strip() or l.startswith('#'):
+                continue
+            fields = l.split('\t')
+            exp_path = os.path.join(base_dir, fields[0])
+            if len(fields) > 1 and fields[1]:
+                name = fields[1]
+            else:
+                name = os.path.splitext(os.path.basename(fields[0]))[0]
+            if name in names:
+                raise ValueError('Duplicate dataset name in manifest: "%s"'
+                                 % name)
+            names.add(name)
+            datasets.append((name, exp_path))
+    return datasets
+
+
+def _init_worker(params, gene_sets, gene_ontology, output_dir, read_kwargs,
+                 gopca_kwargs):
+    _shared['params'] = params
+    _shared['gene_sets'] = gene_sets
+    _shared['gene_ontology'] = gene_ontology
+    _shared['output_dir'] = output_dir
+    _shared['read_kwargs'] = read_kwargs
+    _shared['gopca_kwargs'] = gopca_kwargs
+    _shared['gse_cache'] = {}
+
+
+def _run_dataset(dataset):
+    """Run GO-PCA on a single dataset (in a worker process)."""
+    name, path = dataset
+    t0 = time.time()
+
+    result = OrderedDict([
+        ('name', name),
+        ('expression_file', path),
+        ('status', 'failed'),
+        ('p', None),
+        ('n', None),
+        ('num_components', None),
+        ('num_signatures', None),
+        ('exec_time', None),
+        ('run_file', None),
+        ('error', None),
+    ])
+
+    try:
+        matrix = GOPCA.read_expression(path, **_shared['read_kwargs'])
+        result['p'], result['n'] = matrix.p, matrix.n
+
+        configs = [GOPCAConfig(_shared['params'], _shared['gene_sets'],
+                               _shared['gene_ontology'])]
+        M = GOPCA(matrix, configs, gse_cache=_shared['gse_cache'],
+                  **_shared['gopca_kwargs'])
+        run = M.run()
+
+        if run is not None:
+            run_file = os.path.join(_shared['output_dir'],
+                                    '%s.pickle' % name)
+            run.write_pickle(run_file)
+            result['status'] = 'success'
+            result['num_components'] = run.W.shape[1]
+            result['num_signatures'] = run.sig_matrix.q
+            result['run_file'] = run_file
+
+    except Exception as err:
+        # one failed dataset should not abort the whole batch
+        logger.exception('GO-PCA failed for dataset "%s".', name)
+        result['error'] = '%s: %s' % (err.__class__.__name__, str(err))
+
+    result['exec_time'] = time.time() - t0
+    return result
+
+
+def run_batch(datasets, params, gene_sets, output_dir, gene_ontology=None,
+              num_processes=None, read_kwargs=None, **kwargs):
+    """Run GO-PCA on multiple datasets, using the same gene sets.
+
+    Parameters
+    ----------
+    datasets : list of (str, str)
+        The name and expression file path of each dataset
+        (see `read_manifest`).
+    params : `GOPCAParams`
+        The GO-PCA parameters.
+    gene_sets : `genometools.basic.GeneSetCollection`
+        The gene sets.
+    output_dir : str
+        The output directory. The run for each dataset is stored as
+        "<name>.pickle".
+    gene_ontology : `genometools.ontology.GeneOntology`, optional
+        The Gene Ontology. [None]
+    num_processes : int, optional
+        The number of worker processes. If ``None``, the number of CPUs is
+        used. If 1, all datasets are analyzed in the current process.
+        [None]
+    read_kwargs : dict, optional
+        Keyword arguments for `GOPCA.read_expression`. [None]
+    kwargs : dict
+        Additional keyword arguments for `GOPCA`.
+
+    Returns
+    -------
+    `pandas.DataFrame`
+        A summary table, with one row per dataset.
+    """
+    assert isinstance(params, GOPCAParams)
+    assert isinstance(gene_sets, GeneSetCollection)
+    if gene_ontology is not None:
+        assert isinstance(gene_ontology, GeneOntology)
+    if read_kwargs is None:
+        read_kwargs = {}
+
+    if not os.path.isdir(output_dir):
+        os.makedirs(output_dir)
+
+    if num_processes is None:
+        num_processes = multiprocessing.cpu_count()
+    num_processes = max(min(num_processes, len(datasets)), 1)
+
+    init_args = (params, gene_sets, gene_ontology, output_dir, read_kwargs,
+                 kwargs)
+
+    logger.info('Running GO-PCA on %d datasets (%d processes)...',
+                len(datasets), num_processes)
+    t0 = time.time()
+    if num_processes == 1:
+        _init_worker(*init_args)
+        results = []
+        for dataset in datasets:
+            results.append(_run_dataset(dataset))
+    else:
+        pool = multiprocessing.Pool(num_processes, initializer=_init_worker,
+                                    initargs=init_args)
+        try:
+            # process the datasets one at a time, so that slow datasets
+            # do not hold up other datasets assigned to the same worker
+            results = list(pool.imap(_run_dataset, datasets, chunksize=1))
+        finally:
+            pool.close()
+            pool.join()
+
+    summary = pd.DataFrame(results).set_index('name')
+    num_failed = (summary['status'] != 'success').sum()
+    logger.info('Analyzed %d datasets in %.1f s (%d failed).',
+                len(datasets), time.time() - t0, num_failed)
+    return summary
@@ -0,0 +1,156 @@
+# Copyright (c) 2016 Florian Wagner
+#
+# This file is part of GO-PCA.
+#
+# GO-PCA is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, Version 3,
+# as published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Module containing the `GOPCACheckpoint` class.
+
+"""
+
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+from builtins import *
+
+import os
+import shutil
+import logging
+import tempfile
+
+import six
+
+if six.PY2:
+    import cPickle as pickle
+else:
+    import pickle
+
+logger = logging.getLogger(__name__)
+
+
+def write_pickle_atomic(path, obj):
+    """Pickle an object to a file, without ever leaving a partial file.
+
+    The object is written to a temporary file in the same directory first,
+    which is then renamed.
+
+    Parameters
+    ----------
+    path : str
+        The path of the file.
+    obj : object
+        The object (must be picklable).
+
+    Returns
+    -------
+    None
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path),
+                                    suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as ofh:
+            pickle.dump(obj, ofh, pickle.HIGHEST_PROTOCOL)
+        if os.path.exists(path) and os.name == 'nt':
+            # `os.rename` does not replace files on Windows
+            os.remove(path)
+        os.rename(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class GOPCACheckpoint(object):
+    """Stores intermediate results of a GO-PCA run, so it can be resumed.
+
+    All checkpoint data for a run are stored in a subdirectory of the
+    checkpoint directory, named after a key that identifies the inputs
+    of the run (see `GOPCA.run`). Each object is written to a temporary file
+    first and then renamed (see `write_pickle_atomic`), so that an
+    interrupted write never leaves a corrupted checkpoint behind.
+
+    Parameters
+    ----------
+    checkpoint_dir : str
+        The checkpoint directory.
+    key : str
+        The key identifying the run.
+    """
+    def __init__(self, checkpoint_dir, key):
+        self.checkpoint_dir = checkpoint_dir
+        self.key = key
+        self.path = os.path.join(checkpoint_dir, key)
+
+    def __repr__(self):
+        return '<%s object (path="%s")>' \
+               % (self.__class__.__name__, self.path)
+
+    def _get_file(self, name):
+        return os.path.join(self.path, name + '.pickle')
+
+    def load(self, name):
+        """Load an object from the checkpoint.
+
+        Parameters
+        ----------
+        name : str
+            The name of the object.
+
+        Returns
+        -------
+        object or None
+            The object, or ``None`` if it does not exist or could not be
+            read.
+        """
+        path = self._get_file(name)
+        if not os.path.isfile(path):
+            return None
+        try:
+            with open(path, 'rb') as fh:
+                obj = pickle.load(fh)
+        except Exception as err:
+            logger.warning('Could not read checkpoint file "%s": %s',
+                           path, str(err))
+            return None
+        logger.debug('Loaded checkpoint "%s".', path)
+        return obj
+
+    def save(self, name, obj):
+        """Save an object to the checkpoint.
+
+        Parameters
+        ----------
+        name : str
+            The name of the object.
+        obj : object
+            The object (must be picklable).
+
+        Returns
+        -------
+        None
+        """
+        if not os.path.isdir(self.path):
+            os.makedirs(self.path)
+
+        path = self._get_file(name)
+        write_pickle_atomic(path, obj)
+        logger.debug('Saved checkpoint "%s".', path)
+
+    def clear(self):
+        """Remove all checkpoint data for the run.
+
+        Returns
+        -------
+        None
+        """
+        if os.path.isdir(self.path):
+            shutil.rmtree(self.path)
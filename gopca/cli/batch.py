@@ -0,0 +1,192 @@
+#!/usr/bin/env python
+
+# Copyright (c) 2016 Florian Wagner
+#
+# This file is part of GO-PCA.
+#
+# GO-PCA is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, Version 3,
+# as published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Script to run GO-PCA on many expression matrices with the same gene sets.
+
+Example
+-------
+
+::
+
+    $ gopca_batch.py -m [manifest_file] -s [gene_set_file] \
+            -t [ontology_file] -o [output_dir] -j 8
+
+"""
+
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+from builtins import *
+
+import os
+import sys
+import textwrap
+
+from gopca import util
+from gopca.loader import load_gene_sets_and_ontology
+from gopca.cli import arguments
+from gopca import GOPCAParams
+from gopca.batch import read_manifest, run_batch
+
+
+def get_argument_parser():
+
+    prog = 'gopca_batch.py'
+    description = 'Run GO-PCA on multiple datasets with the same gene sets.'
+    parser = arguments.get_argument_parser(prog, description)
+
+    file_mv = arguments.file_mv
+    int_mv = arguments.int_mv
+
+    g = parser.add_argument_group('Input and output files')
+
+    g.add_argument(
+        '-m', '--manifest-file', type=str, required=True, metavar=file_mv,
+        help=textwrap.dedent("""\
+            Text file with the path of one expression file per line
+            (optionally followed by a tab and the dataset name)."""))
+
+    g.add_argument(
+        '-s', '--gene-set-file', type=str, required=True, metavar=file_mv,
+        help='Tab-separated text file containing the gene sets.'
+    )
+
+    g.add_argument(
+        '-t', '--gene-ontology-file', type=str, metavar=file_mv,
+        help='OBO file containing the Gene Ontology.'
+    )
+
+    g.add_argument(
+        '-c', '--config-file', type=str, metavar=file_mv,
+        help='GO-PCA configuration file.'
+    )
+
+    g.add_argument(
+        '-o', '--output-dir', type=str, required=True, metavar=file_mv,
+        help=textwrap.dedent("""\
+            Output directory. One pickle file is written for each dataset
+            ("<name>.pickle"), along with a summary table
+            ("summary.tsv")."""))
+
+    g.add_argument(
+        '--no-input-cache', action='store_true',
+        help=textwrap.dedent("""\
+            Always parse the input files, instead of using (and creating)
+            binary caches of their contents."""))
+
+    g.add_argument(
+        '--input-cache-dir', type=str, metavar=file_mv,
+        help=textwrap.dedent("""\
+            Directory for storing binary caches of the input files
+            (by default, caches are stored alongside the input files)."""))
+
+    g = parser.add_argument_group('Batch options')
+
+    g.add_argument(
+        '-j', '--processes', type=int, metavar=int_mv, default=0,
+        help=textwrap.dedent("""\
+            Number of worker processes (0 = number of CPUs). [%s]
+            """ % '%(default)d'))
+
+    g.add_argument(
+        '-D', '--n-components', type=int, metavar=int_mv, default=0,
+        help=textwrap.dedent("""\
+            Number of principal components to test
+            (0 = determine automatically using a permutation test). [%s]
+            """ % '%(default)d'))
+
+    g.add_argument(
+        '-G', '--sel-var-genes', type=int, metavar=int_mv, default=0,
+        help=textwrap.dedent("""\
+            Variance filter: Keep G most variable genes (0 = off). [%s]
+            """ % '%(default)d'))
+
+    arguments.add_reporting_args(parser)
+
+    return parser
+
+
+def main(args=None):
+    """Run GO-PCA on all datasets in a manifest.
+
+    Parameters
+    ----------
+    args: argparse.Namespace object, optional
+        The argument values. If not specified, the values will be obtained by
+        parsing the command line arguments using the `argparse` module.
+
+    Returns
+    -------
+    int
+        Exit code (0 if no error occurred).
+    """
+    vinfo = sys.version_info
+    if not (vinfo >= (2, 7)):
+        raise SystemError('Python interpreter version >= 2.7 required, '
+                          'found %d.%d instead.' % (vinfo.major, vinfo.minor))
+
+    if args is None:
+        parser = get_argument_parser()
+        args = parser.parse_args()
+
+    # configure root logger
+    logger = util.get_logger(log_file=args.log_file, quiet=args.quiet)
+
+    try:
+        datasets = read_manifest(args.manifest_file)
+    except ValueError as err:
+        logger.error(str(err))
+        return 1
+    if not datasets:
+        logger.error('The manifest does not contain any datasets.')
+        return 1
+
+    if args.config_file is not None:
+        params = GOPCAParams.read_ini(args.config_file)
+    else:
+        params = GOPCAParams()
+
+    # load the gene sets and the ontology only once
+    gene_sets, gene_ontology = load_gene_sets_and_ontology(
+        args.gene_set_file, args.gene_ontology_file,
+        use_cache=(not args.no_input_cache), cache_dir=args.input_cache_dir,
+        part_of_cc_only=params.go_part_of_cc_only)
+
+    read_kwargs = {
+        'use_cache': not args.no_input_cache,
+        'cache_dir': args.input_cache_dir,
+        'sel_var_genes': args.sel_var_genes,
+    }
+    num_processes = args.processes or None
+    summary = run_batch(datasets, params, gene_sets, args.output_dir,
+                        gene_ontology=gene_ontology,
+                        num_processes=num_processes, read_kwargs=read_kwargs,
+                        num_components=args.n_components,
+                        verbose=args.verbose)
+
+    summary_file = os.path.join(args.output_dir, 'summary.tsv')
+    summary.to_csv(summary_file, sep=str('\t'))
+    logger.info('Stored summary of %d datasets in "%s".',
+                len(datasets), summary_file)
+
+    if (summary['status'] != 'success').any():
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    return_code = main()
+    sys.exit(return_code)
@@ -38,7 +38,6 @@ import os
 # import csv
 import math
 
-import xlsxwriter
 import numpy as np
 
 from genometools import misc
@@ -68,6 +67,9 @@ def main(args=None):
         parser = get_argument_parser()
         args = parser.parse_args()
 
+    # import here, so that `--help` and `--version` are fast
+    import xlsxwriter
+
     gopca_file = args.gopca_file
     output_file = args.output_file
 
@@ -62,6 +62,10 @@ def get_argument_parser():
         '-s', '--print-signatures', action='store_true',
         help='Print signatures of the GO-PCA result.')
 
+    g.add_argument(
+        '-p', '--print-profile', action='store_true',
+        help='Print timings and counters of the GO-PCA run.')
+
     arguments.add_reporting_args(parser)
 
     return parser
@@ -82,6 +86,7 @@ def main(args=None):
 
     print_user_config = args.print_user_config
     print_signatures = args.print_signatures
+    print_profile = args.print_profile
 
     # configure root logger
     log_stream = sys.stderr
@@ -115,6 +120,16 @@ def main(args=None):
             print('- User-provided config data:')
             for s in run.user_config.get_param_strings():
                 print('    %s' % s)
+
+        if print_profile:
+            # runs generated by older versions do not have a profile
+            profile = getattr(run, 'profile', None)
+            if profile is None:
+                print('- No profile data available.')
+            else:
+                print('- Profile:')
+                for s in profile.get_summary_strings():
+                    print('    %s' % s)
         print()
 
     print('GO-PCA Result')
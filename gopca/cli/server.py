@@ -0,0 +1,165 @@
+#!/usr/bin/env python
+
+# Copyright (c) 2016 Florian Wagner
+#
+# This file is part of GO-PCA.
+#
+# GO-PCA is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, Version 3,
+# as published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Script to start a resident GO-PCA server (see `gopca.server`).
+
+Example
+-------
+
+::
+
+    $ gopca_server.py -s [gene_set_file] -t [ontology_file] -p 8000
+
+"""
+
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+from builtins import *
+
+import os
+import sys
+import textwrap
+import logging
+
+import genometools
+from genometools.basic import GeneSetCollection
+from genometools.ontology import GeneOntology
+from gopca import util
+from gopca.gene_set_io import read_gene_sets_cached, read_ontology_cached
+from gopca.cli import arguments
+from gopca.server import GOPCAServer
+
+
+def get_argument_parser():
+
+    prog = 'gopca_server.py'
+    description = 'Start a resident GO-PCA server.'
+    parser = arguments.get_argument_parser(prog, description)
+
+    file_mv = arguments.file_mv
+    int_mv = arguments.int_mv
+    str_mv = arguments.str_mv
+
+    g = parser.add_argument_group('Gene sets')
+
+    g.add_argument(
+        '-s', '--gene-set-file', type=str, required=True, action='append',
+        metavar=file_mv,
+        help=textwrap.dedent("""\
+            Tab-separated text file containing gene sets. Can be specified
+            multiple times. The name of each collection is the file name
+            without extension."""))
+
+    g.add_argument(
+        '-t', '--gene-ontology-file', type=str, metavar=file_mv,
+        help='OBO file containing the Gene Ontology.'
+    )
+
+    g.add_argument(
+        '--go-part-of-cc-only', action='store_true',
+        help='Only propagate "part of" GO relations for the CC domain.')
+
+    g.add_argument(
+        '--no-input-cache', action='store_true',
+        help=textwrap.dedent("""\
+            Always parse the input files, instead of using (and creating)
+            binary caches of their contents."""))
+
+    g = parser.add_argument_group('Server options')
+
+    g.add_argument(
+        '-H', '--host', type=str, metavar=str_mv, default='127.0.0.1',
+        help='The host address to listen on. [%(default)s]')
+
+    g.add_argument(
+        '-p', '--port', type=int, metavar=int_mv, default=8000,
+        help='The port to listen on. [%(default)d]')
+
+    g.add_argument(
+        '-j', '--workers', type=int, metavar=int_mv, default=0,
+        help=textwrap.dedent("""\
+            Number of worker processes (0 = number of CPUs). [%s]
+            """ % '%(default)d'))
+
+    g.add_argument(
+        '--max-jobs', type=int, metavar=int_mv, default=100,
+        help=textwrap.dedent("""            Maximum number of jobs kept by the server. If it is exceeded,
+            the oldest finished jobs whose results were never retrieved are
+            dropped. [%s]
+            """ % '%(default)d'))
+
+    arguments.add_reporting_args(parser)
+
+    return parser
+
+
+def main(args=None):
+
+    vinfo = sys.version_info
+    if not (vinfo >= (2, 7)):
+        raise SystemError('Python interpreter version >= 2.7 required, '
+                          'found %d.%d instead.' % (vinfo.major, vinfo.minor))
+
+    if args is None:
+        parser = get_argument_parser()
+        args = parser.parse_args()
+
+    # configure root logger
+    logger = util.get_logger(log_file=args.log_file, quiet=args.quiet,
+                             verbose=args.verbose)
+
+    gene_ontology = None
+    if args.gene_ontology_file is not None:
+        p_logger = logging.getLogger(genometools.__name__)
+        p_logger.setLevel(logging.ERROR)
+        if args.no_input_cache:
+            gene_ontology = GeneOntology.read_obo(
+                args.gene_ontology_file,
+                part_of_cc_only=args.go_part_of_cc_only)
+        else:
+            gene_ontology = read_ontology_cached(
+                args.gene_ontology_file,
+                part_of_cc_only=args.go_part_of_cc_only)
+        p_logger.setLevel(logging.NOTSET)
+
+    collections = {}
+    for path in args.gene_set_file:
+        name = os.path.splitext(os.path.basename(path))[0]
+        if args.no_input_cache:
+            gene_sets = GeneSetCollection.read_tsv(path)
+        else:
+            gene_sets = read_gene_sets_cached(path)
+        collections[name] = (gene_sets, gene_ontology)
+        logger.info('Loaded gene set collection "%s" (%d gene sets).',
+                    name, len(gene_sets))
+
+    server = GOPCAServer(collections, host=args.host, port=args.port,
+                         num_workers=(args.workers or None),
+                         max_jobs=args.max_jobs)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info('Shutting down...')
+    finally:
+        server.shutdown()
+
+    return 0
+
+if __name__ == '__main__':
+    return_code = main()
+    sys.exit(return_code)
@@ -0,0 +1,235 @@
+#!/usr/bin/env python
+
+# Copyright (c) 2016 Florian Wagner
+#
+# This file is part of GO-PCA.
+#
+# GO-PCA is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, Version 3,
+# as published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Script to run GO-PCA for a grid of parameter settings.
+
+Example
+-------
+
+::
+
+    $ gopca_sweep.py -e [expression_file] -s [gene_set_file] \
+            -t [ontology_file] -o [output_dir] \
+            --grid pval_thresh=1e-6,1e-8 --grid escore_thresh=2.0,4.0
+
+"""
+
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+from builtins import *
+
+import os
+import sys
+import textwrap
+
+from gopca import util
+from gopca.loader import load_inputs
+from gopca.cli import arguments
+from gopca import GOPCAParams
+from gopca.sweep import GOPCASweep
+
+
+def parse_grid_value(name, value):
+    """Convert a parameter value string to the type of the parameter."""
+    default = GOPCAParams.get_param_defaults()[name]
+    if isinstance(default, bool):
+        if value.lower() in ['1', 'true', 'yes']:
+            return True
+        elif value.lower() in ['0', 'false', 'no']:
+            return False
+        raise ValueError('Invalid value for parameter "%s": %s'
+                         % (name, value))
+    return type(default)(value)
+
+
+def parse_grid(grid_strings):
+    """Parse "name=value1,value2,..." strings into a parameter grid.
+
+    The ontology is only read once for all parameter settings, so
+    "go_part_of_cc_only" cannot be part of the grid (it can be set in the
+    configuration file instead).
+    """
+    defaults = GOPCAParams.get_param_defaults()
+    grid = {}
+    for s in grid_strings:
+        name, sep, values = s.partition('=')
+        if not sep or name not in defaults:
+            raise ValueError('Invalid grid specification: "%s"' % s)
+        if name == 'go_part_of_cc_only':
+            raise ValueError('Parameter "go_part_of_cc_only" cannot be '
+                             'varied in a sweep.')
+        grid[name] = [parse_grid_value(name, v) for v in values.split(',')]
+    return grid
+
+
+def get_argument_parser():
+
+    prog = 'gopca_sweep.py'
+    description = 'Run GO-PCA for a grid of parameter settings.'
+    parser = arguments.get_argument_parser(prog, description)
+
+    file_mv = arguments.file_mv
+    int_mv = arguments.int_mv
+    str_mv = arguments.str_mv
+
+    g = parser.add_argument_group('Input and output files')
+
+    g.add_argument(
+        '-e', '--expression-file', type=str, required=True, metavar=file_mv,
+        help='Tab-separated text file containing the gene expression matrix.'
+    )
+
+    g.add_argument(
+        '-s', '--gene-set-file', type=str, required=True, metavar=file_mv,
+        help='Tab-separated text file containing the gene sets.'
+    )
+
+    g.add_argument(
+        '-t', '--gene-ontology-file', type=str, metavar=file_mv,
+        help='OBO file containing the Gene Ontology.'
+    )
+
+    g.add_argument(
+        '-c', '--config-file', type=str, metavar=file_mv,
+        help=textwrap.dedent("""\
+            GO-PCA configuration file with the settings of all parameters
+            that are not part of the grid.""")
+    )
+
+    g.add_argument(
+        '-o', '--output-dir', type=str, required=True, metavar=file_mv,
+        help=textwrap.dedent("""\
+            Output directory. One pickle file is written for each
+            parameter setting ("run_<i>.pickle"), along with a summary
+            table ("summary.tsv").""")
+    )
+
+    g.add_argument(
+        '--no-input-cache', action='store_true',
+        help=textwrap.dedent("""\
+            Always parse the input files, instead of using (and creating)
+            binary caches of their contents."""))
+
+    g.add_argument(
+        '--input-cache-dir', type=str, metavar=file_mv,
+        help=textwrap.dedent("""\
+            Directory for storing binary caches of the input files
+            (by default, caches are stored alongside the input files)."""))
+
+    g = parser.add_argument_group('Parameter grid')
+
+    g.add_argument(
+        '--grid', type=str, action='append', required=True, metavar=str_mv,
+        help=textwrap.dedent("""\
+            Values of a GO-PCA parameter to test, in the form
+            "name=value1,value2,...". Can be specified multiple times,
+            in which case all combinations of values are tested."""))
+
+    g.add_argument(
+        '-D', '--n-components', type=int, metavar=int_mv, default=0,
+        help=textwrap.dedent("""\
+            Number of principal components to test
+            (0 = determine automatically using a permutation test). [%s]
+            """ % '%(default)d'))
+
+    g.add_argument(
+        '-G', '--sel-var-genes', type=int, metavar=int_mv, default=0,
+        help=textwrap.dedent("""\
+            Variance filter: Keep G most variable genes (0 = off). [%s]
+            """ % '%(default)d'))
+
+    arguments.add_reporting_args(parser)
+
+    return parser
+
+
+def main(args=None):
+    """Run a GO-PCA parameter sweep and store the results.
+
+    Parameters
+    ----------
+    args: argparse.Namespace object, optional
+        The argument values. If not specified, the values will be obtained by
+        parsing the command line arguments using the `argparse` module.
+
+    Returns
+    -------
+    int
+        Exit code (0 if no error occurred).
+    """
+    vinfo = sys.version_info
+    if not (vinfo >= (2, 7)):
+        raise SystemError('Python interpreter version >= 2.7 required, '
+                          'found %d.%d instead.' % (vinfo.major, vinfo.minor))
+
+    if args is None:
+        parser = get_argument_parser()
+        args = parser.parse_args()
+
+    # configure root logger
+    logger = util.get_logger(log_file=args.log_file, quiet=args.quiet)
+
+    try:
+        grid = parse_grid(args.grid)
+    except ValueError as err:
+        logger.error(str(err))
+        return 1
+
+    if args.config_file is not None:
+        params = GOPCAParams.read_ini(args.config_file)
+    else:
+        params = GOPCAParams()
+    param_grid = GOPCASweep.get_param_grid(grid, params)
+    logger.info('Number of parameter settings: %d', len(param_grid))
+
+    # read the expression file, the gene set file, and the ontology file
+    # (if supplied) concurrently
+    matrix, gene_sets, gene_ontology = load_inputs(
+        args.expression_file, args.gene_set_file, args.gene_ontology_file,
+        use_cache=(not args.no_input_cache), cache_dir=args.input_cache_dir,
+        part_of_cc_only=params.go_part_of_cc_only,
+        sel_var_genes=args.sel_var_genes)
+
+    sweep = GOPCASweep(matrix, param_grid, gene_sets, gene_ontology,
+                       num_components=args.n_components,
+                       verbose=args.verbose)
+    result = sweep.run_sweep()
+    if result is None:
+        logger.error('GO-PCA sweep failed!')
+        return 1
+    runs, summary = result
+
+    # write runs and summary table
+    output_dir = args.output_dir
+    if not os.path.isdir(output_dir):
+        os.makedirs(output_dir)
+
+    for i, run in enumerate(runs):
+        if run is not None:
+            run.write_pickle(os.path.join(output_dir, 'run_%d.pickle' % i))
+
+    summary_file = os.path.join(output_dir, 'summary.tsv')
+    summary.to_csv(summary_file, sep=str('\t'))
+    logger.info('Stored summary of %d parameter settings in "%s".',
+                len(runs), summary_file)
+
+    return 0
+
+if __name__ == '__main__':
+    return_code = main()
+    sys.exit(return_code)
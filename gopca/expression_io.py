@@ -0,0 +1,606 @@
+# Copyright (c) 2016 Florian Wagner
+#
+# This file is part of GO-PCA.
+#
+# GO-PCA is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, Version 3,
+# as published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Functions for reading expression data.
+
+"""
+
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+_oldstr = str
+from builtins import *
+
+import io
+import os
+import time
+import json
+import heapq
+import shutil
+import warnings
+import hashlib
+import logging
+from itertools import islice
+
+import numpy as np
+
+from genometools.expression import ExpMatrix
+
+logger = logging.getLogger(__name__)
+
+_CACHE_FORMAT_VERSION = 1
+"""Version of the on-disk format of the expression cache."""
+
+_NA_VALUES = frozenset(['', 'NA', 'N/A', 'NaN', 'nan', 'NULL', 'null'])
+"""Strings that are interpreted as missing values."""
+
+
+def _parse_values(fields, n, dtype):
+    """Parse a flat list of numeric strings into a (? x n) array."""
+    try:
+        X = np.array(fields, dtype=dtype)
+    except ValueError:
+        # slow path: missing values
+        X = np.array([np.nan if f in _NA_VALUES else float(f)
+                      for f in fields], dtype=dtype)
+    return X.reshape(-1, n)
+
+
+def _find_invalid_value(fields, n, line_nums, path):
+    """Raise an error for the first value that cannot be parsed."""
+    for i, f in enumerate(fields):
+        if f in _NA_VALUES:
+            continue
+        try:
+            float(f)
+        except ValueError:
+            raise ValueError('Expression file "%s" contains an invalid '
+                             'value "%s" (line %d, column %d).'
+                             % (path, f, line_nums[i // n], i % n + 2))
+
+
+def _count_lines(path, block_size=2**20):
+    """Count the number of lines in a file."""
+    num_lines = 0
+    last = b''
+    with io.open(path, 'rb') as fh:
+        for block in iter(lambda: fh.read(block_size), b''):
+            num_lines += block.count(b'\n')
+            last = block
+    if last and not last.endswith(b'\n'):
+        # last line without a newline character
+        num_lines += 1
+    return num_lines
+
+
+def _read_chunks(fh, n, chunk_size, dtype, path):
+    """Parse an expression file in chunks of lines.
+
+    Yields the gene names and the (genes x n) array of expression values
+    for each chunk. The header line must already have been read.
+    """
+    line_num = 1
+    while True:
+        lines = list(islice(fh, chunk_size))
+        if not lines:
+            break
+
+        chunk_genes = []
+        line_nums = []
+        fields = []
+        for l in lines:
+            line_num += 1
+            l = l.rstrip('\r\n')
+            if not l:
+                continue
+            try:
+                gene, values = l.split('\t', 1)
+            except ValueError:
+                raise ValueError('Expression file "%s" contains a row without '
+                                 'expression values (line %d).'
+                                 % (path, line_num))
+            chunk_genes.append(gene)
+            line_nums.append(line_num)
+            fields.append(values)
+        fields = '\t'.join(fields).split('\t')
+        if len(fields) != len(chunk_genes) * n:
+            raise ValueError('Expression file "%s" contains rows with an '
+                             'invalid number of values.' % path)
+        try:
+            C = _parse_values(fields, n, dtype)
+        except ValueError:
+            _find_invalid_value(fields, n, line_nums, path)
+            raise
+        yield chunk_genes, C
+
+
+def read_expression_tsv(path, sel_var_genes=0, chunk_size=5000,
+                        dtype=np.float64, encoding='UTF-8'):
+    """Read an expression matrix from a tab-delimited text file.
+
+    This is a faster alternative to `genometools.expression.ExpMatrix.read_tsv`
+    for large files. The file is read in chunks of ``chunk_size`` lines, and
+    the expression values are parsed directly into a preallocated array.
+    The lines of the file are counted before it is parsed, so the array is
+    allocated with its final size, and the peak memory use is about the size
+    of the expression matrix plus one chunk. Optionally, a variance filter is
+    applied on the fly, so that only the ``sel_var_genes`` most variable genes
+    are ever stored in memory.
+
+    The file format is the same as for `ExpMatrix.read_tsv`: The first row
+    contains the sample names, and the first column contains the gene names.
+
+    Parameters
+    ----------
+    path : str
+        The path of the text file.
+    sel_var_genes : int, optional
+        If non-zero, only keep the ``sel_var_genes`` genes with the largest
+        variance. [0]
+    chunk_size : int, optional
+        The number of lines to parse at a time. [5000]
+    dtype : `numpy.dtype`, optional
+        The data type of the expression matrix. [numpy.float64]
+    encoding : str, optional
+        The file encoding. ["UTF-8"]
+
+    Returns
+    -------
+    `genometools.expression.ExpMatrix`
+        The expression matrix. If a variance filter was applied, the genes
+        retain the order in which they appear in the file.
+    """
+    assert isinstance(path, (str, _oldstr))
+    assert isinstance(sel_var_genes, (int, np.integer)) and sel_var_genes >= 0
+    assert isinstance(chunk_size, (int, np.integer)) and chunk_size > 0
+    assert isinstance(encoding, (str, _oldstr))
+
+    t0 = time.time()
+    file_size = os.path.getsize(path)
+
+    with io.open(path, encoding=encoding) as fh:
+        header = fh.readline().rstrip('\r\n').split('\t')
+        gene_label = header[0]
+        samples = header[1:]
+        n = len(samples)
+
+        # preallocate the array (counting the lines first, so that the
+        # array never has to grow)
+        if sel_var_genes > 0:
+            capacity = sel_var_genes
+        else:
+            capacity = max(_count_lines(path) - 1, 0)
+        X = np.empty((capacity, n), dtype=dtype)
+
+        genes = []
+        row_index = []  # position of each stored row in the file
+        heap = []  # min-heap of (variance, file position, slot)
+        num_rows = 0  # total number of rows parsed
+        p = 0  # number of rows stored
+
+        for chunk_genes, C in _read_chunks(fh, n, chunk_size, dtype, path):
+            if sel_var_genes == 0:
+                # store all rows (the array only has to grow if the file
+                # was modified after its lines were counted)
+                m = len(chunk_genes)
+                if p + m > X.shape[0]:
+                    new_X = np.empty((max(2 * X.shape[0], p + m), n),
+                                     dtype=dtype)
+                    new_X[:p] = X[:p]
+                    X = new_X
+                X[p:(p + m)] = C
+                genes.extend(chunk_genes)
+                p += m
+
+            else:
+                # keep only the most variable rows (running heap)
+                # (missing values are ignored; rows without a defined
+                #  variance are ranked last, since NaN breaks the heap order)
+                with warnings.catch_warnings():
+                    warnings.simplefilter('ignore', RuntimeWarning)
+                    var = np.nanvar(C, axis=1, ddof=1)
+                var[np.isnan(var)] = -np.inf
+                for i, g in enumerate(chunk_genes):
+                    pos = num_rows + i
+                    if p < sel_var_genes:
+                        slot = p
+                        genes.append(g)
+                        row_index.append(pos)
+                        p += 1
+                        heapq.heappush(heap, (var[i], pos, slot))
+                    elif var[i] > heap[0][0]:
+                        slot = heapq.heappop(heap)[2]
+                        genes[slot] = g
+                        row_index[slot] = pos
+                        heapq.heappush(heap, (var[i], pos, slot))
+                    else:
+                        continue
+                    X[slot] = C[i]
+
+            num_rows += len(chunk_genes)
+
+    if sel_var_genes > 0:
+        # restore the original order of the genes
+        a = np.argsort(row_index, kind='mergesort')
+        genes = [genes[i] for i in a]
+        X = X[a]
+        if num_rows <= sel_var_genes:
+            logger.warning('Variance filter has no effect '
+                           '("sel_var_genes" is >= number of genes).')
+        else:
+            logger.info('Selected the %d most variable genes '
+                        '(out of %d).', p, num_rows)
+    elif p < X.shape[0]:
+        # release the unused part of the preallocated array
+        X.resize((p, n), refcheck=False)
+
+    matrix = ExpMatrix(genes=genes, samples=samples, X=X)
+    matrix.genes.name = gene_label
+
+    t = time.time() - t0
+    logger.info('Parsed %d genes x %d samples in %.2f s '
+                '(%.1f MB/s; %.0f genes/s).',
+                num_rows, n, t, file_size / (1e6 * max(t, 1e-9)),
+                num_rows / max(t, 1e-9))
+
+    return matrix
+
+
+def write_expression_npy(path, output_dir, chunk_size=5000,
+                         dtype=np.float64, encoding='UTF-8'):
+    """Convert an expression file to a memory-mappable binary format.
+
+    The expression values are written to a ``.npy`` file ("X.npy"), and the
+    gene and sample names are written to a JSON file ("index.json"). This is
+    the same format as the one used for the expression cache (see
+    `read_expression_cached`). The file is parsed in chunks of
+    ``chunk_size`` lines, and each chunk is written directly to the
+    (memory-mapped) output file, so that the expression matrix is never
+    stored in memory.
+
+    Parameters
+    ----------
+    path : str
+        The path of the expression file.
+    output_dir : str
+        The directory to write the output files to.
+    chunk_size : int, optional
+        The number of lines to parse at a time. [5000]
+    dtype : `numpy.dtype`, optional
+        The data type of the expression values. [numpy.float64]
+    encoding : str, optional
+        The file encoding. ["UTF-8"]
+
+    Returns
+    -------
+    None
+    """
+    assert isinstance(chunk_size, (int, np.integer)) and chunk_size > 0
+
+    # first pass: determine the genes
+    with io.open(path, encoding=encoding) as fh:
+        header = fh.readline().rstrip('\r\n').split('\t')
+        genes = []
+        for l in fh:
+            l = l.rstrip('\r\n')
+            if l:
+                genes.append(l.split('\t', 1)[0])
+    gene_label = header[0]
+    samples = header[1:]
+    p, n = len(genes), len(samples)
+
+    # second pass: parse the expression values
+    X = np.lib.format.open_memmap(os.path.join(output_dir, 'X.npy'),
+                                  mode='w+', dtype=dtype, shape=(p, n))
+    with io.open(path, encoding=encoding) as fh:
+        fh.readline()
+        i = 0
+        for chunk_genes, C in _read_chunks(fh, n, chunk_size, dtype, path):
+            X[i:(i + len(chunk_genes))] = C
+            i += len(chunk_genes)
+    X.flush()
+    del X
+
+    _write_json(os.path.join(output_dir, 'index.json'), {
+        'gene_label': gene_label,
+        'genes': genes,
+        'samples': samples,
+    })
+    logger.info('Converted expression file with %d genes x %d samples.',
+                p, n)
+
+
+def get_file_md5(path, block_size=2**20):
+    """Calculate the MD5 hash of a file's contents.
+
+    Parameters
+    ----------
+    path : str
+        The file path.
+    block_size : int, optional
+        The number of bytes to read at a time. [1048576]
+
+    Returns
+    -------
+    str
+        The MD5 hash (hex digest).
+    """
+    h = hashlib.md5()
+    with io.open(path, 'rb') as fh:
+        while True:
+            data = fh.read(block_size)
+            if not data:
+                break
+            h.update(data)
+    return str(h.hexdigest())
+
+
+def get_expression_cache_dir(path, sel_var_genes=0, cache_dir=None,
+                             dtype=np.float64):
+    """Determine the directory used for caching a parsed expression file.
+
+    By default, the cache is stored as a "sidecar" directory alongside the
+    expression file. Each data type is cached separately.
+
+    Parameters
+    ----------
+    path : str
+        The path of the expression file.
+    sel_var_genes : int, optional
+        The variance filter setting (see `read_expression_tsv`). [0]
+    cache_dir : str or None, optional
+        If given, store the cache in this directory instead. [None]
+    dtype : `numpy.dtype`, optional
+        The data type of the cached expression values. [numpy.float64]
+
+    Returns
+    -------
+    str
+        The path of the cache directory.
+    """
+    dtype = np.dtype(dtype)
+    tag = 'gopca_cache'
+    if sel_var_genes > 0:
+        tag += '_G%d' % sel_var_genes
+    if dtype != np.float64:
+        tag += '_%s' % dtype.name
+    return get_cache_path(path, tag, cache_dir)
+
+
+def get_cache_path(path, tag, cache_dir=None):
+    """Determine the path of a cache directory for an input file.
+
+    Parameters
+    ----------
+    path : str
+        The path of the input file.
+    tag : str
+        A suffix identifying the type of cache.
+    cache_dir : str or None, optional
+        The directory to store the cache in. If ``None``, the cache is stored
+        alongside the input file. [None]
+
+    Returns
+    -------
+    str
+        The path of the cache directory.
+    """
+    name = '.%s.%s' % (os.path.basename(path), tag)
+    if cache_dir is None:
+        cache_dir = os.path.dirname(os.path.abspath(path))
+    return os.path.join(cache_dir, name)
+
+
+def _write_json(path, data):
+    with io.open(path, 'w', encoding='UTF-8') as ofh:
+        ofh.write(str(json.dumps(data)))
+
+
+def check_cache(cache_path, path):
+    """Check if a cache directory is valid for a given input file.
+
+    The cache is considered valid if the size and modification time of the
+    input file match the values recorded when the cache was written. If
+    only the modification time differs, the MD5 hash of the file contents is
+    compared instead (and the recorded modification time is updated if the
+    hash matches).
+
+    Parameters
+    ----------
+    cache_path : str
+        The path of the cache directory.
+    path : str
+        The path of the input file.
+
+    Returns
+    -------
+    bool
+        Whether the cache is valid.
+    """
+    meta_path = os.path.join(cache_path, 'meta.json')
+    try:
+        with io.open(meta_path, encoding='UTF-8') as fh:
+            meta = json.load(fh)
+    except (IOError, OSError, ValueError):
+        return False
+
+    if meta.get('version') != _CACHE_FORMAT_VERSION:
+        return False
+
+    st = os.stat(path)
+    if meta['size'] != st.st_size:
+        return False
+    if meta['mtime'] == st.st_mtime:
+        return True
+    if meta['md5'] != get_file_md5(path):
+        return False
+
+    # file was touched, but not modified => remember new mtime
+    meta['mtime'] = st.st_mtime
+    try:
+        _write_json(meta_path, meta)
+    except (IOError, OSError):
+        pass
+    return True
+
+
+def write_cache(cache_path, path, write_func):
+    """Write a cache directory for an input file.
+
+    The cache is first written to a temporary directory, which is then
+    moved into place. Errors (of any kind) are logged, but not raised,
+    since the cache is only an optimization and the input file has already
+    been parsed.
+
+    Parameters
+    ----------
+    cache_path : str
+        The path of the cache directory.
+    path : str
+        The path of the input file.
+    write_func : callable
+        A function that is called with the path of the (temporary) cache
+        directory and writes the cached data to it.
+
+    Returns
+    -------
+    bool
+        Whether the cache was written successfully.
+    """
+    tmp_path = '%s.tmp%d' % (cache_path, os.getpid())
+    try:
+        st = os.stat(path)
+        meta = {
+            'version': _CACHE_FORMAT_VERSION,
+            'size': st.st_size,
+            'mtime': st.st_mtime,
+            'md5': get_file_md5(path),
+        }
+        if os.path.isdir(tmp_path):
+            shutil.rmtree(tmp_path)
+        os.makedirs(tmp_path)
+        write_func(tmp_path)
+        _write_json(os.path.join(tmp_path, 'meta.json'), meta)
+        if os.path.isdir(cache_path):
+            shutil.rmtree(cache_path)
+        os.rename(tmp_path, cache_path)
+    except Exception as err:
+        logger.warning('Could not write cache "%s": %s',
+                       cache_path, str(err))
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        return False
+
+    logger.info('Wrote cache "%s".', cache_path)
+    return True
+
+
+def _load_expression_cache(cache_path):
+    """Load a cached expression matrix (memory-mapped).
+
+    Returns ``None`` if the cache could not be read.
+    """
+    try:
+        X = np.load(os.path.join(cache_path, 'X.npy'), mmap_mode='c')
+        with io.open(os.path.join(cache_path, 'index.json'),
+                     encoding='UTF-8') as fh:
+            index = json.load(fh)
+    except (IOError, OSError, ValueError):
+        logger.warning('Could not read expression cache "%s".', cache_path)
+        return None
+
+    matrix = ExpMatrix(genes=index['genes'], samples=index['samples'], X=X)
+    matrix.genes.name = index['gene_label']
+    return matrix
+
+
+def read_expression_cached(path, sel_var_genes=0, cache_dir=None,
+                           dtype=np.float64, out_of_core=False, **kwargs):
+    """Read an expression matrix, using a binary cache if possible.
+
+    The first time an expression file is read, the parsed matrix is written to
+    a binary cache (see `get_expression_cache_dir`), consisting of a ``.npy``
+    file with the expression values and tables of the gene and sample names.
+    Subsequent calls memory-map the cached array instead of parsing the text
+    file again.
+
+    The cache is considered valid if the size and modification time of the
+    expression file match the values recorded when the cache was written. If
+    only the modification time differs, the MD5 hash of the file contents is
+    compared instead. Each data type is cached separately, so the cached
+    array never needs to be converted.
+
+    Parameters
+    ----------
+    path : str
+        The path of the expression file.
+    sel_var_genes : int, optional
+        See `read_expression_tsv`. [0]
+    cache_dir : str or None, optional
+        See `get_expression_cache_dir`. [None]
+    dtype : `numpy.dtype`, optional
+        See `read_expression_tsv`. [numpy.float64]
+    out_of_core : bool, optional
+        If ``True``, the cache is created directly from the expression file
+        (see `write_expression_npy`), without ever loading the entire matrix
+        into memory. The returned matrix is then always memory-mapped.
+        Ignored if ``sel_var_genes`` is non-zero. [False]
+    kwargs : dict
+        Additional keyword arguments for `read_expression_tsv`.
+
+    Returns
+    -------
+    `genometools.expression.ExpMatrix`
+        The expression matrix.
+    """
+    dtype = np.dtype(dtype)
+    cache_path = get_expression_cache_dir(path, sel_var_genes, cache_dir,
+                                          dtype)
+    out_of_core = out_of_core and sel_var_genes == 0
+
+    if check_cache(cache_path, path):
+        matrix = _load_expression_cache(cache_path)
+        if matrix is not None and matrix.X.dtype != dtype:
+            # converting a memory-mapped matrix would load it into memory,
+            # so the cache is written again instead
+            logger.warning('Expression cache "%s" has the wrong data type '
+                           '("%s").', cache_path, matrix.X.dtype.name)
+            matrix = None
+        if matrix is not None:
+            logger.info('Loaded expression matrix from cache "%s".',
+                        cache_path)
+            return matrix
+
+    if out_of_core and write_cache(
+            cache_path, path, lambda tmp_path: write_expression_npy(
+                path, tmp_path, dtype=dtype, **kwargs)):
+        matrix = _load_expression_cache(cache_path)
+        if matrix is not None:
+            return matrix
+
+    matrix = read_expression_tsv(path, sel_var_genes=sel_var_genes,
+                                 dtype=dtype, **kwargs)
+
+    def write_func(tmp_path):
+        np.save(os.path.join(tmp_path, 'X.npy'),
+                np.ascontiguousarray(matrix.X))
+        _write_json(os.path.join(tmp_path, 'index.json'), {
+            'gene_label': matrix.genes.name,
+            'genes': matrix.genes.tolist(),
+            'samples': matrix.samples.tolist(),
+        })
+
+    write_cache(cache_path, path, write_func)
+
+    return matrix
@@ -0,0 +1,255 @@
+# Copyright (c) 2016 Florian Wagner
+#
+# This file is part of GO-PCA.
+#
+# GO-PCA is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, Version 3,
+# as published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Functions for reading gene sets and ontologies using a compiled cache.
+
+The gene set and ontology files used by GO-PCA rarely change, but parsing
+them (and, in the case of the Gene Ontology, determining all ancestors and
+descendants of each term) takes a significant amount of time. The functions
+in this module store the parsed data in a compact binary format (a
+``numpy`` ``.npz`` file with interned gene/term identifiers and CSR-encoded
+memberships and relations), which can be loaded much more quickly.
+"""
+
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+from builtins import *
+
+import os
+import logging
+
+import numpy as np
+
+from genometools.basic import GeneSet, GeneSetCollection
+from genometools.ontology import GOTerm, GeneOntology
+
+from .expression_io import get_cache_path, check_cache, write_cache
+
+logger = logging.getLogger(__name__)
+
+
+def _to_csr(rows):
+    """Encode a list of integer lists as CSR arrays (indptr, indices)."""
+    indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum([len(r) for r in rows])
+    indices = np.empty(indptr[-1], dtype=np.int32)
+    for i, r in enumerate(rows):
+        indices[indptr[i]:indptr[i+1]] = r
+    return indptr, indices
+
+
+def _from_csr(indptr, indices, labels):
+    """Decode CSR arrays into a list of label lists."""
+    indices = indices.tolist()
+    indptr = indptr.tolist()
+    return [[labels[j] for j in indices[indptr[i]:indptr[i+1]]]
+            for i in range(len(indptr) - 1)]
+
+
+def _str_array(l):
+    return np.array(l, dtype=np.unicode_)
+
+
+def _save_gene_sets(gene_sets, path):
+    genes = []
+    gene_index = {}
+    members = []
+    for gs in gene_sets:
+        idx = []
+        for g in sorted(gs.genes):
+            try:
+                idx.append(gene_index[g])
+            except KeyError:
+                gene_index[g] = len(genes)
+                idx.append(len(genes))
+                genes.append(g)
+        members.append(idx)
+    indptr, indices = _to_csr(members)
+
+    # `None` is stored as an empty string (like in the TSV format)
+    np.savez(
+        path,
+        genes=_str_array(genes),
+        indptr=indptr,
+        indices=indices,
+        ids=_str_array([gs.id for gs in gene_sets]),
+        names=_str_array([gs.name for gs in gene_sets]),
+        sources=_str_array([gs.source or '' for gs in gene_sets]),
+        collections=_str_array([gs.collection or '' for gs in gene_sets]),
+        descriptions=_str_array([gs.description or '' for gs in gene_sets]),
+    )
+
+
+def _load_gene_sets(path):
+    with np.load(path) as data:
+        genes = data['genes'].tolist()
+        members = _from_csr(data['indptr'], data['indices'], genes)
+        gene_sets = [
+            GeneSet(id_, name, gs_genes, src or None, coll or None,
+                    desc or None)
+            for id_, name, gs_genes, src, coll, desc in zip(
+                data['ids'].tolist(), data['names'].tolist(), members,
+                data['sources'].tolist(), data['collections'].tolist(),
+                data['descriptions'].tolist())
+        ]
+    return GeneSetCollection(gene_sets)
+
+
+def read_gene_sets_cached(path, cache_dir=None, encoding='UTF-8'):
+    """Read a gene set file, using a compiled cache if possible.
+
+    Parameters
+    ----------
+    path : str
+        The path of the gene set file (see
+        `genometools.basic.GeneSetCollection.read_tsv`).
+    cache_dir : str or None, optional
+        The directory to store the cache in. If ``None``, the cache is
+        stored alongside the gene set file. [None]
+    encoding : str, optional
+        The file encoding. ["UTF-8"]
+
+    Returns
+    -------
+    `genometools.basic.GeneSetCollection`
+        The gene sets.
+    """
+    cache_path = get_cache_path(path, 'gopca_gene_sets', cache_dir)
+    data_path = os.path.join(cache_path, 'gene_sets.npz')
+
+    if check_cache(cache_path, path):
+        try:
+            gene_sets = _load_gene_sets(data_path)
+        except (IOError, OSError, KeyError, ValueError):
+            logger.warning('Could not read gene set cache "%s".', cache_path)
+        else:
+            logger.info('Loaded %d gene sets from cache "%s".',
+                        len(gene_sets), cache_path)
+            return gene_sets
+
+    gene_sets = GeneSetCollection.read_tsv(path, encoding=encoding)
+    write_cache(cache_path, path,
+                lambda d: _save_gene_sets(gene_sets,
+                                          os.path.join(d, 'gene_sets.npz')))
+    return gene_sets
+
+
+def _save_ontology(ontology, path):
+    terms = sorted(ontology, key=lambda t: t.id)
+    term_ids = [t.id for t in terms]
+    term_index = dict([id_, i] for i, id_ in enumerate(term_ids))
+
+    def get_csr(attr):
+        return _to_csr([sorted(term_index[id_] for id_ in getattr(t, attr))
+                        for t in terms])
+
+    arrays = dict(
+        ids=_str_array(term_ids),
+        names=_str_array([t.name for t in terms]),
+        domains=_str_array([t.domain or '' for t in terms]),
+        definitions=_str_array([t.definition or '' for t in terms]),
+    )
+    for attr in ['is_a', 'part_of', 'ancestors', 'descendants']:
+        arrays[attr + '_indptr'], arrays[attr + '_indices'] = get_csr(attr)
+    for attr in ['syn2id', 'alt_id', 'name2id']:
+        d = getattr(ontology, attr)
+        keys = sorted(d.keys())
+        arrays[attr + '_keys'] = _str_array(keys)
+        arrays[attr + '_values'] = _str_array([d[k] for k in keys])
+
+    np.savez(path, **arrays)
+
+
+def _load_ontology(path):
+    with np.load(path) as data:
+        term_ids = data['ids'].tolist()
+        relations = {}
+        for attr in ['is_a', 'part_of', 'ancestors', 'descendants']:
+            relations[attr] = _from_csr(data[attr + '_indptr'],
+                                        data[attr + '_indices'], term_ids)
+        dicts = {}
+        for attr in ['syn2id', 'alt_id', 'name2id']:
+            dicts[attr] = dict(zip(data[attr + '_keys'].tolist(),
+                                   data[attr + '_values'].tolist()))
+
+        terms = []
+        for i, (id_, name, domain, definition) in enumerate(zip(
+                term_ids, data['names'].tolist(), data['domains'].tolist(),
+                data['definitions'].tolist())):
+            term = GOTerm(id_, name, domain or None, definition or None,
+                          relations['is_a'][i], relations['part_of'][i])
+            term.ancestors = set(relations['ancestors'][i])
+            term.descendants = set(relations['descendants'][i])
+            terms.append(term)
+
+    ontology = GeneOntology(terms, **dicts)
+
+    # store children and parts (same as `GeneOntology.read_obo`)
+    for term in ontology:
+        for parent in term.is_a:
+            ontology[parent].children.add(term.id)
+        for whole in term.part_of:
+            ontology[whole].parts.add(term.id)
+
+    # the ancestors and descendants were already restored
+    ontology._flattened = True
+    return ontology
+
+
+def read_ontology_cached(path, part_of_cc_only=False, cache_dir=None):
+    """Read a Gene Ontology OBO file, using a compiled cache if possible.
+
+    The cache includes the flattened ancestors and descendants of each GO
+    term, so that these do not have to be determined again.
+
+    Parameters
+    ----------
+    path : str
+        The path of the OBO file.
+    part_of_cc_only : bool, optional
+        See `genometools.ontology.GeneOntology.read_obo`. [False]
+    cache_dir : str or None, optional
+        The directory to store the cache in. If ``None``, the cache is
+        stored alongside the OBO file. [None]
+
+    Returns
+    -------
+    `genometools.ontology.GeneOntology`
+        The gene ontology.
+    """
+    assert isinstance(part_of_cc_only, bool)
+
+    tag = 'gopca_ontology'
+    if part_of_cc_only:
+        tag += '_cc'
+    cache_path = get_cache_path(path, tag, cache_dir)
+    data_path = os.path.join(cache_path, 'ontology.npz')
+
+    if check_cache(cache_path, path):
+        try:
+            ontology = _load_ontology(data_path)
+        except (IOError, OSError, KeyError, ValueError):
+            logger.warning('Could not read ontology cache "%s".', cache_path)
+        else:
+            logger.info('Loaded %d GO terms from cache "%s".',
+                        len(ontology), cache_path)
+            return ontology
+
+    ontology = GeneOntology.read_obo(path, part_of_cc_only=part_of_cc_only)
+    write_cache(cache_path, path,
+                lambda d: _save_ontology(ontology,
+                                         os.path.join(d, 'ontology.npz')))
+    return ontology
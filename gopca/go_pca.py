@@ -31,15 +31,12 @@ import time
 import hashlib
 import copy
 import datetime
-from collections import Iterable
-from pkg_resources import parse_version
+from collections import Iterable, OrderedDict
 
 import numpy as np
-import sklearn
-from sklearn.decomposition import PCA
 from scipy.stats import pearsonr
 
-from genometools.basic import GeneSetCollection
+from genometools.basic import GeneSet, GeneSetCollection
 from genometools.expression import ExpProfile, ExpMatrix, ExpGene, ExpGenome
 from genometools import enrichment
 from genometools.enrichment import RankBasedGSEResult, \
@@ -50,9 +47,40 @@ import gopca
 from . import GOPCAParams, GOPCAConfig, \
               GOPCASignature, GOPCASignatureMatrix, GOPCARun
 from . import util
+from .expression_io import read_expression_tsv, read_expression_cached
+from .instrumentation import GOPCAProfile
+from .checkpoint import GOPCACheckpoint
+from .result_cache import GOPCAResultCache
+from .pca import create_pca, use_gram_pca, get_permuted_gram_matrix, \
+                 update_pca
 
 logger = logging.getLogger(__name__)
 
+# maximum absolute difference between float32 and float64 PC loadings
+# observed on the benchmark datasets (see `GOPCA.dtype`)
+FLOAT32_LOADING_TOL = 1e-4
+
+# methods for determining the number of PCs to test (see `GOPCA`)
+PC_NULL_METHODS = ('permutation', 'analytic')
+
+# mean and standard deviation of the Tracy-Widom distribution (beta = 1)
+TW1_MEAN = -1.2065
+TW1_STD = 1.2680
+
+# events that hooks can be registered for (see `GOPCA.add_hook`)
+HOOK_EVENTS = (
+    'run_start', 'run_end',
+    'pc_estimation_start', 'pc_estimation_end',
+    'pca_start', 'pca_end',
+    'config_start', 'config_end',
+    'pc_enrichment_start', 'pc_enrichment_end',
+    'local_filter_start', 'local_filter_end',
+    'signature_start', 'signature_built', 'signature_shared',
+    'global_filter_start', 'global_filter_end',
+    'signature_matrix_start', 'signature_matrix_end',
+    'progress',
+)
+
 
 class GOPCA(object):
     """Class for performing GO-PCA.
@@ -80,8 +108,16 @@ class GOPCA(object):
         See :attr:`pc_zscore_thresh` attribute. [2.0]
     pc_max_components : int, optional
         See :attr:`pc_max_components` attribute. [0]
+    pc_null_method : str, optional
+        See :attr:`pc_null_method` attribute. ["permutation"]
     verbose : bool, optional
         See :attr:`verbose` attribute. [False]
+    gse_cache : dict, optional
+        See :attr:`gse_cache` attribute. [None]
+    dtype : `numpy.dtype`, optional
+        See :attr:`dtype` attribute. [numpy.float64]
+    chunk_size : int, optional
+        See :attr:`chunk_size` attribute. [0]
 
     Attributes
     ----------
@@ -115,8 +151,45 @@ class GOPCA(object):
         when the algorithm for automatically determining the number of PCs
         to test is used. For testing a fixed number of PCs, set the
         :attr:`num_components` attribute to a non-zero value.
+    pc_null_method : str
+        The method used to determine the null distribution of the fraction
+        of variance explained by the first PC, when the number of PCs is
+        determined automatically. "permutation" performs PCA on
+        :attr:`pc_num_permutations` permuted versions of the data.
+        "analytic" uses results from random matrix theory instead (see
+        `get_pc_explained_variance_threshold_analytic`), and compares them
+        to the spectrum of the standardized expression matrix. This
+        requires no permutations, but assumes approximately normally
+        distributed expression values.
     verbose : bool
         If set to ``True``, generate more verbose output.
+    gse_cache : dict or None
+        If not ``None``, this dictionary is used to store (and retrieve)
+        the `genometools.enrichment.GeneSetEnrichmentAnalysis` objects
+        created for each combination of genes and gene sets. Sharing the
+        same dictionary between `GOPCA` instances avoids creating these
+        objects again for datasets with the same genes.
+    dtype : `numpy.dtype`
+        The floating point type used for the expression matrix, the PCA and
+        the signature expression values (`numpy.float64` or
+        `numpy.float32`). The expression matrix is converted if necessary
+        (to avoid the copy, read it with the same ``dtype``, see
+        `read_expression`). Using `numpy.float32` halves the memory required
+        and speeds up the PCA. All p-values, E-scores and correlations are
+        still calculated in double (or extended) precision. On our benchmark
+        datasets, float32 loadings differed from float64 loadings by less
+        than `FLOAT32_LOADING_TOL` (up to the sign of each PC), and the same
+        signatures were generated.
+    chunk_size : int
+        If non-zero, GO-PCA runs in "out-of-core" mode: All operations that
+        involve the entire expression matrix (hashing, PCA, and the
+        permutations for determining the number of PCs) process
+        ``chunk_size`` genes at a time, using `pca.GramPCA`. Combined with a
+        memory-mapped expression matrix (see ``out_of_core`` in
+        `read_expression`), this allows GO-PCA to analyze matrices that are
+        larger than the available memory, since only the PC loadings and
+        the expression values of the genes used to generate signatures
+        are ever loaded.
     """
     def __init__(self, matrix, configs, **kwargs):
 
@@ -128,14 +201,32 @@ class GOPCA(object):
         pc_num_permutations = kwargs.pop('pc_num_permutations', 15)
         pc_zscore_thresh = kwargs.pop('pc_zscore_thresh', 2.0)
         pc_max_components = kwargs.pop('pc_max_components', 0)  # 0=no maximum
+        pc_null_method = kwargs.pop('pc_null_method', 'permutation')
         verbose = kwargs.pop('verbose', False)
+        gse_cache = kwargs.pop('gse_cache', None)
+        dtype = np.dtype(kwargs.pop('dtype', np.float64))
+        chunk_size = kwargs.pop('chunk_size', 0)  # 0 = in-memory
 
         assert isinstance(num_components, (int, np.integer))
         assert isinstance(pc_seed, (int, np.integer))
         assert isinstance(pc_num_permutations, (int, np.integer))
         assert isinstance(pc_zscore_thresh, (float, np.float))
         assert isinstance(pc_max_components, (int, np.integer))
+        assert pc_null_method in PC_NULL_METHODS
         assert isinstance(verbose, bool)
+        if gse_cache is not None:
+            assert isinstance(gse_cache, dict)
+        assert dtype in [np.float32, np.float64]
+        assert isinstance(chunk_size, (int, np.integer)) and chunk_size >= 0
+
+        if matrix.X.dtype != dtype:
+            if isinstance(matrix.X, np.memmap):
+                logger.warning('Converting the memory-mapped expression '
+                               'matrix to "%s" loads it into memory (read it '
+                               'with the same data type instead).',
+                               dtype.name)
+            matrix = ExpMatrix(genes=matrix.genes, samples=matrix.samples,
+                               X=matrix.X.astype(dtype))
 
         self.matrix = matrix
         self.configs = list(configs)
@@ -145,8 +236,15 @@ class GOPCA(object):
         self.pc_num_permutations = int(pc_num_permutations)
         self.pc_zscore_thresh = float(pc_zscore_thresh)
         self.pc_max_components = int(pc_max_components)
+        self.pc_null_method = str(pc_null_method)
 
         self.verbose = verbose
+        self.gse_cache = gse_cache
+        self.dtype = dtype
+        self.chunk_size = int(chunk_size)
+
+        # registered hooks (event => list of callbacks)
+        self._hooks = {}
 
         # make sure configs have the right type
         for conf in self.configs:
@@ -168,6 +266,45 @@ class GOPCA(object):
         configs = [GOPCAConfig(params, gene_sets, gene_ontology)]
         return cls(matrix, configs, **kwargs)
 
+    @staticmethod
+    def read_expression(path, use_cache=True, cache_dir=None,
+                        out_of_core=False, **kwargs):
+        """Read an expression matrix for use with GO-PCA.
+
+        Parameters
+        ----------
+        path : str
+            The path of the tab-delimited expression file.
+        use_cache : bool, optional
+            Whether to use a binary cache to avoid parsing the file again in
+            subsequent calls (see `expression_io.read_expression_cached`).
+            [True]
+        cache_dir : str or None, optional
+            The directory to store the cache in. If ``None``, the cache is
+            stored alongside the expression file. [None]
+        out_of_core : bool, optional
+            Whether to return a memory-mapped matrix, without ever loading
+            the entire matrix into memory (requires ``use_cache``; see
+            `expression_io.read_expression_cached` and :attr:`chunk_size`).
+            [False]
+        kwargs : dict
+            Additional keyword arguments for
+            `expression_io.read_expression_tsv`.
+
+        Returns
+        -------
+        `genometools.expression.ExpMatrix`
+            The expression matrix.
+        """
+        if out_of_core and not use_cache:
+            raise ValueError('Out-of-core mode requires the input cache.')
+
+        if use_cache:
+            return read_expression_cached(path, cache_dir=cache_dir,
+                                          out_of_core=out_of_core, **kwargs)
+        else:
+            return read_expression_tsv(path, **kwargs)
+
     def __repr__(self):
         return '<%s instance (hash="%s")>' % \
                (self.__class__.__name__, self.hash)
@@ -214,30 +351,30 @@ class GOPCA(object):
                 logger.info(sig_label)
 
     @staticmethod
-    def get_pc_explained_variance_threshold(X, z, t, seed):
+    def get_pc_explained_variance_threshold(X, z, t, seed, chunk_size=0):
         # TODO: Write docstring.
 
-        # RandomizedPCA does not work in Scikit-learn 0.14.1,
-        # but it works in Scikit-learn 0.16.1
-        if parse_version(sklearn.__version__) >= parse_version('0.16.1'):
-            from sklearn.decomposition import RandomizedPCA as PCA
-        else:
-            from sklearn.decomposition import PCA
-
         # initialize random number generator
         np.random.seed(seed)
 
         # do permutations
         p, n = X.shape
         d_max_null = np.empty(t, dtype=np.float64)
-        X_perm = np.empty((p, n), dtype=np.float64)
-        M_null = PCA(n_components=1)
-        for j in range(t):
-            for i in range(p):
-                X_perm[i, :] = X[i, np.random.permutation(n)]
+        if chunk_size or use_gram_pca(p, n):
+            # only the (n x n) Gram matrix of each permuted matrix is needed
+            for j in range(t):
+                G = get_permuted_gram_matrix(X, chunk_size=chunk_size or None)
+                lambdas = np.linalg.eigvalsh(G)
+                d_max_null[j] = lambdas[-1] / np.sum(lambdas)
+        else:
+            X_perm = np.empty((p, n), dtype=X.dtype)
+            M_null = create_pca(1, p, n, randomized=True)
+            for j in range(t):
+                for i in range(p):
+                    X_perm[i, :] = X[i, np.random.permutation(n)]
 
-            M_null.fit(X_perm.T)
-            d_max_null[j] = M_null.explained_variance_ratio_[0]
+                M_null.fit(X_perm.T)
+                d_max_null[j] = M_null.explained_variance_ratio_[0]
 
         # calculate z-score threshold
         mean_null = np.mean(d_max_null)
@@ -246,28 +383,92 @@ class GOPCA(object):
 
         return thresh
 
+    @staticmethod
+    def get_pc_explained_variance_threshold_analytic(p, n, z):
+        """Calculate the explained variance threshold using random matrices.
+
+        For a standardized (genes x samples) matrix of independent, normally
+        distributed values, the largest eigenvalue of its (centered) Gram
+        matrix approximately follows a Tracy-Widom distribution (Johnstone,
+        2001), centered on the upper edge of the Marchenko-Pastur
+        distribution. Dividing by the total variance gives the mean and
+        standard deviation of the fraction of variance explained by the
+        first PC under the null hypothesis.
+
+        Parameters
+        ----------
+        p : int
+            The number of genes.
+        n : int
+            The number of samples.
+        z : float
+            The z-score threshold.
+
+        Returns
+        -------
+        float
+            The explained variance threshold.
+        """
+        assert p >= 2 and n >= 3
+
+        # centering removes one degree of freedom
+        m = n - 1
+        a = np.sqrt(m - 1) + np.sqrt(p)
+        mu = a ** 2
+        sigma = a * np.power(1 / np.sqrt(m - 1) + 1 / np.sqrt(p), 1 / 3)
+
+        # the total variance of the standardized matrix is p * m
+        total = float(p * m)
+        mean_null = (mu + TW1_MEAN * sigma) / total
+        std_null = (TW1_STD * sigma) / total
+        thresh = mean_null + z * std_null
+
+        return thresh
+
     def estimate_num_components(self):
-        """Estimate the number of non-trivial PCs using a permutation test.
+        """Estimate the number of non-trivial PCs.
+
+        The fraction of variance explained by each PC is compared to a
+        null distribution for the first PC, which is obtained using the
+        method specified by :attr:`pc_null_method`.
 
+        Returns
+        -------
+        int
+            The estimated number of non-trivial PCs.
         """
-        # TODO: finish docstring
-        logger.info('Estimating the number of principal components '
-                    '(seed = %d)...', self.pc_seed)
-        logger.debug('(permutations = %d, z-score threshold = %.1f)...',
-                     self.pc_num_permutations, self.pc_zscore_thresh)
+        analytic = (self.pc_null_method == 'analytic')
+        if analytic:
+            logger.info('Estimating the number of principal components '
+                        '(analytic null distribution)...')
+            logger.debug('(z-score threshold = %.1f)...',
+                         self.pc_zscore_thresh)
+        else:
+            logger.info('Estimating the number of principal components '
+                        '(seed = %d)...', self.pc_seed)
+            logger.debug('(permutations = %d, z-score threshold = %.1f)...',
+                         self.pc_num_permutations, self.pc_zscore_thresh)
 
         # perform PCA
+        # (for the analytic null, genes are standardized, and genes with
+        #  constant expression are excluded)
         p, n = self.matrix.shape
         d_max = min(p, n-1)
-        M_pca = PCA(n_components=d_max)
-        M_pca.fit(self.matrix.X.T)
+        M_pca = create_pca(d_max, p, n, chunk_size=(self.chunk_size or None),
+                           standardize=analytic)
+        M_pca.fit(self.X.T)
 
         d = M_pca.explained_variance_ratio_
         logger.debug('Largest explained variance: %.2f', d[0])
 
-        thresh = self.get_pc_explained_variance_threshold(
-            self.X, self.pc_zscore_thresh, self.pc_num_permutations,
-            self.pc_seed)
+        if analytic:
+            p_used = int(np.sum(M_pca.scale_ > 0))
+            thresh = self.get_pc_explained_variance_threshold_analytic(
+                p_used, n, self.pc_zscore_thresh)
+        else:
+            thresh = self.get_pc_explained_variance_threshold(
+                self.X, self.pc_zscore_thresh, self.pc_num_permutations,
+                self.pc_seed, chunk_size=self.chunk_size)
         logger.debug('Explained variance threshold: %.2f', thresh)
         d_est = np.sum(d >= thresh)
 
@@ -277,8 +478,12 @@ class GOPCA(object):
 
     @staticmethod
     def _local_filter(params, gse_analysis, enriched, ranked_genes,
-                      verbose=False):
+                      verbose=False, gene_set_groups=None):
         """Apply GO-PCA's "local" filter.
+
+        If ``gene_set_groups`` is given, ``gse_analysis`` tests restricted
+        gene sets (see `_restrict_gene_sets`), and each gene set is tested
+        again using the representative of its group.
         
         Returns the enriched gene sets that passed the filter.
         """
@@ -296,6 +501,12 @@ class GOPCA(object):
         if len(enriched) <= 1:
             return enriched
 
+        representatives = {}
+        if gene_set_groups is not None:
+            for rep_id, members in gene_set_groups.items():
+                for gs in members:
+                    representatives[gs.id] = rep_id
+
         # sort enriched gene sets by E-score (in descending order)
         q = len(enriched)
         a = sorted(range(q), key=lambda i: -enriched[i].escore)
@@ -327,12 +538,14 @@ class GOPCA(object):
 
 
         # initialize matrix for XL-mHG test
+        # (always in extended precision, independent of `GOPCA.dtype`)
         K_max = max([enr.K for enr in todo])
         p = len(ranked_genes)
         table = np.empty((K_max+1, p+1), dtype=np.longdouble)
         while todo:
             most_enriched = todo[0]
             gs_id = most_enriched.gene_set.id
+            gs_id = representatives.get(gs_id, gs_id)
 
             # test if GO term is still enriched after removing all previously
             # used genes
@@ -420,9 +633,179 @@ class GOPCA(object):
 
         return GOPCASignature(pc, gse_result, seed, sig_matrix)
 
+    def _get_gse_analysis(self, genome, gene_sets):
+        """Create a `GeneSetEnrichmentAnalysis` object (or get it from cache).
+        """
+        key = None
+        if self.gse_cache is not None:
+            key = (genome.hash, gene_sets.hash)
+            try:
+                return self.gse_cache[key]
+            except KeyError:
+                pass
+
+        enr_logger = logging.getLogger(enrichment.__name__)
+        enr_logger.setLevel(logging.ERROR)
+        gse_analysis = GeneSetEnrichmentAnalysis(genome, gene_sets)
+        enr_logger.setLevel(logging.NOTSET)
+
+        if key is not None:
+            self.gse_cache[key] = gse_analysis
+        return gse_analysis
+
+    @staticmethod
+    def _restrict_gene_sets(params, gene_sets, genes):
+        """Restrict gene sets to the genes in the expression matrix.
+
+        Gene sets with fewer than ``mHG_X_min`` genes in the matrix are never
+        tested by the XL-mHG test (see
+        `genometools.enrichment.GeneSetEnrichmentAnalysis`), and are
+        therefore dropped. The same applies to gene sets with more than
+        ``gene_set_max_size`` genes in the matrix (if this parameter is not
+        zero). The remaining gene sets are grouped by the genes they contain
+        in the matrix, and each group is represented by its first gene set.
+
+        Returns
+        -------
+        `genometools.basic.GeneSetCollection`
+            The restricted representative gene sets, which are the gene sets
+            tested for each ranking.
+        `collections.OrderedDict` (str => list of `GeneSet`)
+            For each representative (by ID), the original gene sets in its
+            group (starting with the representative itself).
+        """
+        genes = set(genes)
+        min_size = max(params.mHG_X_min, 1)
+        max_size = params.gene_set_max_size
+
+        restricted = []
+        groups = OrderedDict()
+        representatives = {}
+        num_dropped = 0
+        for gs in gene_sets:
+            gs_genes = frozenset(gs.genes & genes)
+            K = len(gs_genes)
+            if K < min_size or (max_size > 0 and K > max_size):
+                num_dropped += 1
+                continue
+            try:
+                rep_id = representatives[gs_genes]
+            except KeyError:
+                representatives[gs_genes] = gs.id
+                restricted.append(GeneSet(
+                    gs.id, gs.name, gs_genes, source=gs.source,
+                    collection=gs.collection, description=gs.description))
+                groups[gs.id] = [gs]
+            else:
+                groups[rep_id].append(gs)
+
+        logger.info('Testing %d / %d gene sets (dropped %d gene sets '
+                    'because of their size in the expression matrix; '
+                    'merged %d gene sets with identical genes).',
+                    len(restricted), len(gene_sets), num_dropped,
+                    len(gene_sets) - num_dropped - len(restricted))
+        return GeneSetCollection(restricted), groups
+
+    def _get_enrichment_setup(self, genome, config, genes, profile=None):
+        """Prepare the enrichment analysis for a configuration.
+
+        If ``profile`` (a `GOPCAProfile`) is given, the number of gene sets,
+        the number of gene sets dropped because of their size, the number of
+        groups of gene sets with identical genes, and the number of gene sets
+        merged into these groups are recorded in it.
+
+        Returns
+        -------
+        `genometools.enrichment.GeneSetEnrichmentAnalysis`
+            The enrichment analysis (for the restricted gene sets).
+        `collections.OrderedDict` (str => list of `GeneSet`)
+            The groups of original gene sets (see `_restrict_gene_sets`).
+        """
+        gene_sets, groups = self._restrict_gene_sets(
+            config.params, config.gene_sets, genes)
+        gse_analysis = self._get_gse_analysis(genome, gene_sets)
+
+        if profile is not None:
+            self._count_gene_set_groups(profile, config.gene_sets, groups)
+        return gse_analysis, groups
+
+    @staticmethod
+    def _count_gene_set_groups(profile, gene_sets, groups):
+        """Record the number of gene sets and groups in a profile.
+
+        See `_get_enrichment_setup`.
+        """
+        num_members = sum(len(members) for members in groups.values())
+        profile.count('gene_sets', len(gene_sets))
+        profile.count('gene_sets_dropped_size', len(gene_sets) - num_members)
+        profile.count('gene_set_groups', len(groups))
+        profile.count('gene_sets_merged', num_members - len(groups))
+
+    @staticmethod
+    def _get_original_results(enriched, gene_set_groups):
+        """Report enrichment results for the original gene sets.
+
+        Each result for a restricted gene set is replaced with one result for
+        each original gene set in its group (see `_restrict_gene_sets`),
+        since these gene sets contain the same genes in the ranking.
+        """
+        results = []
+        for enr in enriched:
+            for gs in gene_set_groups[enr.gene_set.id]:
+                member_enr = copy.copy(enr)
+                member_enr.gene_set = gs
+                results.append(member_enr)
+        return results
+
+    @staticmethod
+    def _get_ranked_genes(matrix, W, pc):
+        """Rank genes by their loadings for a specific principal component.
+
+        The absolute value  of ``pc`` determines the principal component (PC).
+        Whether the ranking is in ascending or descending order is determined
+        by the sign of ``pc``: If it has a  positive sign, then the ranking
+        will be in descending order (most positive loading values first). If
+        it has a negative sign, then the ranking will be in ascending order
+        (most negative loading values first).
+        """
+        pc_index = abs(pc)-1
+        a = np.argsort(W[:, pc_index])
+        if pc > 0:
+            # for positive pc values, use descending order
+            a = a[::-1]
+        ranked_genes = [matrix.index[i] for i in a]
+        return ranked_genes
+
+    @staticmethod
+    def _get_enriched_gene_sets(params, gse_analysis, ranked_genes):
+        """Test a ranked list of genes for gene set enrichment.
+
+        Returns all gene sets that pass the p-value threshold (the E-score
+        is calculated, but not used for filtering).
+        """
+        # suppress logging messages from genometools.enrichment module
+        enr_logger = logging.getLogger(enrichment.__name__)
+        enr_logger.setLevel(logging.ERROR)
+
+        logger.debug('config: %f %d %d',
+                     params.mHG_X_frac, params.mHG_X_min, params.mHG_L)
+        enriched = gse_analysis.get_rank_based_enrichment(
+            ranked_genes, params.pval_thresh,
+            params.mHG_X_frac, params.mHG_X_min, params.mHG_L,
+            adjust_pval_thresh=False,
+            escore_pval_thresh=params.escore_pval_thresh)
+
+        # stop suppressing logging messages from genometools.enrichment module
+        enr_logger.setLevel(logging.NOTSET)
+
+        return enriched
+
     @staticmethod
     def _generate_pc_signatures(matrix, params, gse_analysis, W, pc,
-                                standardize=False, verbose=False):
+                                standardize=False, verbose=False,
+                                enriched=None, signature_cache=None,
+                                gene_set_groups=None, profile=None,
+                                emit=None):
         """Generate signatures for a specific principal component and ordering.
 
         The absolute value  of ``pc`` determines the principal component (PC).
@@ -432,6 +815,19 @@ class GOPCA(object):
         descending order (most positive loading values first). If it has a
         negative sign, then the ranking will be in ascending order (most
         negative loading values first).
+
+        If ``enriched`` is given, it is used as the list of gene sets passing
+        the p-value threshold, instead of testing for enrichment. If
+        ``signature_cache`` (a dictionary) is given, it is used to avoid
+        generating the same signature more than once. Signatures are cached
+        by PC and gene set ID, so a cache must only be shared between calls
+        that use the same enrichment results. If ``gene_set_groups``
+        is given, ``gse_analysis`` tests restricted gene sets, and the
+        results are reported for the original gene sets (see
+        `_restrict_gene_sets`). If ``profile`` (a
+        `GOPCAProfile`) is given, timings and counters are recorded in it.
+        If ``emit`` is given, it is called for hook events (see
+        `GOPCA.add_hook`).
         """
         assert isinstance(matrix, ExpMatrix)
         assert isinstance(params, GOPCAParams)
@@ -440,41 +836,41 @@ class GOPCA(object):
         assert isinstance(pc, int) and pc != 0
         assert isinstance(standardize, bool)
         assert isinstance(verbose, bool)
+        if enriched is not None:
+            assert isinstance(enriched, Iterable)
+        if signature_cache is not None:
+            assert isinstance(signature_cache, dict)
+        if profile is not None:
+            assert isinstance(profile, GOPCAProfile)
+        else:
+            profile = GOPCAProfile()
 
         msg = logger.debug
         if verbose:
             msg = logger.info
 
         # rank genes by their PC loadings
-        pc_index = abs(pc)-1
-        a = np.argsort(W[:, pc_index])
-        if pc > 0:
-            # for positive pc values, use descending order
-            a = a[::-1]
-        ranked_genes = [matrix.index[i] for i in a]
+        ranked_genes = GOPCA._get_ranked_genes(matrix, W, pc)
 
         # - find enriched gene sets using the XL-mHG test
         # - get_enriched_gene_sets() also calculates the enrichment score,
         #   but does not use it for filtering
-
-        # suppress logging messages from genometools.enrichment module
-        enr_logger = logging.getLogger(enrichment.__name__)
-        enr_logger.setLevel(logging.ERROR)
-
-        logger.debug('config: %f %d %d',
-                     params.mHG_X_frac, params.mHG_X_min, params.mHG_L)
-        enriched = gse_analysis.get_rank_based_enrichment(
-            ranked_genes, params.pval_thresh,
-            params.mHG_X_frac, params.mHG_X_min, params.mHG_L,
-            adjust_pval_thresh=False,
-            escore_pval_thresh=params.escore_pval_thresh)
+        if enriched is None:
+            if emit is not None:
+                emit('pc_enrichment_start', pc=pc)
+            with profile.phase('enrichment'):
+                enriched = GOPCA._get_enriched_gene_sets(
+                    params, gse_analysis, ranked_genes)
+                if gene_set_groups is not None:
+                    enriched = GOPCA._get_original_results(
+                        enriched, gene_set_groups)
+            if emit is not None:
+                emit('pc_enrichment_end', pc=pc, enriched=enriched)
+        profile.count('enriched', len(enriched))
         if not enriched:
             # no gene sets were found to be enriched
             return []
 
-        # stop suppressing logging messages from genometools.enrichment module
-        enr_logger.setLevel(logging.NOTSET)
-
         # filter enriched GO terms by strength of enrichment
         # (if threshold is provided)
         if params.escore_thresh is not None:
@@ -482,25 +878,57 @@ class GOPCA(object):
             enriched = [enr for enr in enriched
                         if enr.escore >= params.escore_thresh]
             q = len(enriched)
+            profile.count('dropped_escore', q_before - q)
             msg('Kept %d / %d enriched gene sets with E-score >= %.1f',
                 q, q_before, params.escore_thresh)
 
         # apply local filter (if enabled)
         if not params.no_local_filter:
             q_before = len(enriched)
-            enriched = GOPCA._local_filter(params, gse_analysis,
-                                           enriched, ranked_genes)
+            if emit is not None:
+                emit('local_filter_start', pc=pc, enriched=enriched)
+            with profile.phase('local_filter'):
+                enriched = GOPCA._local_filter(
+                    params, gse_analysis, enriched, ranked_genes,
+                    gene_set_groups=gene_set_groups)
+            if emit is not None:
+                emit('local_filter_end', pc=pc, enriched=enriched)
             q = len(enriched)
+            profile.count('dropped_local_filter', q_before - q)
             msg('Local filter: Kept %d / %d enriched gene sets.', q, q_before)
 
         # generate signatures
+        # (gene sets from the same group have the same genes above the
+        #  XL-mHG cutoff, so their signatures only need to be generated once)
         signatures = []
+        generated = {}
         q = len(enriched)
         for j, enr in enumerate(enriched):
-            signatures.append(
-                GOPCA._generate_signature(
-                    matrix, params, pc, enr,
-                    standardize=standardize, verbose=verbose))
+            key = (pc, enr.gene_set.id, params.sig_corr_thresh,
+                   params.sig_min_genes, standardize)
+            shared_key = tuple(enr.genes_above_cutoff)
+            if signature_cache is not None and key in signature_cache:
+                sig = signature_cache[key]
+            elif gene_set_groups is not None and shared_key in generated:
+                other = generated[shared_key]
+                sig = GOPCASignature(pc, enr, other.seed, other.matrix)
+                profile.count('signatures_shared')
+                if emit is not None:
+                    emit('signature_shared', pc=pc, signature=sig,
+                         shared_with=other)
+            else:
+                if emit is not None:
+                    emit('signature_start', pc=pc, gse_result=enr)
+                with profile.phase('signature_generation'):
+                    sig = GOPCA._generate_signature(
+                        matrix, params, pc, enr,
+                        standardize=standardize, verbose=verbose)
+                if emit is not None:
+                    emit('signature_built', pc=pc, signature=sig)
+                if signature_cache is not None:
+                    signature_cache[key] = sig
+                generated[shared_key] = sig
+            signatures.append(sig)
         msg('Generated %d signatures based on the enriched gene sets.', q)
 
         return signatures
@@ -537,7 +965,86 @@ class GOPCA(object):
         return config.get_dict()
     # end static functions
 
+    def _emit(self, event, **kwargs):
+        """Call all hooks registered for an event."""
+        for func in self._hooks.get(event, []):
+            func(event, **kwargs)
+
     # public functions
+    def add_hook(self, event, func):
+        """Register a function to be called when an event occurs.
+
+        Hooks are called with the event name as the first argument, followed
+        by event-specific keyword arguments (e.g., ``pc`` for
+        ``"pc_enrichment_start"``). Stages are marked by pairs of
+        ``"<stage>_start"`` and ``"<stage>_end"`` events; see
+        `HOOK_EVENTS` for all events. If no hooks are registered, no
+        events are generated.
+
+        After each principal component (PC) has been processed, a
+        ``"progress"`` event is generated, with the following arguments:
+        ``config`` and ``num_configs`` (the current configuration and the
+        number of configurations), ``pc`` and ``num_components`` (the
+        current PC and the number of PCs), ``gene_sets_tested`` and
+        ``signatures`` (the numbers of gene sets tested and signatures
+        generated so far), ``elapsed`` (the number of seconds since the
+        start of the run) and ``eta`` (the estimated number of seconds
+        remaining, based on the average time per PC so far).
+
+        Signatures are generated between ``"signature_start"`` and
+        ``"signature_built"`` events. A signature that shares the data
+        generated for another gene set with the same genes (see
+        `_restrict_gene_sets`) only generates a ``"signature_shared"`` event,
+        with the arguments ``pc``, ``signature``, and ``shared_with`` (the
+        signature whose data are shared).
+
+        Parameters
+        ----------
+        event : str
+            The event name.
+        func : callable
+            The function to call.
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+        ValueError
+            If ``event`` is not a valid event name.
+        """
+        if event not in HOOK_EVENTS:
+            raise ValueError('Invalid event name: "%s"' % event)
+        self._hooks.setdefault(event, []).append(func)
+
+    def remove_hook(self, event, func):
+        """Remove a function registered for an event.
+
+        Parameters
+        ----------
+        event : str
+            The event name.
+        func : callable
+            The function to remove.
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+        ValueError
+            If ``func`` is not registered for ``event``.
+        """
+        try:
+            self._hooks[event].remove(func)
+        except (KeyError, ValueError):
+            raise ValueError('Function is not registered for event "%s".'
+                             % event)
+        if not self._hooks[event]:
+            del self._hooks[event]
+
     def has_param(self, name):
         return self.config.has_param(name)
 
@@ -560,22 +1067,14 @@ class GOPCA(object):
         """
         self.config.set_param(name, value)
 
-    def run(self):
-        """Perform GO-PCA.
-
-        Parameters
-        ----------
+    def _finalize_configs(self):
+        """Check and finalize the parameters of all configurations.
 
         Returns
         -------
-        `GOPCARun` or None
-            The GO-PCA run, or ``None`` if the run failed.
+        bool
+            Whether all configurations are valid.
         """
-        t0 = time.time()  # remember the start time
-        timestamp = str(datetime.datetime.utcnow())  # timestamp for the run
-
-
-        ### Phase 1: Make sure all configurations are valid
         all_configs_valid = True
         for config in self.configs:
             if not config.user_params.check_params():
@@ -584,42 +1083,30 @@ class GOPCA(object):
             config.finalize_params(self.matrix.p)
             if not config.params.check_params():
                 all_configs_valid = False
+        return all_configs_valid
 
-        if not all_configs_valid:
-            logger.error('Invalid configuration settings. '
-                         'Aborting GO-PCA run.')
-            return None
+    def _get_num_components(self):
+        """Determine the number of principal components to test.
 
-        # print some information
-        p, n = self.matrix.shape
-        logger.info('Timestamp: %s', timestamp)
-        logger.info('Size of expression matrix: ' +
-                    'p=%d genes x n=%d samples.', p, n)
-
-        # Report hash values for expression matrix and configurations
-        expression_hash = self.matrix.hash
-        logger.info('Expression matrix hash: %s', expression_hash)
-        config_hashes = []
-        for i, config in enumerate(self.configs):
-            config_hashes.append(config.hash)
-            logger.info('Configuration #%d hash: %s', i+1, config_hashes[-1])
-
-
-        ### Phase 2: Determine the number of principal components
+        Returns
+        -------
+        int
+            The number of principal components, or 0 if no principal
+            components should be tested.
+        """
         num_components = self.num_components
         if num_components == 0:
-            # estimate the number of non-trivial PCs using a permutation test
+            # estimate the number of non-trivial PCs
             num_components = self.estimate_num_components()
             if num_components == 0:
                 logger.error('The estimated number of non-trivial '
                              'principal components is 0. '
                              'Aborting GO-PCA run.')
-                return None
+                return 0
             if 0 < self.pc_max_components < num_components:
                 num_components = self.pc_max_components
                 logger.info('Limiting the number of PCs to test to %d.', num_components)
 
-
         else:
             # determine the total number of principal components
             # (i.e., the number of dimensions spanned by the data)
@@ -629,52 +1116,375 @@ class GOPCA(object):
                              '%d, but the data spans only %d dimensions. '
                              'Aborting GO-PCA run.',
                              num_components, max_components)
-                return None
+                return 0
 
         if num_components == 0:
             logger.error('No principal components to test.'
                          'Aborting GO-PCA run.')
-            return None
+        return num_components
+
+    def _perform_pca(self, num_components):
+        """Perform PCA on the expression matrix.
 
+        Parameters
+        ----------
+        num_components : int
+            The number of principal components to compute.
 
-        ### Phase 3: Perform PCA
+        Returns
+        -------
+        W : `numpy.ndarray`
+            The loadings matrix (genes x PCs).
+        Y : `numpy.ndarray`
+            The projection of the samples onto the PCs (samples x PCs).
+        frac : `numpy.ndarray`
+            The fraction of variance explained by each PC.
+        """
         logger.info('Performing PCA...')
-        pca = PCA(n_components=num_components)
+        pca = create_pca(num_components, *self.matrix.shape,
+                         chunk_size=(self.chunk_size or None))
         Y = pca.fit_transform(self.matrix.X.T)
+        W = pca.components_.T  # the loadings matrix
+
+        # older versions of scikit-learn always return float64 arrays
+        Y = Y.astype(self.dtype, copy=False)
+        W = W.astype(self.dtype, copy=False)
 
         # output fraction of variance explained for the PCs tested
         frac = pca.explained_variance_ratio_
         cum_frac = np.cumsum(frac)
         logger.info('Fraction of total variance explained by the first '
                     '%d PCs: %.1f%%', num_components, 100 * cum_frac[-1])
+        return W, Y, frac
 
+    def _get_expression_hash(self):
+        """Returns the hash of the expression matrix.
 
-        ### Phase 4: Run GO-PCA for each configuration supplied
-        enr_logger = logging.getLogger(enrichment.__name__)
+        The hash is identical to `ExpMatrix.hash`, but in out-of-core mode
+        (see :attr:`chunk_size`), it is calculated without copying the
+        entire matrix.
+        """
+        if not self.chunk_size:
+            return self.matrix.hash
+
+        gene_str = ','.join(str(s) for s in self.matrix.genes)
+        sample_str = ','.join(str(s) for s in self.matrix.samples)
+        data_str = ';'.join([gene_str, sample_str]) + ';'
+        h = hashlib.md5(data_str.encode('UTF-8'))
+        X = self.X
+        for start in range(0, X.shape[0], self.chunk_size):
+            h.update(np.ascontiguousarray(
+                X[start:(start + self.chunk_size)]).tobytes())
+        return str(h.hexdigest())
+
+    def _get_gene_means(self):
+        """Returns the mean expression of each gene.
+
+        In out-of-core mode (see :attr:`chunk_size`), the means are
+        calculated without copying the entire matrix.
+        """
+        X = self.X
+        p = X.shape[0]
+        chunk_size = self.chunk_size or max(p, 1)
+        means = np.empty(p, dtype=self.dtype)
+        for start in range(0, p, chunk_size):
+            stop = min(start + chunk_size, p)
+            means[start:stop] = np.mean(X[start:stop], axis=1)
+        return means
+
+    @staticmethod
+    def _get_changed_pcs(params, W_old, W_new):
+        """Determine which PCs have changed materially.
+
+        A PC is considered unchanged if the ``mHG_L`` genes with the most
+        positive loadings and the ``mHG_L`` genes with the most negative
+        loadings are the same (and in the same order) for both loading
+        matrices, i.e., if the parts of the gene rankings examined by the
+        XL-mHG test are identical.
+
+        Returns
+        -------
+        list of bool
+            For each PC, whether it has changed.
+        """
+        assert isinstance(params, GOPCAParams)
+        assert W_old.shape == W_new.shape
+
+        L = min(params.mHG_L, W_old.shape[0])
+        changed = []
+        for d in range(W_old.shape[1]):
+            a_old = np.argsort(W_old[:, d])
+            a_new = np.argsort(W_new[:, d])
+            same = np.array_equal(a_old[:L], a_new[:L]) and \
+                np.array_equal(a_old[-L:], a_new[-L:])
+            changed.append(not same)
+        return changed
+
+    def _get_run_key(self, expression_hash, config_hashes):
+        """Returns a key identifying the inputs of a run.
+
+        The key is used for checkpointing and for caching results.
+        """
+        data_str = ';'.join(str(repr(v)) for v in [
+            gopca.__version__, expression_hash, config_hashes,
+            self.num_components,
+            self.pc_seed, self.pc_num_permutations, self.pc_zscore_thresh,
+            self.pc_max_components, self.pc_null_method])
+        data = data_str.encode('UTF-8')
+        return str(hashlib.md5(data).hexdigest())
+
+    def run(self, checkpoint_dir=None, result_cache=None):
+        """Perform GO-PCA.
+
+        Parameters
+        ----------
+        checkpoint_dir : str, optional
+            If specified, the results of the PCA and the signatures generated
+            for each configuration are stored in a subdirectory of this
+            directory after each principal component, so that an
+            interrupted run can be resumed by calling this function again
+            with the same inputs. The checkpoint data are removed once the run
+            has completed. [None]
+        result_cache : `GOPCAResultCache`, optional
+            If specified, the run is retrieved from this cache if a run with
+            identical inputs (expression data, configurations, settings for
+            determining the number of PCs, and GO-PCA version) was stored in
+            it before. Otherwise, the run is stored in the cache. [None]
+
+        Returns
+        -------
+        `GOPCARun` or None
+            The GO-PCA run, or ``None`` if the run failed.
+        """
+        gopca_run = None
+        for kind, data in self._generate(checkpoint_dir=checkpoint_dir,
+                                         result_cache=result_cache):
+            if kind == 'run':
+                gopca_run = data
+        return gopca_run
+
+    def iter_signatures(self, checkpoint_dir=None):
+        """Perform GO-PCA and generate signatures as soon as they are final.
+
+        Each signature is generated right after it has passed the global
+        filter, so that it can be processed (e.g., written to disk) while the
+        analysis continues. Unlike `run`, no signature matrix is generated.
+        If the inputs are invalid, no signatures are generated (see the log
+        for details).
+
+        Parameters
+        ----------
+        checkpoint_dir : str, optional
+            See `run`. When an interrupted run is resumed, the signatures
+            generated before the interruption are generated again first.
+            [None]
+
+        Yields
+        ------
+        (int, `GOPCASignature`) tuple
+            The index of the configuration, and the signature.
+        """
+        for kind, data in self._generate(checkpoint_dir=checkpoint_dir,
+                                         build_run=False):
+            if kind == 'signature':
+                yield data
+
+    def run_async(self, checkpoint_dir=None, result_cache=None,
+                  executor=None, timeout=None):
+        """Perform GO-PCA without blocking the asyncio event loop.
+
+        The run is performed step by step in ``executor`` (see
+        `aio.GOPCAAsyncRun`). The returned object can be awaited to obtain
+        the `GOPCARun` (or ``None``), and iterated over asynchronously to
+        receive progress updates and signatures. Requires Python 3.5 or
+        later.
+
+        Parameters
+        ----------
+        checkpoint_dir : str, optional
+            See `run`. [None]
+        result_cache : `GOPCAResultCache`, optional
+            See `run`. [None]
+        executor : `concurrent.futures.Executor`, optional
+            The executor. If ``None``, the default executor of the event loop
+            is used. [None]
+        timeout : float, optional
+            The maximum run time (in seconds). [None]
+
+        Returns
+        -------
+        `aio.GOPCAAsyncRun`
+            The asynchronous run.
+        """
+        # the aio module uses Python 3.5 syntax
+        from .aio import GOPCAAsyncRun
+        return GOPCAAsyncRun(self, checkpoint_dir=checkpoint_dir,
+                             result_cache=result_cache, executor=executor,
+                             timeout=timeout)
+
+    def _generate(self, checkpoint_dir=None, result_cache=None,
+                  build_run=True):
+        """Perform GO-PCA, step by step (the core of `run`).
+
+        This generator yields ``('signature', (k, sig))`` for each signature
+        ``sig`` of configuration ``k`` that has passed the global filter.
+        If ``build_run`` is ``True``, the signature matrix is generated at
+        the end, and the last item is ``('run', gopca_run)`` (where
+        ``gopca_run`` is ``None`` if the run failed).
+
+        In addition, it yields ``('phase', name)`` after the number of PCs
+        was determined and after the PCA was performed, and
+        ``('progress', info)`` after each PC (``info`` is a dictionary with
+        the arguments of the ``progress`` hook event). Each step between two
+        items can therefore be executed separately (see `aio`).
+        """
+        t0 = time.time()  # remember the start time
+        timestamp = str(datetime.datetime.utcnow())  # timestamp for the run
+        profile = GOPCAProfile()
+
+        # only generate events if hooks are registered
+        emit = None
+        if self._hooks:
+            emit = self._emit
+            emit('run_start')
 
+
+        ### Phase 1: Make sure all configurations are valid
+        with profile.phase('config_validation'):
+            configs_valid = self._finalize_configs()
+        if not configs_valid:
+            logger.error('Invalid configuration settings. '
+                         'Aborting GO-PCA run.')
+            if build_run:
+                yield 'run', None
+            return
+
+        # print some information
+        p, n = self.matrix.shape
+        logger.info('Timestamp: %s', timestamp)
+        logger.info('Size of expression matrix: ' +
+                    'p=%d genes x n=%d samples.', p, n)
+
+        # Report hash values for expression matrix and configurations
+        with profile.phase('hashing'):
+            expression_hash = self._get_expression_hash()
+        logger.info('Expression matrix hash: %s', expression_hash)
+        config_hashes = []
+        for i, config in enumerate(self.configs):
+            config_hashes.append(config.hash)
+            logger.info('Configuration #%d hash: %s', i+1, config_hashes[-1])
+
+        run_key = self._get_run_key(expression_hash, config_hashes)
+        if result_cache is not None:
+            assert isinstance(result_cache, GOPCAResultCache)
+            gopca_run = result_cache.get(run_key)
+            if gopca_run is not None:
+                logger.info('Retrieved GO-PCA run from cache "%s" '
+                            '(key: %s).', result_cache.cache_dir, run_key)
+                if emit is not None:
+                    emit('run_end', run=gopca_run)
+                yield 'run', gopca_run
+                return
+
+        checkpoint = None
+        pca_state = None
+        if checkpoint_dir is not None:
+            checkpoint = GOPCACheckpoint(checkpoint_dir, run_key)
+            pca_state = checkpoint.load('pca')
+            if pca_state is not None:
+                logger.info('Resuming GO-PCA run from checkpoint "%s".',
+                            checkpoint.path)
+
+        if pca_state is not None:
+            num_components, W, Y, frac = pca_state
+
+        else:
+            ### Phase 2: Determine the number of principal components
+            if emit is not None:
+                emit('pc_estimation_start')
+            with profile.phase('pc_estimation'):
+                num_components = self._get_num_components()
+            if emit is not None:
+                emit('pc_estimation_end', num_components=num_components)
+            if num_components == 0:
+                if build_run:
+                    yield 'run', None
+                return
+            yield 'phase', 'pc_estimation'
+
+
+            ### Phase 3: Perform PCA
+            if emit is not None:
+                emit('pca_start', num_components=num_components)
+            with profile.phase('pca'):
+                W, Y, frac = self._perform_pca(num_components)
+            if emit is not None:
+                emit('pca_end', W=W, Y=Y, frac=frac)
+
+            if checkpoint is not None:
+                checkpoint.save('pca', (num_components, W, Y, frac))
+            yield 'phase', 'pca'
+
+        # store the gene means, so that the PCA can be updated later
+        # (see `update`)
+        with profile.phase('pca'):
+            gene_means = self._get_gene_means()
+
+        ### Phase 4: Run GO-PCA for each configuration supplied
         genome = ExpGenome.from_gene_names(self.matrix.genes.tolist())
-        W = pca.components_.T  # the loadings matrix
 
         msg = logger.debug
         if self.verbose:
             # enable more verbose "INFO" messages
             msg = logger.info
 
+        # for resuming an interrupted run: the number of PCs already
+        # processed and the signatures generated for each configuration
+        num_configs = len(self.configs)
+        config_states = [(0, [])] * num_configs
+        if checkpoint is not None:
+            for k in range(num_configs):
+                state = checkpoint.load('config_%d' % k)
+                if state is not None:
+                    config_states[k] = state
+                    logger.info('Configuration #%d: Resuming after PC %d.',
+                                k+1, state[0])
+
+        # for estimating the remaining time
+        total_pcs = sum(num_components - state[0]
+                        for state in config_states)
+        pcs_done = 0
+        t_phase4 = time.time()
+
         all_signatures = []
+        config_signatures = []
         for k, config in enumerate(self.configs):
 
             logger.info('Generating GO-PCA signatures for configuration '
                         '%d...', k+1)
+            profile.start_config(k)
+            if emit is not None:
+                emit('config_start', index=k, config=config)
+
+            start, final_signatures = config_states[k]
+            final_signatures = list(final_signatures)
+            for sig in final_signatures:
+                yield 'signature', (k, sig)
 
             # create GeneSetEnrichmentAnalysis object
-            enr_logger.setLevel(logging.ERROR)
-            gse_analysis = GeneSetEnrichmentAnalysis(genome, config.gene_sets)
-            enr_logger.setLevel(logging.NOTSET)
+            # (unless all PCs were already processed)
+            if start < num_components:
+                with profile.phase('enrichment_setup'):
+                    gse_analysis, gene_set_groups = \
+                        self._get_enrichment_setup(
+                            genome, config, self.matrix.genes,
+                            profile=profile)
+                    num_tested = len(gene_set_groups)
 
             # generate signatures
-            final_signatures = []
-            var_expl = 0.0
-            for d in range(num_components):
+            var_expl = float(np.sum(frac[:start]))
+            for d in range(start, num_components):
+                t_pc = time.time()
                 var_expl += frac[d]
                 msg('')
                 msg('-'*70)
@@ -684,23 +1494,58 @@ class GOPCA(object):
                     'is %.1f%%.', 100*var_expl)
 
                 signatures_dsc = self._generate_pc_signatures(
-                    self.matrix, config.params, gse_analysis, W, d+1)
+                    self.matrix, config.params, gse_analysis, W, d+1,
+                    gene_set_groups=gene_set_groups,
+                    profile=profile, emit=emit)
                 signatures_asc = self._generate_pc_signatures(
-                    self.matrix, config.params, gse_analysis, W, -(d+1))
+                    self.matrix, config.params, gse_analysis, W, -(d+1),
+                    gene_set_groups=gene_set_groups,
+                    profile=profile, emit=emit)
                 signatures = signatures_dsc + signatures_asc
+                profile.count('gene_sets_tested', 2 * num_tested)
                 msg('# signatures: %d', len(signatures))
 
                 # apply global filter (if enabled)
                 if not config.params.no_global_filter:
                     before = len(signatures)
-                    signatures = self._global_filter(
-                        config.params, signatures, final_signatures,
-                        config.gene_ontology)
+                    if emit is not None:
+                        emit('global_filter_start', signatures=signatures)
+                    with profile.phase('global_filter'):
+                        signatures = self._global_filter(
+                            config.params, signatures, final_signatures,
+                            config.gene_ontology)
+                    if emit is not None:
+                        emit('global_filter_end', signatures=signatures)
+                    profile.count('dropped_global_filter',
+                                  before - len(signatures))
                     msg('Global filter: kept %d / %d signatures.',
                         len(signatures), before)
 
                 # self.print_signatures(signatures, debug=True)
                 final_signatures.extend(signatures)
+                for sig in signatures:
+                    yield 'signature', (k, sig)
+                profile.count('signatures', len(signatures))
+                profile.add_pc_time(time.time() - t_pc)
+
+                if checkpoint is not None:
+                    checkpoint.save('config_%d' % k, (d+1, final_signatures))
+
+                # report progress
+                pcs_done += 1
+                eta = (time.time() - t_phase4) / pcs_done * \
+                    (total_pcs - pcs_done)
+                msg('Estimated time remaining: %.1f s', eta)
+                progress = dict(
+                    config=k+1, num_configs=num_configs,
+                    pc=d+1, num_components=num_components,
+                    gene_sets_tested=profile.counters.get(
+                        'gene_sets_tested', 0),
+                    signatures=profile.counters.get('signatures', 0),
+                    elapsed=time.time() - t0, eta=eta)
+                if emit is not None:
+                    emit('progress', **progress)
+                yield 'progress', progress
                 msg('Total no. of signatures generated so far: %d',
                     len(final_signatures))
 
@@ -713,16 +1558,227 @@ class GOPCA(object):
             logger.info('='*70)
             logger.info('')
             all_signatures.extend(final_signatures)
+            config_signatures.append(final_signatures)
+            profile.end_config()
+            if emit is not None:
+                emit('config_end', index=k, signatures=final_signatures)
 
 
+        if not build_run:
+            if checkpoint is not None:
+                checkpoint.clear()
+            return
+
         ### Phase 5: Generate signature matrix and return a `GOPCARun` instance
-        sig_matrix = GOPCASignatureMatrix.from_signatures(all_signatures)
+        if emit is not None:
+            emit('signature_matrix_start')
+        with profile.phase('signature_matrix'):
+            sig_matrix = GOPCASignatureMatrix.from_signatures(all_signatures)
+        if emit is not None:
+            emit('signature_matrix_end', sig_matrix=sig_matrix)
         t1 = time.time()
         exec_time = t1 - t0
+        profile.finish()
         logger.info('This GO-PCA run took %.2f s.', exec_time)
         gopca_run = GOPCARun(sig_matrix,
                              gopca.__version__, timestamp, exec_time,
                              expression_hash, config_hashes,
-                             self.matrix.genes, self.matrix.samples, W, Y)
+                             self.matrix.genes, self.matrix.samples, W, Y,
+                             profile=profile, gene_means=gene_means,
+                             config_signatures=config_signatures)
+        if emit is not None:
+            emit('run_end', run=gopca_run)
+
+        if result_cache is not None:
+            result_cache.put(run_key, gopca_run)
+
+        if checkpoint is not None:
+            # the run has completed, so we no longer need the checkpoint
+            checkpoint.clear()
+
+        yield 'run', gopca_run
+
+    def update(self, run, new_samples):
+        """Update a GO-PCA run after new samples were added.
+
+        Instead of repeating the entire analysis, the PCA is updated
+        incrementally (see `pca.update_pca`), using the PC loadings, PC scores
+        and gene means stored in ``run``. The number of PCs is not changed.
+        For each configuration, the enrichment analysis and the local filter
+        are only repeated for PCs whose gene rankings have changed (see
+        `_get_changed_pcs`). For all other PCs, the gene sets that were
+        found to be enriched are reused (if the global filter is enabled,
+        this requires that all previous PCs are unchanged as well).
+        Signatures are always regenerated, since their genes are selected
+        based on the expression of all samples.
 
-        return gopca_run
+        Parameters
+        ----------
+        run : `GOPCARun`
+            The run generated for the current expression matrix and
+            configurations.
+        new_samples : `genometools.expression.ExpMatrix`
+            The expression matrix of the new samples, with the same genes as
+            :attr:`matrix`.
+
+        Returns
+        -------
+        run : `GOPCARun` or None
+            The updated run (for the expression matrix with the new samples
+            appended), or ``None`` if the update failed.
+        unchanged : list of `GOPCASignature`
+            The signatures of the updated run that have the same PC, gene
+            set and genes as a signature of the original run (the
+            signatures' expression values include the new samples).
+        """
+        assert isinstance(run, GOPCARun)
+        assert isinstance(new_samples, ExpMatrix)
+
+        if run.gene_means is None or run.config_signatures is None:
+            raise ValueError('The run does not contain the data required '
+                             'for updating it (it was generated by an '
+                             'older version of GO-PCA).')
+        if run.genes != self.matrix.genes.tolist() or \
+                run.samples != self.matrix.samples.tolist() or \
+                run.expression_hash != self._get_expression_hash():
+            raise ValueError('The run was not generated for this expression '
+                             'matrix.')
+
+        t0 = time.time()
+        timestamp = str(datetime.datetime.utcnow())
+        profile = GOPCAProfile()
+
+        # the configuration hashes include the final parameters
+        with profile.phase('config_validation'):
+            configs_valid = self._finalize_configs()
+        if not configs_valid:
+            logger.error('Invalid configuration settings. '
+                         'Aborting GO-PCA update.')
+            return None, []
+
+        if run.config_hashes != [config.hash for config in self.configs]:
+            raise ValueError('The run was not generated for these '
+                             'configurations.')
+        if set(new_samples.genes) != set(self.matrix.genes):
+            raise ValueError('The new samples must contain the same genes as '
+                             'the expression matrix.')
+        if set(new_samples.samples) & set(self.matrix.samples):
+            raise ValueError('The new samples must not be contained in the '
+                             'expression matrix.')
+
+        msg = logger.debug
+        if self.verbose:
+            msg = logger.info
+
+        # append the new samples
+        X_new = new_samples.loc[self.matrix.genes].X.astype(self.dtype,
+                                                             copy=False)
+        matrix = ExpMatrix(
+            genes=self.matrix.genes,
+            samples=self.matrix.samples.tolist() +
+            new_samples.samples.tolist(),
+            X=np.c_[self.X, X_new])
+        logger.info('Adding %d samples to the expression matrix '
+                    '(new size: p=%d genes x n=%d samples).',
+                    new_samples.n, matrix.p, matrix.n)
+
+        with profile.phase('hashing'):
+            expression_hash = matrix.hash
+        logger.info('Expression matrix hash: %s', expression_hash)
+
+        # update the PCA
+        with profile.phase('pca'):
+            W, Y, gene_means = update_pca(run.W, run.Y, run.gene_means, X_new)
+        num_components = W.shape[1]
+
+        genome = ExpGenome.from_gene_names(matrix.genes.tolist())
+        all_signatures = []
+        config_signatures = []
+        for k, config in enumerate(self.configs):
+            profile.start_config(k)
+            changed = self._get_changed_pcs(config.params, run.W, W)
+            logger.info('Configuration #%d: %d / %d PCs have changed.',
+                        k+1, sum(changed), num_components)
+
+            old_signatures = run.config_signatures[k]
+            gse_analysis = None
+            final_signatures = []
+            for d in range(num_components):
+                reuse = not changed[d] and \
+                    (config.params.no_global_filter or not any(changed[:d]))
+
+                if reuse:
+                    # regenerate the signatures from the original enrichment
+                    # results
+                    with profile.phase('signature_generation'):
+                        signatures = [
+                            self._generate_signature(
+                                matrix, config.params, sig.pc, sig.gse_result,
+                                verbose=self.verbose)
+                            for sig in old_signatures
+                            if abs(sig.pc) == d+1]
+                    profile.count('pcs_reused')
+                    msg('PC %d: Reused %d enriched gene sets.',
+                        d+1, len(signatures))
+
+                else:
+                    if gse_analysis is None:
+                        with profile.phase('enrichment_setup'):
+                            gse_analysis, gene_set_groups = \
+                                self._get_enrichment_setup(
+                                    genome, config, matrix.genes,
+                                    profile=profile)
+                            num_tested = len(gene_set_groups)
+                    signatures = \
+                        self._generate_pc_signatures(
+                            matrix, config.params, gse_analysis, W, d+1,
+                            gene_set_groups=gene_set_groups,
+                            profile=profile) + \
+                        self._generate_pc_signatures(
+                            matrix, config.params, gse_analysis, W, -(d+1),
+                            gene_set_groups=gene_set_groups,
+                            profile=profile)
+                    profile.count('gene_sets_tested', 2 * num_tested)
+
+                # apply global filter (if enabled)
+                if not config.params.no_global_filter:
+                    before = len(signatures)
+                    with profile.phase('global_filter'):
+                        signatures = self._global_filter(
+                            config.params, signatures, final_signatures,
+                            config.gene_ontology)
+                    profile.count('dropped_global_filter',
+                                  before - len(signatures))
+
+                final_signatures.extend(signatures)
+                profile.count('signatures', len(signatures))
+
+            logger.info('GO-PCA for configuration #%d generated %d '
+                        'signatures.', k+1, len(final_signatures))
+            all_signatures.extend(final_signatures)
+            config_signatures.append(final_signatures)
+            profile.end_config()
+
+        with profile.phase('signature_matrix'):
+            sig_matrix = GOPCASignatureMatrix.from_signatures(all_signatures)
+
+        # report which signatures are unchanged
+        def get_key(sig):
+            return sig.pc, sig.gene_set.id, tuple(sig.genes)
+
+        old_keys = set(get_key(sig) for sigs in run.config_signatures
+                       for sig in sigs)
+        unchanged = [sig for sig in all_signatures if get_key(sig) in old_keys]
+        logger.info('%d / %d signatures are unchanged.',
+                    len(unchanged), len(all_signatures))
+
+        exec_time = time.time() - t0
+        profile.finish()
+        logger.info('This GO-PCA update took %.2f s.', exec_time)
+        updated_run = GOPCARun(sig_matrix,
+                               gopca.__version__, timestamp, exec_time,
+                               expression_hash, run.config_hashes,
+                               matrix.genes, matrix.samples, W, Y,
+                               profile=profile, gene_means=gene_means,
+                               config_signatures=config_signatures)
+        return updated_run, unchanged
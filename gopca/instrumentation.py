@@ -0,0 +1,208 @@
+# Copyright (c) 2016 Florian Wagner
+#
+# This file is part of GO-PCA.
+#
+# GO-PCA is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, Version 3,
+# as published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Module containing the `GOPCAProfile` class.
+
+"""
+
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+from builtins import *
+
+import os
+import sys
+import time
+import logging
+from collections import OrderedDict
+
+try:
+    import resource
+except ImportError:
+    # not available on Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+
+def get_cpu_time():
+    """Returns the user + system CPU time of the current process."""
+    t = os.times()
+    return t[0] + t[1]
+
+
+def get_peak_memory():
+    """Returns the peak resident memory of the current process (in bytes).
+
+    Returns ``None`` if the peak memory cannot be determined.
+    """
+    if resource is None:
+        return None
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        # reported in bytes on Mac OS X
+        return int(maxrss)
+    # reported in kilobytes on Linux
+    return int(maxrss) * 1024
+
+
+class _PhaseTimer(object):
+    """Context manager that adds the time spent in a block to a phase."""
+    def __init__(self, profile, name):
+        self.profile = profile
+        self.name = name
+        self._wall = None
+        self._cpu = None
+
+    def __enter__(self):
+        self._wall = time.time()
+        self._cpu = get_cpu_time()
+        return self
+
+    def __exit__(self, *args):
+        self.profile.add_time(self.name, time.time() - self._wall,
+                              get_cpu_time() - self._cpu)
+
+
+class GOPCAProfile(object):
+    """Timings and counters collected during a GO-PCA run.
+
+    Phase timings are accumulated, i.e., if a phase (e.g., "enrichment") is
+    entered multiple times, the total time spent in it is reported.
+
+    Attributes
+    ----------
+    phases : `collections.OrderedDict` (str => (float, float))
+        The wall and CPU time (in seconds) spent in each phase.
+    configs : list of `collections.OrderedDict`
+        Wall time, CPU time, per-PC wall times and counters for each
+        configuration.
+    counters : `collections.OrderedDict` (str => int)
+        The counters, summed across all configurations (e.g., the number of
+        gene sets dropped by the local filter).
+    wall_time : float or None
+        The total wall time of the run (in seconds).
+    cpu_time : float or None
+        The total CPU time of the run (in seconds).
+    peak_memory : int or None
+        The peak resident memory of the process at the end of the run
+        (in bytes), if it could be determined.
+    """
+    def __init__(self):
+        self.phases = OrderedDict()
+        self.configs = []
+        self.counters = OrderedDict()
+        self.wall_time = None
+        self.cpu_time = None
+        self.peak_memory = None
+
+        self._wall0 = time.time()
+        self._cpu0 = get_cpu_time()
+        self._config = None
+        self._config_start = None
+
+    def __repr__(self):
+        return '<%s object (%d phases, %d configurations)>' \
+               % (self.__class__.__name__, len(self.phases),
+                  len(self.configs))
+
+    def __str__(self):
+        return '\n'.join(self.get_summary_strings())
+
+    def phase(self, name):
+        """Returns a context manager that times a phase.
+
+        Parameters
+        ----------
+        name : str
+            The name of the phase.
+        """
+        return _PhaseTimer(self, name)
+
+    def add_time(self, name, wall, cpu):
+        """Add wall and CPU time to a phase."""
+        w, c = self.phases.get(name, (0.0, 0.0))
+        self.phases[name] = (w + wall, c + cpu)
+
+    def count(self, name, value=1):
+        """Increase a counter (for the current configuration and in total).
+
+        Parameters
+        ----------
+        name : str
+            The name of the counter.
+        value : int, optional
+            The value to add. [1]
+        """
+        self.counters[name] = self.counters.get(name, 0) + value
+        if self._config is not None:
+            counters = self._config['counters']
+            counters[name] = counters.get(name, 0) + value
+
+    def start_config(self, index):
+        """Start collecting data for a configuration."""
+        self._config = OrderedDict([
+            ('index', index),
+            ('wall_time', None),
+            ('cpu_time', None),
+            ('pc_times', []),
+            ('counters', OrderedDict()),
+        ])
+        self._config_start = (time.time(), get_cpu_time())
+
+    def add_pc_time(self, wall):
+        """Store the wall time spent on a PC for the current configuration."""
+        self._config['pc_times'].append(wall)
+
+    def end_config(self):
+        """Stop collecting data for the current configuration."""
+        wall0, cpu0 = self._config_start
+        self._config['wall_time'] = time.time() - wall0
+        self._config['cpu_time'] = get_cpu_time() - cpu0
+        self.configs.append(self._config)
+        self._config = None
+
+    def finish(self):
+        """Record the total time and the peak memory."""
+        self.wall_time = time.time() - self._wall0
+        self.cpu_time = get_cpu_time() - self._cpu0
+        self.peak_memory = get_peak_memory()
+
+    def get_summary_strings(self):
+        """Returns a human-readable summary, as a list of lines."""
+        lines = []
+        if self.wall_time is not None:
+            lines.append('Total time: %.2f s wall, %.2f s CPU'
+                         % (self.wall_time, self.cpu_time))
+        if self.peak_memory is not None:
+            lines.append('Peak memory: %.1f MB'
+                         % (self.peak_memory / (1024.0 * 1024.0)))
+        lines.append('Phases:')
+        for name, (wall, cpu) in self.phases.items():
+            lines.append('    %-22s %9.2f s wall %9.2f s CPU'
+                         % (name, wall, cpu))
+        lines.append('Counters:')
+        for name, value in self.counters.items():
+            lines.append('    %-22s %9d' % (name, value))
+        for conf in self.configs:
+            lines.append('Configuration #%d: %.2f s wall, %.2f s CPU'
+                         % (conf['index'] + 1, conf['wall_time'],
+                            conf['cpu_time']))
+            if conf['pc_times']:
+                lines.append('    PC times (s): ' + ', '.join(
+                    '%.2f' % t for t in conf['pc_times']))
+            for name, value in conf['counters'].items():
+                lines.append('    %-18s %9d' % (name, value))
+        return lines
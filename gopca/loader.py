@@ -0,0 +1,215 @@
+# Copyright (c) 2016 Florian Wagner
+#
+# This file is part of GO-PCA.
+#
+# GO-PCA is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, Version 3,
+# as published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Functions for loading the GO-PCA input files concurrently.
+
+The expression file, the gene set file, and the ontology file are
+independent of each other, so they can be read (and parsed) at the same
+time. This mostly saves time when the files are located on a network file
+system, or when the input caches have to be created.
+"""
+
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+from builtins import *
+
+import time
+import logging
+import multiprocessing
+from multiprocessing.pool import ThreadPool
+
+import genometools
+from genometools.basic import GeneSetCollection
+from genometools.ontology import GeneOntology
+
+from .expression_io import read_expression_tsv, read_expression_cached
+from .gene_set_io import read_gene_sets_cached, read_ontology_cached
+
+logger = logging.getLogger(__name__)
+
+
+def _load_expression(path, use_cache, cache_dir, kwargs):
+    """Read the expression file (in a worker)."""
+    t0 = time.time()
+    kwargs = dict(kwargs)
+    out_of_core = kwargs.pop('out_of_core', False)
+    if use_cache:
+        matrix = read_expression_cached(path, cache_dir=cache_dir,
+                                        out_of_core=out_of_core, **kwargs)
+    else:
+        matrix = read_expression_tsv(path, **kwargs)
+    return matrix, time.time() - t0
+
+
+def _load_gene_sets(path, use_cache, cache_dir):
+    """Read the gene set file (in a worker)."""
+    t0 = time.time()
+    if use_cache:
+        gene_sets = read_gene_sets_cached(path, cache_dir=cache_dir)
+    else:
+        gene_sets = GeneSetCollection.read_tsv(path)
+    return gene_sets, time.time() - t0
+
+
+def _load_ontology(path, use_cache, cache_dir, part_of_cc_only):
+    """Read the ontology file (in a worker)."""
+    t0 = time.time()
+    # suppress the (many) messages from the OBO parser
+    p_logger = logging.getLogger(genometools.__name__)
+    p_logger.setLevel(logging.ERROR)
+    try:
+        if use_cache:
+            gene_ontology = read_ontology_cached(
+                path, part_of_cc_only=part_of_cc_only, cache_dir=cache_dir)
+        else:
+            gene_ontology = GeneOntology.read_obo(
+                path, part_of_cc_only=part_of_cc_only)
+    finally:
+        p_logger.setLevel(logging.NOTSET)
+    return gene_ontology, time.time() - t0
+
+
+def _run_jobs(jobs, use_processes):
+    """Run the loading jobs concurrently and log the time each one took."""
+    t0 = time.time()
+    if use_processes:
+        pool = multiprocessing.Pool(len(jobs))
+    else:
+        pool = ThreadPool(len(jobs))
+    try:
+        results = [pool.apply_async(func, args) for _, func, args in jobs]
+        data = []
+        for (name, _, _), result in zip(jobs, results):
+            d, t = result.get()
+            logger.info('Loaded %s in %.2f s.', name, t)
+            data.append(d)
+    finally:
+        pool.terminate()
+        pool.join()
+    logger.info('Loaded all inputs in %.2f s.', time.time() - t0)
+    return data
+
+
+def _get_gene_set_jobs(gene_set_file, gene_ontology_file, use_cache,
+                       cache_dir, part_of_cc_only):
+    jobs = [
+        ('gene set file', _load_gene_sets,
+         (gene_set_file, use_cache, cache_dir)),
+    ]
+    if gene_ontology_file is not None:
+        jobs.append(
+            ('ontology file', _load_ontology,
+             (gene_ontology_file, use_cache, cache_dir, part_of_cc_only)))
+    return jobs
+
+
+def load_gene_sets_and_ontology(gene_set_file, gene_ontology_file=None,
+                                use_cache=True, cache_dir=None,
+                                part_of_cc_only=False, use_processes=False):
+    """Read the gene set file and the ontology file concurrently.
+
+    This is useful if the same gene sets are used for multiple expression
+    matrices (see `load_inputs` for a description of the parameters).
+
+    Returns
+    -------
+    gene_sets : `genometools.basic.GeneSetCollection`
+        The gene sets.
+    gene_ontology : `genometools.ontology.GeneOntology` or None
+        The gene ontology (``None`` if ``gene_ontology_file`` is ``None``).
+    """
+    assert isinstance(use_cache, bool)
+    assert isinstance(part_of_cc_only, bool)
+    assert isinstance(use_processes, bool)
+
+    data = _run_jobs(
+        _get_gene_set_jobs(gene_set_file, gene_ontology_file, use_cache,
+                           cache_dir, part_of_cc_only),
+        use_processes)
+
+    gene_sets = data[0]
+    gene_ontology = None
+    if gene_ontology_file is not None:
+        gene_ontology = data[1]
+    return gene_sets, gene_ontology
+
+
+def load_inputs(expression_file, gene_set_file, gene_ontology_file=None,
+                use_cache=True, cache_dir=None, part_of_cc_only=False,
+                use_processes=False, **kwargs):
+    """Read the GO-PCA input files concurrently.
+
+    Parameters
+    ----------
+    expression_file : str
+        The path of the tab-delimited expression file.
+    gene_set_file : str
+        The path of the gene set file.
+    gene_ontology_file : str or None, optional
+        The path of the OBO file. If ``None``, no ontology is read. [None]
+    use_cache : bool, optional
+        Whether to use the input caches (see `expression_io` and
+        `gene_set_io`). [True]
+    cache_dir : str or None, optional
+        The directory to store the caches in. If ``None``, each cache is
+        stored alongside the corresponding file. [None]
+    part_of_cc_only : bool, optional
+        See `genometools.ontology.GeneOntology.read_obo`. [False]
+    use_processes : bool, optional
+        Whether to read the files in separate processes instead of threads.
+        This allows the files to be parsed in parallel (instead of only
+        overlapping file I/O), but the results have to be transferred back
+        to the main process. Cannot be combined with ``out_of_core``.
+        [False]
+    kwargs : dict
+        Additional keyword arguments for
+        `expression_io.read_expression_cached` (or
+        `expression_io.read_expression_tsv`, if ``use_cache`` is ``False``).
+
+    Returns
+    -------
+    matrix : `genometools.expression.ExpMatrix`
+        The expression matrix.
+    gene_sets : `genometools.basic.GeneSetCollection`
+        The gene sets.
+    gene_ontology : `genometools.ontology.GeneOntology` or None
+        The gene ontology (``None`` if ``gene_ontology_file`` is ``None``).
+    """
+    assert isinstance(use_cache, bool)
+    assert isinstance(part_of_cc_only, bool)
+    assert isinstance(use_processes, bool)
+
+    if kwargs.get('out_of_core', False):
+        if not use_cache:
+            raise ValueError('Out-of-core mode requires the input cache.')
+        if use_processes:
+            # memory-mapped matrices cannot be transferred between processes
+            raise ValueError('Out-of-core mode cannot be combined with '
+                             'loading the inputs in separate processes.')
+
+    jobs = [
+        ('expression file', _load_expression,
+         (expression_file, use_cache, cache_dir, kwargs)),
+    ]
+    jobs.extend(_get_gene_set_jobs(gene_set_file, gene_ontology_file,
+                                   use_cache, cache_dir, part_of_cc_only))
+    data = _run_jobs(jobs, use_processes)
+
+    matrix, gene_sets = data[:2]
+    gene_ontology = None
+    if gene_ontology_file is not None:
+        gene_ontology = data[2]
+    return matrix, gene_sets, gene_ontology
@@ -36,15 +36,16 @@ import sys
 # import os
 # import argparse
 import textwrap
-import logging
 
-import genometools
-from genometools.expression import ExpMatrix
-from genometools.basic import GeneSetCollection
-from genometools.ontology import GeneOntology
+import numpy as np
+
 from gopca import util
+from gopca.loader import load_inputs
 from gopca.cli import arguments
 from gopca import GOPCAParams, GOPCA
+from gopca.profiling import GOPCAProfiler
+from gopca.progress import ProgressWriter
+from gopca.result_cache import GOPCAResultCache
 
 
 def get_argument_parser():
@@ -93,6 +94,43 @@ def get_argument_parser():
         help='Output pickle file (extension ".pickle" is recommended).'
     )
 
+    g = parser.add_argument_group('Input caching')
+
+    g.add_argument(
+        '--no-input-cache', action='store_true',
+        help=textwrap.dedent("""\
+            Always parse the input files, instead of using (and creating)
+            binary caches of their contents."""))
+
+    g.add_argument(
+        '--input-cache-dir', type=str, metavar=file_mv,
+        help=textwrap.dedent("""\
+            Directory for storing binary caches of the input files
+            (by default, caches are stored alongside the input files)."""))
+
+    g.add_argument(
+        '--load-processes', action='store_true',
+        help=textwrap.dedent("""\
+            Read the input files in separate processes instead of threads
+            (they are always read concurrently; cannot be combined with
+            --chunk-size)."""))
+
+    g = parser.add_argument_group('Memory usage')
+
+    g.add_argument(
+        '--float32', action='store_true',
+        help=textwrap.dedent("""\
+            Store the expression matrix and perform the PCA in single
+            precision, to reduce memory usage (p-values are still
+            calculated in double precision)."""))
+
+    g.add_argument(
+        '--chunk-size', type=int, metavar=int_mv, default=0,
+        help=textwrap.dedent("""\
+            Out-of-core mode: Memory-map the expression matrix (using the
+            input cache) and perform PCA on chunks of this many genes
+            (0 = off). [%s]""" % '%(default)d'))
+
     # input file hash values
     """
     g = parser.add_argument_group(
@@ -120,7 +158,7 @@ def get_argument_parser():
             """ % '%(default)d'))
 
     g.add_argument(
-        '-G', '--sel-var-genes', type=int, metavar=int_mv,
+        '-G', '--sel-var-genes', type=int, metavar=int_mv, default=0,
         help=textwrap.dedent("""\
             Variance filter: Keep G most variable genes (0 = off). [%s]
             """ % '%(default)d'))
@@ -167,6 +205,12 @@ def get_argument_parser():
             P-value threshold for XL-mHG E-score calculation ("psi"). [%s]
             """ % '%(default).1e'))
 
+    g.add_argument(
+        '--gene-set-max-size', type=int, metavar=int_mv,
+        help=textwrap.dedent("""\
+            Maximum number of genes in the expression matrix for a gene set
+            to be tested (0 = no maximum). [%s]""" % '%(default)d'))
+
     g = parser.add_argument_group('Manually disable the GO-PCA filters')
 
     g.add_argument(
@@ -204,6 +248,14 @@ def get_argument_parser():
         '-pz', '--pc-zscore-thresh', type=float, metavar=float_mv,
         help='Z-score threshold. [%s]' % '%(default).2f')
 
+    g.add_argument(
+        '-pn', '--pc-null-method', choices=['permutation', 'analytic'],
+        default='permutation',
+        help=textwrap.dedent("""\
+            Method for obtaining the null distribution of the explained
+            variance ("analytic" uses random matrix theory and requires
+            no permutations). [%(default)s]"""))
+
     g.add_argument(
         '-pm', '--pc-max', type=int, metavar=int_mv,
         help=textwrap.dedent("""\
@@ -221,6 +273,45 @@ def get_argument_parser():
     # reporting options
     arguments.add_reporting_args(parser)
 
+    g = parser.add_argument_group('Result caching')
+
+    g.add_argument(
+        '--cache-dir', type=str, metavar=file_mv,
+        help=textwrap.dedent("""\
+            Directory for caching GO-PCA runs. If a run with identical
+            inputs is found in the cache, it is returned immediately."""))
+
+    g.add_argument(
+        '--cache-max-size', type=int, metavar=int_mv, default=1024,
+        help=textwrap.dedent("""\
+            Maximum size of the cache (in MB). When exceeded, the least
+            recently used runs are removed. [%s]""" % '%(default)d'))
+
+    g = parser.add_argument_group('Checkpointing')
+
+    g.add_argument(
+        '--checkpoint-dir', type=str, metavar=file_mv,
+        help=textwrap.dedent("""\
+            Directory for storing intermediate results, so that an
+            interrupted run can be resumed by running the same command
+            again."""))
+
+    g = parser.add_argument_group('Profiling and progress reporting')
+
+    g.add_argument(
+        '--profile', type=str, metavar=file_mv,
+        help=textwrap.dedent("""\
+            Directory for writing a cProfile dump for each stage of GO-PCA
+            ("<stage>.prof") and a flame graph-compatible file with sampled
+            call stacks ("stacks.collapsed")."""))
+
+    g.add_argument(
+        '--progress-fd', type=int, metavar=int_mv,
+        help=textwrap.dedent("""\
+            File descriptor for reporting the progress of the run, as
+            newline-delimited JSON (e.g., 3; the descriptor must be open).
+            """))
+
     return parser
 
 
@@ -303,28 +394,57 @@ def main(args=None):
             logger.debug('Parameter "%s" specified on command line!', p)
             params.set_param(p, v)
 
-    # read expression file
-    matrix = ExpMatrix.read_tsv(args.expression_file)
+    if args.chunk_size > 0 and args.no_input_cache:
+        logger.error('Out-of-core mode (--chunk-size) requires the input '
+                     'cache (cannot be combined with --no-input-cache).')
+        return 1
+
+    if args.chunk_size > 0 and args.load_processes:
+        logger.error('Out-of-core mode (--chunk-size) cannot be combined '
+                     'with --load-processes.')
+        return 1
+
+    # read the expression file, the gene set file, and the ontology file
+    # (if supplied) concurrently
+    dtype = np.float32 if args.float32 else np.float64
+    matrix, gene_sets, gene_ontology = load_inputs(
+        args.expression_file, args.gene_set_file, args.gene_ontology_file,
+        use_cache=(not args.no_input_cache), cache_dir=args.input_cache_dir,
+        part_of_cc_only=params.go_part_of_cc_only,
+        use_processes=args.load_processes,
+        sel_var_genes=args.sel_var_genes, dtype=dtype,
+        out_of_core=(args.chunk_size > 0))
     logger.info('Expression matrix size: ' +
                 '(p = %d genes) x (n = %d samples).', matrix.p, matrix.n)
-    
-    # read gene set file
-    gene_sets = GeneSetCollection.read_tsv(args.gene_set_file)
-    print(args.gene_set_file, gene_sets)
-    
-    # read ontology file (if supplied)
-    gene_ontology = None
-    if args.gene_ontology_file is not None:
-        p_logger = logging.getLogger(genometools.__name__)
-        p_logger.setLevel(logging.ERROR)
-        gene_ontology = GeneOntology.read_obo(
-            args.gene_ontology_file,
-            part_of_cc_only=params.go_part_of_cc_only)
-        p_logger.setLevel(logging.NOTSET)
-        
+
     M = GOPCA.simple_setup(matrix, params, gene_sets, gene_ontology,
-                          verbose=verbose)
-    run = M.run()
+                          verbose=verbose, dtype=dtype,
+                          pc_null_method=args.pc_null_method,
+                          chunk_size=args.chunk_size)
+
+    result_cache = None
+    if args.cache_dir is not None:
+        result_cache = GOPCAResultCache(
+            args.cache_dir, max_size=args.cache_max_size * 1024**2)
+
+    progress_writer = None
+    if args.progress_fd is not None:
+        progress_writer = ProgressWriter(args.progress_fd)
+        progress_writer.attach(M)
+
+    if args.profile is not None:
+        profiler = GOPCAProfiler(args.profile)
+        profiler.attach(M)
+        with profiler:
+            run = M.run(checkpoint_dir=args.checkpoint_dir,
+                        result_cache=result_cache)
+        profiler.write()
+    else:
+        run = M.run(checkpoint_dir=args.checkpoint_dir,
+                    result_cache=result_cache)
+
+    if progress_writer is not None:
+        progress_writer.close()
 
     if run is None:
         logger.error('GO-PCA run failed!')
@@ -66,6 +66,7 @@ class GOPCAParams(object):
         ('pval_thresh', 1e-6),
         ('mHG_X_frac', 0.25),
         ('mHG_X_min', 5),
+        ('gene_set_max_size', 0),  # 0 = no maximum
         ('mHG_L', -1),  # will be set to p / 8, where p is # genes
         ('escore_pval_thresh', 1e-4),
         ('escore_thresh', 2.0),
@@ -151,7 +152,10 @@ class GOPCAParams(object):
     # public members
     @property
     def hash(self):
-        data_str = ';'.join([str(repr(v)) for k, v in self.__params.items()])
+        # `gene_set_max_size` was added later, and is left out at its default
+        # value so that existing hashes (e.g., result cache keys) stay valid
+        data_str = ';'.join([str(repr(v)) for k, v in self.__params.items()
+                             if not (k == 'gene_set_max_size' and v == 0)])
         data = data_str.encode('UTF-8')
         return str(hashlib.md5(data).hexdigest())
 
@@ -286,6 +290,9 @@ class GOPCAParams(object):
         check_type('mHG_X_min', int)
         check_range('mHG_X_min', 0)
 
+        check_type('gene_set_max_size', int)
+        check_range('gene_set_max_size', 0)
+
         check_type('mHG_L', int)
         check_range('mHG_L', -1)
 
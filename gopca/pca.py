@@ -0,0 +1,411 @@
+# Copyright (c) 2016 Florian Wagner
+#
+# This file is part of GO-PCA.
+#
+# GO-PCA is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, Version 3,
+# as published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""PCA for expression matrices with many more genes than samples.
+
+GO-PCA performs PCA on the samples of a (genes x samples) expression matrix.
+Typical matrices contain tens of thousands of genes, but only tens or
+hundreds of samples. In this case, it is much cheaper to compute the
+eigendecomposition of the (samples x samples) Gram matrix of the centered
+data than the SVD of the full matrix. The PC loadings can then be recovered
+with a single matrix product. `create_pca` selects this approach when the
+matrix has fewer samples than genes, and scikit-learn's `PCA` otherwise.
+
+Since genes are centered independently, the Gram matrix and the loadings
+can also be computed from chunks of genes. This allows PCA to be performed
+on memory-mapped matrices that are larger than the available memory (see
+the ``chunk_size`` parameter of `GramPCA`).
+"""
+
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+from builtins import *
+
+import logging
+
+import numpy as np
+
+from . import util
+
+logger = logging.getLogger(__name__)
+
+
+def _get_chunks(p, chunk_size=None):
+    """Generate (start, stop) indices of chunks of rows."""
+    if not chunk_size:
+        chunk_size = max(p, 1)
+    for start in range(0, p, chunk_size):
+        yield start, min(start + chunk_size, p)
+
+
+def get_permuted_gram_matrix(X, chunk_size=None):
+    """Calculate the Gram matrix of a permuted expression matrix.
+
+    The expression values of each gene are permuted independently (using
+    `numpy.random`) and centered, and the (samples x samples) Gram matrix is
+    accumulated chunk by chunk, so that the permuted matrix is never stored
+    in its entirety.
+
+    Parameters
+    ----------
+    X : `numpy.ndarray`
+        The expression matrix (genes x samples). Can be memory-mapped.
+    chunk_size : int or None, optional
+        The number of genes to process at a time. If ``None``, all genes are
+        processed at once. [None]
+
+    Returns
+    -------
+    `numpy.ndarray`
+        The Gram matrix (samples x samples, `numpy.float64`).
+    """
+    p, n = X.shape
+    G = np.zeros((n, n), dtype=np.float64)
+    for start, stop in _get_chunks(p, chunk_size):
+        C = np.empty((stop - start, n), dtype=X.dtype)
+        for i in range(stop - start):
+            C[i, :] = X[start + i, np.random.permutation(n)]
+        C -= np.mean(C, axis=1)[:, np.newaxis]
+        G += np.dot(C.T, C)
+    return G
+
+
+class GramPCA(object):
+    """PCA based on the eigendecomposition of the Gram matrix.
+
+    The interface follows scikit-learn's `PCA` class (the data are
+    (samples x features) matrices), so the two can be used interchangeably.
+    Signs are chosen like in scikit-learn (the largest absolute value in
+    each column of the left singular vectors is positive).
+
+    The Gram matrix is always decomposed in double precision. The loadings
+    and scores have the same type as the data.
+
+    Parameters
+    ----------
+    n_components : int or None, optional
+        The number of components to keep. If ``None``, all components are
+        kept. [None]
+    chunk_size : int or None, optional
+        The number of features to process at a time. If ``None``, all
+        features are processed at once. [None]
+    standardize : bool, optional
+        Whether to scale each feature to unit variance, after centering it.
+        Features with zero variance are excluded. [False]
+
+    Attributes
+    ----------
+    components_ : `numpy.ndarray`
+        The principal axes (components x features).
+    explained_variance_ : `numpy.ndarray`
+        The variance explained by each component.
+    explained_variance_ratio_ : `numpy.ndarray`
+        The fraction of the total variance explained by each component.
+    singular_values_ : `numpy.ndarray`
+        The singular values corresponding to each component.
+    mean_ : `numpy.ndarray`
+        The mean of each feature.
+    scale_ : `numpy.ndarray` or None
+        The standard deviation of each feature (only if ``standardize`` is
+        ``True``).
+    """
+    def __init__(self, n_components=None, chunk_size=None,
+                 standardize=False):
+        if n_components is not None:
+            assert isinstance(n_components, (int, np.integer))
+        if chunk_size is not None:
+            assert isinstance(chunk_size, (int, np.integer))
+        assert isinstance(standardize, bool)
+
+        self.n_components = n_components
+        self.chunk_size = chunk_size
+        self.standardize = standardize
+
+        self.components_ = None
+        self.explained_variance_ = None
+        self.explained_variance_ratio_ = None
+        self.singular_values_ = None
+        self.mean_ = None
+        self.scale_ = None
+        self._scores = None
+
+    def __repr__(self):
+        return '<%s object (n_components=%s, chunk_size=%s)>' \
+               % (self.__class__.__name__, str(self.n_components),
+                  str(self.chunk_size))
+
+    def _get_chunk(self, XT, start, stop):
+        """Return a centered (and scaled) chunk of features."""
+        C = XT[start:stop] - self.mean_[start:stop, np.newaxis]
+        if self.standardize:
+            scale = self.scale_[start:stop]
+            inv_scale = np.zeros(stop - start, dtype=C.dtype)
+            inv_scale[scale > 0] = 1.0 / scale[scale > 0]
+            C *= inv_scale[:, np.newaxis]
+        return C
+
+    def fit(self, X):
+        """Fit the model to the data.
+
+        Parameters
+        ----------
+        X : `numpy.ndarray`
+            The data (samples x features). Can be (the transpose of) a
+            memory-mapped array.
+
+        Returns
+        -------
+        `GramPCA`
+            The fitted model.
+        """
+        assert isinstance(X, np.ndarray) and X.ndim == 2
+        n, p = X.shape
+        k = self.n_components
+        if k is None:
+            k = n
+        assert 1 <= k <= n
+
+        # work with (features x samples) chunks, which are contiguous for the
+        # (transposed) expression matrices used by GO-PCA
+        XT = X.T
+
+        # first pass: means, standard deviations, and the
+        # (samples x samples) Gram matrix of the centered data
+        self.mean_ = np.empty(p, dtype=X.dtype)
+        if self.standardize:
+            self.scale_ = np.empty(p, dtype=X.dtype)
+        G = np.zeros((n, n), dtype=np.float64)
+        for start, stop in _get_chunks(p, self.chunk_size):
+            self.mean_[start:stop] = np.mean(XT[start:stop], axis=1)
+            if self.standardize:
+                self.scale_[start:stop] = np.std(XT[start:stop], axis=1,
+                                                 ddof=1)
+            C = self._get_chunk(XT, start, stop)
+            G += np.dot(C.T, C)
+
+        lambdas, U = np.linalg.eigh(G)
+        total = np.sum(lambdas)
+
+        # eigh returns the eigenvalues in ascending order
+        lambdas = np.maximum(lambdas[::-1][:k], 0.0)
+        U = U[:, ::-1][:, :k]
+
+        # sign convention (same as `sklearn.utils.extmath.svd_flip`)
+        max_abs_rows = np.argmax(np.abs(U), axis=0)
+        signs = np.sign(U[max_abs_rows, range(k)])
+        signs[signs == 0] = 1.0
+        U *= signs
+
+        s = np.sqrt(lambdas)
+        # components with zero variance get zero loadings
+        s_inv = np.zeros(k, dtype=np.float64)
+        s_inv[s > 0] = 1.0 / s[s > 0]
+        B = (U * s_inv).astype(X.dtype, copy=False)
+
+        # second pass: loadings = Xc^T U S^-1
+        V = np.empty((p, k), dtype=X.dtype)
+        for start, stop in _get_chunks(p, self.chunk_size):
+            V[start:stop] = np.dot(self._get_chunk(XT, start, stop), B)
+
+        self.components_ = V.T
+        self.singular_values_ = s
+        self.explained_variance_ = lambdas / max(n - 1, 1)
+        if total > 0:
+            self.explained_variance_ratio_ = lambdas / total
+        else:
+            self.explained_variance_ratio_ = np.zeros(k, dtype=np.float64)
+        self._scores = (U * s).astype(X.dtype, copy=False)
+        return self
+
+    def fit_transform(self, X):
+        """Fit the model and return the scores of the data.
+
+        Parameters
+        ----------
+        X : `numpy.ndarray`
+            The data (samples x features).
+
+        Returns
+        -------
+        `numpy.ndarray`
+            The scores (samples x components).
+        """
+        self.fit(X)
+        return self._scores
+
+    def transform(self, X):
+        """Project data onto the principal components.
+
+        Parameters
+        ----------
+        X : `numpy.ndarray`
+            The data (samples x features).
+
+        Returns
+        -------
+        `numpy.ndarray`
+            The scores (samples x components).
+        """
+        assert self.components_ is not None
+        XT = X.T
+        Y = np.zeros((X.shape[0], self.components_.shape[0]),
+                     dtype=np.float64)
+        for start, stop in _get_chunks(XT.shape[0], self.chunk_size):
+            Y += np.dot(self._get_chunk(XT, start, stop).T,
+                        self.components_[:, start:stop].T)
+        return Y.astype(X.dtype, copy=False)
+
+
+def use_gram_pca(p, n):
+    """Determine if the Gram matrix should be used for PCA.
+
+    Parameters
+    ----------
+    p : int
+        The number of genes.
+    n : int
+        The number of samples.
+
+    Returns
+    -------
+    bool
+        Whether `GramPCA` should be used.
+    """
+    return n < p
+
+
+def create_pca(n_components, p, n, randomized=False, chunk_size=None,
+               standardize=False):
+    """Create a PCA object for a (genes x samples) expression matrix.
+
+    Parameters
+    ----------
+    n_components : int
+        The number of components to keep.
+    p : int
+        The number of genes.
+    n : int
+        The number of samples.
+    randomized : bool, optional
+        Whether to use scikit-learn's randomized PCA, if `GramPCA` is not
+        used (only supported by scikit-learn >= 0.16.1). [False]
+    chunk_size : int or None, optional
+        If specified, always use `GramPCA`, and process this many genes at a
+        time. [None]
+    standardize : bool, optional
+        If ``True``, always use `GramPCA`, and standardize the genes. [False]
+
+    Returns
+    -------
+    `GramPCA` or `sklearn.decomposition.PCA`
+        The PCA object. Its ``fit`` and ``fit_transform`` methods
+        expect (samples x genes) matrices.
+    """
+    if chunk_size or standardize or use_gram_pca(p, n):
+        return GramPCA(n_components=n_components, chunk_size=chunk_size,
+                       standardize=standardize)
+
+    import sklearn
+    if randomized and util.parse_version(sklearn.__version__) >= (0, 16, 1):
+        # RandomizedPCA does not work in Scikit-learn 0.14.1,
+        # but it works in Scikit-learn 0.16.1
+        from sklearn.decomposition import RandomizedPCA as PCA
+    else:
+        from sklearn.decomposition import PCA
+    return PCA(n_components=n_components)
+
+
+def update_pca(W, Y, mean, X):
+    """Update a truncated PCA after new samples were added.
+
+    Implements the incremental SVD with mean update described by Ross et al.
+    (Int J Comput Vis, 2008), which is based on Brand's rank-k SVD update
+    (Linear Algebra Appl, 2006). Only the ``k`` components of the existing
+    decomposition are used, so the result is an approximation of the PCA of
+    the combined data. The approximation is exact if the original data
+    spanned no more than ``k`` dimensions.
+
+    Parameters
+    ----------
+    W : `numpy.ndarray`
+        The loadings matrix (genes x k), with orthonormal columns.
+    Y : `numpy.ndarray`
+        The PC scores of the original samples (samples x k).
+    mean : `numpy.ndarray`
+        The mean expression of each gene in the original samples.
+    X : `numpy.ndarray`
+        The expression matrix of the new samples (genes x new samples).
+
+    Returns
+    -------
+    W : `numpy.ndarray`
+        The updated loadings matrix (genes x k). The sign of each PC is
+        chosen to agree with the original loadings.
+    Y : `numpy.ndarray`
+        The PC scores of all samples (original samples first).
+    mean : `numpy.ndarray`
+        The mean expression of each gene in all samples.
+    """
+    assert isinstance(W, np.ndarray) and W.ndim == 2
+    assert isinstance(Y, np.ndarray) and Y.ndim == 2
+    assert isinstance(mean, np.ndarray) and mean.ndim == 1
+    assert isinstance(X, np.ndarray) and X.ndim == 2
+    assert W.shape[1] == Y.shape[1]
+    assert W.shape[0] == mean.size == X.shape[0]
+
+    k = W.shape[1]
+    n_old, n_new = Y.shape[0], X.shape[1]
+    n = n_old + n_new
+
+    U = W.astype(np.float64)
+    s = np.linalg.norm(Y, axis=0).astype(np.float64)
+    mean_old = mean.astype(np.float64)
+    mean_new = np.mean(X, axis=1, dtype=np.float64)
+    mean_all = (n_old * mean_old + n_new * mean_new) / n
+
+    # the centered new samples, plus one column accounting for the shift of
+    # the mean
+    B = np.empty((X.shape[0], n_new + 1), dtype=np.float64)
+    B[:, :n_new] = X - mean_new[:, np.newaxis]
+    B[:, n_new] = np.sqrt(n_old * n_new / n) * (mean_new - mean_old)
+
+    # split B into the part spanned by U and an orthogonal remainder
+    L = np.dot(U.T, B)
+    Q, K = np.linalg.qr(B - np.dot(U, L))
+
+    # small (k + n_new + 1) x (k + n_new + 1) problem
+    R = np.zeros((k + n_new + 1, k + n_new + 1), dtype=np.float64)
+    R[:k, :k] = np.diag(s)
+    R[:k, k:] = L
+    R[k:, k:] = K
+    Ur, _, _ = np.linalg.svd(R)
+    U_all = np.dot(np.c_[U, Q], Ur[:, :k])
+
+    # keep the signs of the original loadings
+    signs = np.sign(np.sum(U * U_all, axis=0))
+    signs[signs == 0] = 1.0
+    U_all *= signs
+
+    # scores of the original samples (based on their projection onto the
+    # original components), and of the new samples
+    Y_all = np.empty((n, k), dtype=np.float64)
+    Y_all[:n_old] = np.dot(Y, np.dot(U.T, U_all)) + \
+        np.dot(mean_old - mean_all, U_all)
+    Y_all[n_old:] = np.dot((X - mean_all[:, np.newaxis]).T, U_all)
+
+    return (U_all.astype(W.dtype, copy=False),
+            Y_all.astype(Y.dtype, copy=False),
+            mean_all.astype(mean.dtype, copy=False))
@@ -0,0 +1,177 @@
+# Copyright (c) 2016 Florian Wagner
+#
+# This file is part of GO-PCA.
+#
+# GO-PCA is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, Version 3,
+# as published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Module containing the `GOPCAProfiler` class.
+
+"""
+
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+from builtins import *
+
+import os
+import io
+import sys
+import time
+import logging
+import cProfile
+import threading
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+# the stages profiled (none of them are nested)
+STAGES = ('pc_estimation', 'pca', 'pc_enrichment', 'local_filter',
+          'signature', 'global_filter', 'signature_matrix')
+
+
+class GOPCAProfiler(object):
+    """Profiles the stages of a GO-PCA run, using hooks.
+
+    For each stage, the profiler writes a cProfile dump
+    (``<stage>.prof``, which can be analyzed using the `pstats` module).
+    In addition, a background thread samples the call stack of the thread
+    running GO-PCA at regular intervals, and the samples are written in the
+    "collapsed stack" format used by flame graph tools
+    (``stacks.collapsed``). Each stack is prefixed with the current stage.
+
+    Parameters
+    ----------
+    output_dir : str
+        The directory to write the profiles to.
+    interval : float, optional
+        The sampling interval (in seconds). [0.005]
+
+    Example
+    -------
+    ::
+
+        profiler = GOPCAProfiler('profile')
+        profiler.attach(M)  # `M` is a `GOPCA` instance
+        with profiler:
+            run = M.run()
+        profiler.write()
+    """
+    def __init__(self, output_dir, interval=0.005):
+        assert isinstance(interval, (int, float))
+
+        self.output_dir = output_dir
+        self.interval = float(interval)
+
+        self._profiles = {}
+        self._stage = None
+        self._stacks = Counter()
+        self._thread = None
+        self._thread_id = None
+        self._stop = threading.Event()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def _on_event(self, event, **kwargs):
+        # events are of the form "<stage>_start" or "<stage>_end",
+        # except for "signature_built", which ends the "signature" stage
+        if event == 'signature_built':
+            stage, action = 'signature', 'end'
+        else:
+            stage, _, action = event.rpartition('_')
+
+        if action == 'start':
+            try:
+                prof = self._profiles[stage]
+            except KeyError:
+                prof = cProfile.Profile()
+                self._profiles[stage] = prof
+            self._stage = stage
+            prof.enable()
+        else:
+            self._profiles[stage].disable()
+            self._stage = None
+
+    def attach(self, M):
+        """Register the profiling hooks with a `GOPCA` instance."""
+        for stage in STAGES:
+            M.add_hook(stage + '_start', self._on_event)
+            if stage == 'signature':
+                M.add_hook('signature_built', self._on_event)
+            else:
+                M.add_hook(stage + '_end', self._on_event)
+
+    def detach(self, M):
+        """Remove the profiling hooks from a `GOPCA` instance."""
+        for stage in STAGES:
+            M.remove_hook(stage + '_start', self._on_event)
+            if stage == 'signature':
+                M.remove_hook('signature_built', self._on_event)
+            else:
+                M.remove_hook(stage + '_end', self._on_event)
+
+    def _sample(self):
+        while not self._stop.is_set():
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is not None:
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append('%s (%s:%d)' % (
+                        code.co_name, os.path.basename(code.co_filename),
+                        code.co_firstlineno))
+                    frame = frame.f_back
+                stack.append(self._stage or 'other')
+                self._stacks[';'.join(reversed(stack))] += 1
+            time.sleep(self.interval)
+
+    def start(self):
+        """Start sampling the call stack of the current thread."""
+        self._thread_id = threading.current_thread().ident
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sample)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Stop sampling."""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def write(self):
+        """Write the profiles to the output directory.
+
+        Returns
+        -------
+        None
+        """
+        if not os.path.isdir(self.output_dir):
+            os.makedirs(self.output_dir)
+
+        for stage, prof in sorted(self._profiles.items()):
+            path = os.path.join(self.output_dir, '%s.prof' % stage)
+            prof.dump_stats(path)
+
+        path = os.path.join(self.output_dir, 'stacks.collapsed')
+        with io.open(path, 'w', encoding='UTF-8') as ofh:
+            for stack, count in sorted(self._stacks.items()):
+                ofh.write('%s %d\n' % (stack, count))
+
+        logger.info('Wrote profiles for %d stages and %d stack samples to '
+                    '"%s".', len(self._profiles),
+                    sum(self._stacks.values()), self.output_dir)
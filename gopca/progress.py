@@ -0,0 +1,79 @@
+# Copyright (c) 2016 Florian Wagner
+#
+# This file is part of GO-PCA.
+#
+# GO-PCA is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, Version 3,
+# as published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Module containing the `ProgressWriter` class.
+
+"""
+
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+from builtins import *
+
+import io
+import json
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# events reported in addition to "progress" events
+STAGE_EVENTS = ('run_start', 'run_end',
+                'pc_estimation_start', 'pc_estimation_end',
+                'pca_start', 'pca_end',
+                'config_start', 'config_end')
+
+
+class ProgressWriter(object):
+    """Writes GO-PCA progress events as newline-delimited JSON.
+
+    Each line is a JSON object with the event name (``"event"``), a Unix
+    timestamp (``"time"``), and, for ``"progress"`` events, all progress
+    information (see `GOPCA.add_hook`). The output is flushed after each
+    line, so that another process can monitor it.
+
+    Parameters
+    ----------
+    fd : int
+        The file descriptor to write to.
+    """
+    def __init__(self, fd):
+        assert isinstance(fd, int)
+        self.fd = fd
+        self._fh = io.open(fd, 'w', encoding='UTF-8', closefd=False)
+
+    def __call__(self, event, **kwargs):
+        data = {'event': event, 'time': time.time()}
+        if event == 'progress':
+            data.update(kwargs)
+        elif event == 'config_start':
+            data['config'] = kwargs['index'] + 1
+        elif event == 'pc_estimation_end':
+            data['num_components'] = int(kwargs['num_components'])
+        try:
+            self._fh.write(str(json.dumps(data, sort_keys=True)) + '\n')
+            self._fh.flush()
+        except (IOError, OSError) as err:
+            # progress reporting should never abort the run
+            logger.warning('Could not write progress to file descriptor '
+                           '%d: %s', self.fd, str(err))
+
+    def attach(self, M):
+        """Register the writer with a `GOPCA` instance."""
+        for event in STAGE_EVENTS + ('progress',):
+            M.add_hook(event, self)
+
+    def close(self):
+        self._fh.close()
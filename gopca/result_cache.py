@@ -0,0 +1,175 @@
+# Copyright (c) 2016 Florian Wagner
+#
+# This file is part of GO-PCA.
+#
+# GO-PCA is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, Version 3,
+# as published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Module containing the `GOPCAResultCache` class.
+
+"""
+
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+from builtins import *
+
+import os
+import logging
+
+import six
+
+from .checkpoint import write_pickle_atomic
+
+if six.PY2:
+    import cPickle as pickle
+else:
+    import pickle
+
+logger = logging.getLogger(__name__)
+
+
+class GOPCAResultCache(object):
+    """An on-disk cache of GO-PCA runs.
+
+    Runs are stored as pickle files named after a key that identifies the
+    inputs of the run (see `GOPCA.run`). When the total size of the cache
+    exceeds the maximum size, the least recently used runs are removed.
+    (The modification time of each file is updated whenever the run is
+    retrieved from the cache.)
+
+    Parameters
+    ----------
+    cache_dir : str
+        The cache directory.
+    max_size : int, optional
+        The maximum total size of the cache (in bytes). [1 GB]
+    """
+    def __init__(self, cache_dir, max_size=1024**3):
+        assert isinstance(max_size, (int, float))
+
+        self.cache_dir = cache_dir
+        self.max_size = int(max_size)
+
+    def __repr__(self):
+        return '<%s object (cache_dir="%s", max_size=%d)>' \
+               % (self.__class__.__name__, self.cache_dir, self.max_size)
+
+    def _get_file(self, key):
+        return os.path.join(self.cache_dir, key + '.pickle')
+
+    def _get_entries(self):
+        """Returns (mtime, size, path) for each cached run."""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.pickle'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        return entries
+
+    @property
+    def size(self):
+        """The total size of all cached runs (in bytes)."""
+        if not os.path.isdir(self.cache_dir):
+            return 0
+        return sum(e[1] for e in self._get_entries())
+
+    def get(self, key):
+        """Retrieve a run from the cache.
+
+        Parameters
+        ----------
+        key : str
+            The key identifying the run.
+
+        Returns
+        -------
+        `GOPCARun` or None
+            The run, or ``None`` if it is not in the cache.
+        """
+        path = self._get_file(key)
+        if not os.path.isfile(path):
+            return None
+        try:
+            with open(path, 'rb') as fh:
+                run = pickle.load(fh)
+            # mark as recently used
+            os.utime(path, None)
+        except Exception as err:
+            logger.warning('Could not read cached run "%s": %s',
+                           path, str(err))
+            return None
+        return run
+
+    def put(self, key, run):
+        """Store a run in the cache, and remove old runs if necessary.
+
+        Parameters
+        ----------
+        key : str
+            The key identifying the run.
+        run : `GOPCARun`
+            The run.
+
+        Returns
+        -------
+        None
+        """
+        try:
+            if not os.path.isdir(self.cache_dir):
+                os.makedirs(self.cache_dir)
+            write_pickle_atomic(self._get_file(key), run)
+            self.evict()
+        except (IOError, OSError) as err:
+            logger.warning('Could not store run in cache "%s": %s',
+                           self.cache_dir, str(err))
+
+    def evict(self):
+        """Remove the least recently used runs until the cache is small enough.
+
+        Returns
+        -------
+        int
+            The number of runs removed.
+        """
+        entries = sorted(self._get_entries())
+        total = sum(e[1] for e in entries)
+        removed = 0
+        for mtime, size, path in entries:
+            if total <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        if removed > 0:
+            logger.info('Removed %d runs from cache "%s".',
+                        removed, self.cache_dir)
+        return removed
+
+    def clear(self):
+        """Remove all runs from the cache.
+
+        Returns
+        -------
+        None
+        """
+        if not os.path.isdir(self.cache_dir):
+            return
+        for mtime, size, path in self._get_entries():
+            os.remove(path)
@@ -25,12 +25,13 @@ from builtins import *
 import logging
 import hashlib
 from copy import deepcopy
-from collections import Iterable
+from collections import Iterable, OrderedDict
 
 import six
 import numpy as np
 
 from . import GOPCAParams, GOPCASignatureMatrix
+from .instrumentation import GOPCAProfile
 
 if six.PY2:
     import cPickle as pickle
@@ -76,18 +77,28 @@ class GOPCARun(object):
         The genes in the analysis.
     samples: Iterable of str
         The samples in the analysis.
-    W: `numpy.ndarray` (np.float64)
+    W: `numpy.ndarray` (np.float64 or np.float32)
         The PCA loading matrix; shape = (len(genes) x # PCs).
         There must be a 1-to-1 correspondence between `genes` and the rows
         of `W`.
-    Y: `numpy.ndarray` (np.float64)
+    Y: `numpy.ndarray` (np.float64 or np.float32)
         The PC score matrix; shape = (len(samples) x # PCs).
         There must be a 1-to-1 correspondence between `samples` and the
         rows of `Y`.
+    profile: `GOPCAProfile`, optional
+        Timings and counters collected during the run. [None]
+    gene_means: `numpy.ndarray`, optional
+        The mean expression of each gene (in the order of `genes`). Together
+        with `W` and `Y`, this allows the PCA to be updated when samples are
+        added (see `GOPCA.update`). [None]
+    config_signatures: list of list of `GOPCASignature`, optional
+        The signatures generated for each configuration (in the order in
+        which they were generated). [None]
     """
     def __init__(self, sig_matrix,
                  gopca_version, timestamp, exec_time,
-                 expression_hash, config_hashes, genes, samples, W, Y):
+                 expression_hash, config_hashes, genes, samples, W, Y,
+                 profile=None, gene_means=None, config_signatures=None):
 
         # type checks
         assert isinstance(sig_matrix, GOPCASignatureMatrix)
@@ -102,6 +113,12 @@ class GOPCARun(object):
         assert isinstance(samples, Iterable)
         assert isinstance(W, np.ndarray)
         assert isinstance(Y, np.ndarray)
+        if profile is not None:
+            assert isinstance(profile, GOPCAProfile)
+        if gene_means is not None:
+            assert isinstance(gene_means, np.ndarray)
+        if config_signatures is not None:
+            assert isinstance(config_signatures, Iterable)
 
         self.sig_matrix = sig_matrix
 
@@ -117,10 +134,22 @@ class GOPCARun(object):
         self.W = W
         self.Y = Y
 
+        self.profile = profile
+
+        self.gene_means = gene_means
+        self.config_signatures = None
+        if config_signatures is not None:
+            self.config_signatures = [list(sigs)
+                                      for sigs in config_signatures]
+
         # make sure shapes match up
         assert W.shape[0] == len(self.genes)
         assert Y.shape[0] == len(self.samples)
         assert W.shape[1] == Y.shape[1]
+        if gene_means is not None:
+            assert gene_means.shape == (W.shape[0], )
+        if config_signatures is not None:
+            assert len(self.config_signatures) == len(self.config_hashes)
 
     def __repr__(self):
         return '<GOPCARun instance (version="%s", timestamp="%s", hash="%s">' \
@@ -187,4 +216,112 @@ class GOPCARun(object):
         with open(path, 'rb') as fh:
             run = pickle.load(fh)
         assert isinstance(run, cls)
-        return run
\ No newline at end of file
+        return run
+
+    def __getstate__(self):
+        # compiled signature scorers are not stored
+        state = self.__dict__.copy()
+        state.pop('_scorers', None)
+        return state
+
+    def get_scorer(self, standardize=False, center=True, use_median=True):
+        """Returns a scorer for signature expression in new samples.
+
+        The scorer is compiled once for each combination of parameters.
+
+        Parameters
+        ----------
+        standardize: bool, optional
+            Whether to standardize the expression of each gene. [False]
+        center: bool, optional
+            Whether to center the expression of each gene. [True]
+        use_median: bool, optional
+            Whether to use the median to center the expression of each gene.
+            [True]
+
+        Returns
+        -------
+        `scoring.GOPCASignatureScorer`
+            The scorer.
+        """
+        # scipy.sparse is only imported when it is needed
+        from .scoring import GOPCASignatureScorer
+
+        key = (standardize, center, use_median)
+        scorers = self.__dict__.setdefault('_scorers', {})
+        try:
+            return scorers[key]
+        except KeyError:
+            scorer = GOPCASignatureScorer(
+                self.sig_matrix.signatures, standardize=standardize,
+                center=center, use_median=use_median)
+            scorers[key] = scorer
+            return scorer
+
+    def score_samples(self, matrix, chunk_size=1000, **kwargs):
+        """Calculate the expression of all signatures in new samples.
+
+        The expression of each gene is centered using the statistics of the
+        samples in the run, so for these samples, the result agrees with the
+        signature matrix of the run (see `scoring.GOPCASignatureScorer`).
+
+        Parameters
+        ----------
+        matrix: `genometools.expression.ExpMatrix`
+            The expression matrix of the new samples.
+        chunk_size: int, optional
+            The number of samples to process at a time. [1000]
+        kwargs: dict
+            Additional keyword arguments for `get_scorer`.
+
+        Returns
+        -------
+        `GOPCASignatureMatrix`
+            The signature expression matrix for the new samples.
+        """
+        scorer = self.get_scorer(**kwargs)
+        return scorer.score(matrix, chunk_size=chunk_size)
+
+    def to_columnar(self):
+        """Convert the run to a columnar, JSON-serializable representation.
+
+        Signature properties are stored as columns (lists with one element
+        per signature), and matrices are stored as lists of rows. The order
+        of the signatures is the same as in the signature matrix. The rows of
+        ``signature_expression`` correspond to the signatures, its columns to
+        ``signature_samples``. The rows of ``W`` and ``Y`` correspond to
+        ``genes`` and ``samples``, respectively.
+
+        Returns
+        -------
+        `collections.OrderedDict`
+            The columnar representation of the run.
+        """
+        signatures = self.sig_matrix.signatures
+        columns = OrderedDict([
+            ('label', [sig.label for sig in signatures]),
+            ('pc', [int(sig.pc) for sig in signatures]),
+            ('gene_set_id', [sig.gene_set_id for sig in signatures]),
+            ('gene_set_name', [sig.gene_set.name for sig in signatures]),
+            ('pval', [float(sig.pval) for sig in signatures]),
+            ('escore', [float(sig.escore) for sig in signatures]),
+            ('k', [int(sig.k) for sig in signatures]),
+            ('K', [int(sig.mHG_K) for sig in signatures]),
+            ('genes', [[str(g) for g in sig.genes] for sig in signatures]),
+        ])
+
+        data = OrderedDict([
+            ('gopca_version', self.gopca_version),
+            ('timestamp', self.timestamp),
+            ('exec_time', self.exec_time),
+            ('expression_hash', self.expression_hash),
+            ('config_hashes', self.config_hashes),
+            ('genes', [str(g) for g in self.genes]),
+            ('samples', [str(s) for s in self.samples]),
+            ('signatures', columns),
+            ('signature_samples', [str(s) for s in self.sig_matrix.samples]),
+            ('signature_expression', self.sig_matrix.X.tolist()),
+            ('W', self.W.tolist()),
+            ('Y', self.Y.tolist()),
+        ])
+        return data
@@ -0,0 +1,200 @@
+# Copyright (c) 2016 Florian Wagner
+#
+# This file is part of GO-PCA.
+#
+# GO-PCA is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, Version 3,
+# as published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Module containing the `GOPCASignatureScorer` class.
+
+"""
+
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+from builtins import *
+
+import logging
+from collections import Iterable
+
+import numpy as np
+from scipy import sparse
+
+from genometools.expression import ExpMatrix
+
+from . import GOPCASignature, GOPCASignatureMatrix
+
+logger = logging.getLogger(__name__)
+
+
+class GOPCASignatureScorer(object):
+    """Calculates the expression of GO-PCA signatures in new samples.
+
+    The expression of a signature is the average expression of its genes,
+    after each gene was centered (and optionally scaled) using the
+    statistics of the samples the signature was generated from (see
+    `GOPCASignature.get_expression`). For the original samples, the scores
+    are therefore identical to the signature expression values of the run.
+
+    All signatures are compiled into a sparse (signatures x genes) weight
+    matrix, so that a batch of samples is scored with a single sparse matrix
+    product.
+
+    Parameters
+    ----------
+    signatures : Iterable of `GOPCASignature`
+        The signatures.
+    standardize : bool, optional
+        Whether to standardize the expression of each gene. [False]
+    center : bool, optional
+        Whether to center the expression of each gene. [True]
+    use_median : bool, optional
+        Whether to use the median to center the expression of each gene.
+        Only relevant if ``center`` is ``True``. [True]
+
+    Attributes
+    ----------
+    genes : list of str
+        All genes contained in any of the signatures.
+    weights : `scipy.sparse.csr_matrix`
+        The weight of each gene for each signature.
+    offsets : `numpy.ndarray`
+        The constant term of each signature (from centering the genes).
+    """
+    def __init__(self, signatures, standardize=False, center=True,
+                 use_median=True):
+
+        assert isinstance(signatures, Iterable)
+        assert isinstance(standardize, bool)
+        assert isinstance(center, bool)
+        assert isinstance(use_median, bool)
+
+        self.signatures = list(signatures)
+        for sig in self.signatures:
+            assert isinstance(sig, GOPCASignature)
+        self.standardize = standardize
+        self.center = center
+        self.use_median = use_median
+
+        # collect the statistics of each gene (from the first signature that
+        # contains it)
+        gene_index = {}
+        loc = []
+        scale = []
+        rows = []
+        cols = []
+        for i, sig in enumerate(self.signatures):
+            X = sig.X.astype(np.float64)
+            for g, x in zip(sig.genes, X):
+                try:
+                    j = gene_index[g]
+                except KeyError:
+                    j = len(gene_index)
+                    gene_index[g] = j
+                    loc.append(self._get_loc(x))
+                    scale.append(self._get_scale(x))
+                rows.append(i)
+                cols.append(j)
+
+        self.genes = [None] * len(gene_index)
+        for g, j in gene_index.items():
+            self.genes[j] = g
+        loc = np.float64(loc)
+        scale = np.float64(scale)
+
+        q, p = len(self.signatures), len(self.genes)
+        k = np.float64([sig.k for sig in self.signatures])
+        rows = np.int64(rows)
+        cols = np.int64(cols)
+        values = 1.0 / (k[rows] * scale[cols])
+        self.weights = sparse.csr_matrix((values, (rows, cols)), shape=(q, p))
+        self.offsets = self.weights.dot(loc)
+
+    def __repr__(self):
+        return ('<%s instance (q=%d, p=%d, standardize=%s, center=%s, '
+                'use_median=%s)>'
+                % (self.__class__.__name__, self.q, self.p,
+                   str(self.standardize), str(self.center),
+                   str(self.use_median)))
+
+    def __str__(self):
+        return '<%s instance with %d signatures>' \
+               % (self.__class__.__name__, self.q)
+
+    @property
+    def q(self):
+        """The number of signatures."""
+        return len(self.signatures)
+
+    @property
+    def p(self):
+        """The number of genes."""
+        return len(self.genes)
+
+    def _get_loc(self, x):
+        """Returns the value used for centering the expression of a gene."""
+        if self.standardize or (self.center and not self.use_median):
+            return np.mean(x)
+        elif self.center:
+            return np.median(x)
+        return 0.0
+
+    def _get_scale(self, x):
+        """Returns the value used for scaling the expression of a gene."""
+        if self.standardize:
+            return np.std(x, ddof=1)
+        return 1.0
+
+    def score(self, matrix, chunk_size=1000):
+        """Calculate the expression of all signatures in a set of samples.
+
+        Parameters
+        ----------
+        matrix : `genometools.expression.ExpMatrix`
+            The expression matrix of the samples (it can contain additional
+            genes, and it can be memory-mapped).
+        chunk_size : int, optional
+            The number of samples to process at a time. [1000]
+
+        Returns
+        -------
+        `GOPCASignatureMatrix`
+            The signature expression matrix (in the order of
+            :attr:`signatures`).
+
+        Raises
+        ------
+        ValueError
+            If a signature gene is not contained in ``matrix``.
+        """
+        assert isinstance(matrix, ExpMatrix)
+        assert isinstance(chunk_size, (int, np.integer)) and chunk_size > 0
+
+        indices = matrix.genes.get_indexer(self.genes)
+        missing = np.sum(indices < 0)
+        if missing > 0:
+            raise ValueError('%d signature genes are missing from the '
+                             'expression matrix.' % missing)
+
+        X = matrix.X
+        n = X.shape[1]
+        S = np.empty((self.q, n), dtype=np.float64)
+        for start in range(0, n, chunk_size):
+            stop = min(start + chunk_size, n)
+            C = np.asarray(X[:, start:stop][indices], dtype=np.float64)
+            S[:, start:stop] = self.weights.dot(C)
+        S -= self.offsets[:, np.newaxis]
+
+        sig_matrix = GOPCASignatureMatrix(
+            genes=self.signatures, samples=matrix.samples.copy(), X=S)
+        sig_matrix.genes.name = 'Signatures'
+        sig_matrix.samples.name = 'Samples'
+        return sig_matrix
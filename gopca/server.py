@@ -0,0 +1,358 @@
+# Copyright (c) 2016 Florian Wagner
+#
+# This file is part of GO-PCA.
+#
+# GO-PCA is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, Version 3,
+# as published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Module containing the `GOPCAServer` class.
+
+The server is a long-lived process that keeps gene set collections and
+ontologies in memory and runs GO-PCA jobs in a pool of worker processes.
+Each worker keeps the `genometools.enrichment.GeneSetEnrichmentAnalysis`
+objects it creates, so that jobs with the same genes do not need to create
+them again. Jobs are submitted as JSON via a local HTTP API:
+
+``GET /collections``
+    Returns the names of the gene set collections.
+
+``POST /jobs``
+    Submits a job and returns its ID (``{"id": ...}``).
+
+``GET /jobs/<id>``
+    Returns the status of a job (``"running"``, ``"done"`` or ``"failed"``)
+    and, once it is done, the result (see `GOPCARun.to_columnar`). Once a
+    job has finished, it is removed from the server after its status has
+    been returned, so the result can only be retrieved once.
+
+``POST /run``
+    Runs a job and returns its status and result directly (the job is not
+    kept by the server).
+
+A job is a JSON object with the following keys: ``"collection"`` (the name
+of the gene set collection), ``"matrix"`` (an object with ``"genes"``,
+``"samples"``, and ``"X"``, a list of rows with one row per gene),
+``"params"`` (optional, GO-PCA parameter values), and
+``"num_components"`` (optional).
+"""
+
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+from builtins import *
+
+import json
+import uuid
+import logging
+import threading
+import multiprocessing
+from collections import OrderedDict
+
+from six.moves import BaseHTTPServer, socketserver
+import numpy as np
+
+from genometools.basic import GeneSetCollection
+from genometools.expression import ExpMatrix
+from genometools.ontology import GeneOntology
+
+from . import GOPCAParams, GOPCAConfig
+from .go_pca import GOPCA
+
+logger = logging.getLogger(__name__)
+
+# data shared by all jobs in a worker process
+_worker_data = {}
+
+
+def _init_worker(collections, gopca_kwargs):
+    _worker_data['collections'] = collections
+    _worker_data['gopca_kwargs'] = gopca_kwargs
+    _worker_data['gse_cache'] = {}
+
+
+def _run_job(job):
+    """Run a GO-PCA job (in a worker process)."""
+    gene_sets, gene_ontology = _worker_data['collections'][job['collection']]
+    params = GOPCAParams(job.get('params', {}))
+
+    m = job['matrix']
+    matrix = ExpMatrix(genes=m['genes'], samples=m['samples'],
+                       X=np.array(m['X'], dtype=np.float64))
+
+    kwargs = dict(_worker_data['gopca_kwargs'])
+    if 'num_components' in job:
+        kwargs['num_components'] = int(job['num_components'])
+
+    configs = [GOPCAConfig(params, gene_sets, gene_ontology)]
+    M = GOPCA(matrix, configs, gse_cache=_worker_data['gse_cache'], **kwargs)
+    run = M.run()
+    if run is None:
+        raise ValueError('GO-PCA run failed.')
+
+    # convert in the worker, so the run does not have to be pickled
+    return run.to_columnar()
+
+
+class _HTTPServer(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+
+class _RequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+
+    def log_message(self, format, *args):
+        logger.debug('%s - %s', self.address_string(), format % args)
+
+    def _send_json(self, code, data):
+        body = json.dumps(data).encode('UTF-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_job(self):
+        length = int(self.headers.get('Content-Length', 0))
+        try:
+            job = json.loads(self.rfile.read(length).decode('UTF-8'))
+        except ValueError:
+            self._send_json(400, {'error': 'Invalid JSON.'})
+            return None
+        error = self.server.gopca_server.check_job(job)
+        if error is not None:
+            self._send_json(400, {'error': error})
+            return None
+        return job
+
+    def do_GET(self):
+        server = self.server.gopca_server
+        if self.path == '/collections':
+            self._send_json(200, sorted(server.collections.keys()))
+        elif self.path.startswith('/jobs/'):
+            job_id = self.path[len('/jobs/'):]
+            try:
+                status = server.get_job_status(job_id)
+            except KeyError:
+                self._send_json(404, {'error': 'Unknown job.'})
+            else:
+                self._send_json(200, status)
+        else:
+            self._send_json(404, {'error': 'Not found.'})
+
+    def do_POST(self):
+        server = self.server.gopca_server
+        if self.path not in ['/jobs', '/run']:
+            self._send_json(404, {'error': 'Not found.'})
+            return
+
+        job = self._read_job()
+        if job is None:
+            return
+
+        if self.path == '/jobs':
+            job_id = server.submit(job)
+            self._send_json(202, {'id': job_id})
+        else:
+            status = server.run(job)
+            code = 200 if status['status'] == 'done' else 500
+            self._send_json(code, status)
+
+
+class GOPCAServer(object):
+    """A resident GO-PCA server with a local HTTP API.
+
+    Parameters
+    ----------
+    collections : dict
+        The gene set collections. Each key is the name of a collection, and
+        the value is a `genometools.basic.GeneSetCollection`, or a tuple
+        containing the gene set collection and a
+        `genometools.ontology.GeneOntology` (or ``None``).
+    host : str, optional
+        The host address to listen on. ["127.0.0.1"]
+    port : int, optional
+        The port to listen on (0 = choose an arbitrary free port). [0]
+    num_workers : int, optional
+        The number of worker processes. If ``None``, the number of CPUs is
+        used. [None]
+    max_jobs : int, optional
+        The maximum number of jobs kept by the server. If it is exceeded,
+        the oldest finished jobs whose results were never retrieved are
+        dropped. [100]
+    kwargs : dict
+        Additional keyword arguments for `GOPCA`.
+
+    Example
+    -------
+    ::
+
+        server = GOPCAServer({'GO': (gene_sets, gene_ontology)}, port=8000)
+        server.serve_forever()
+    """
+    def __init__(self, collections, host='127.0.0.1', port=0,
+                 num_workers=None, max_jobs=100, **kwargs):
+
+        assert isinstance(collections, dict)
+        assert isinstance(max_jobs, int) and max_jobs >= 1
+
+        self.collections = {}
+        for name, coll in collections.items():
+            if isinstance(coll, GeneSetCollection):
+                coll = (coll, None)
+            gene_sets, gene_ontology = coll
+            assert isinstance(gene_sets, GeneSetCollection)
+            if gene_ontology is not None:
+                assert isinstance(gene_ontology, GeneOntology)
+            self.collections[name] = (gene_sets, gene_ontology)
+
+        if num_workers is None:
+            num_workers = multiprocessing.cpu_count()
+
+        # the worker processes are created before the HTTP server threads
+        self._pool = multiprocessing.Pool(
+            num_workers, initializer=_init_worker,
+            initargs=(self.collections, kwargs))
+        self.max_jobs = max_jobs
+        self._jobs = OrderedDict()  # in the order of submission
+        self._lock = threading.Lock()
+
+        self._httpd = _HTTPServer((host, port), _RequestHandler)
+        self._httpd.gopca_server = self
+
+    def __repr__(self):
+        return '<%s object (address=%s:%d, %d collections)>' \
+               % ((self.__class__.__name__,) + self.address +
+                  (len(self.collections),))
+
+    @property
+    def address(self):
+        """The (host, port) tuple the server is listening on."""
+        return self._httpd.server_address[:2]
+
+    def check_job(self, job):
+        """Check if a job is valid.
+
+        Returns
+        -------
+        str or None
+            An error message, or ``None`` if the job is valid.
+        """
+        if not isinstance(job, dict):
+            return 'The job must be a JSON object.'
+        if job.get('collection') not in self.collections:
+            return 'Unknown gene set collection.'
+        m = job.get('matrix')
+        if not isinstance(m, dict) or \
+                any(k not in m for k in ['genes', 'samples', 'X']):
+            return 'The matrix must contain "genes", "samples", and "X".'
+        try:
+            GOPCAParams(job.get('params', {}))
+        except (AttributeError, AssertionError) as err:
+            return 'Invalid parameters: %s' % str(err)
+        return None
+
+    def submit(self, job):
+        """Submit a job to the worker pool.
+
+        Returns
+        -------
+        str
+            The job ID.
+        """
+        job_id = uuid.uuid4().hex
+        result = self._pool.apply_async(_run_job, (job,))
+        with self._lock:
+            self._jobs[job_id] = result
+            self._drop_jobs()
+        logger.info('Submitted job %s.', job_id)
+        return job_id
+
+    def run(self, job):
+        """Run a job in the worker pool and wait for it to finish.
+
+        The job is not registered with the server, so it cannot be dropped
+        (see `max_jobs`) while it is running.
+
+        Returns
+        -------
+        dict
+            The status of the job (see `get_job_status`).
+        """
+        job_id = uuid.uuid4().hex
+        result = self._pool.apply_async(_run_job, (job,))
+        logger.info('Running job %s.', job_id)
+        result.wait()
+        return self._get_status(job_id, result)
+
+    def _drop_jobs(self):
+        """Drop the oldest finished jobs if there are too many jobs.
+
+        Must be called with the lock held.
+        """
+        excess = len(self._jobs) - self.max_jobs
+        if excess <= 0:
+            return
+        finished = [job_id for job_id, result in self._jobs.items()
+                    if result.ready()]
+        for job_id in finished[:excess]:
+            del self._jobs[job_id]
+            logger.warning('Dropped job %s (result was never retrieved).',
+                           job_id)
+
+    def wait(self, job_id, timeout=None):
+        """Wait for a job to finish."""
+        with self._lock:
+            result = self._jobs[job_id]
+        result.wait(timeout)
+
+    def get_job_status(self, job_id):
+        """Returns the status of a job (and its result, if it is done).
+
+        Once the job has finished, it is removed from the server.
+
+        Raises
+        ------
+        KeyError
+            If the job ID is unknown.
+        """
+        with self._lock:
+            result = self._jobs[job_id]
+            if not result.ready():
+                return {'id': job_id, 'status': 'running'}
+            del self._jobs[job_id]
+        return self._get_status(job_id, result)
+
+    @staticmethod
+    def _get_status(job_id, result):
+        """Returns the status of a finished job."""
+        try:
+            data = result.get()
+        except Exception as err:
+            return {'id': job_id, 'status': 'failed',
+                    'error': '%s: %s' % (err.__class__.__name__, str(err))}
+        return {'id': job_id, 'status': 'done', 'result': data}
+
+    def serve_forever(self):
+        """Handle requests until `shutdown` is called."""
+        logger.info('GO-PCA server listening on %s:%d.', *self.address)
+        self._httpd.serve_forever()
+
+    def start(self):
+        """Handle requests in a background thread."""
+        thread = threading.Thread(target=self.serve_forever)
+        thread.daemon = True
+        thread.start()
+
+    def shutdown(self):
+        """Stop the server and the worker processes."""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        self._pool.terminate()
+        self._pool.join()
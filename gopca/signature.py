@@ -33,8 +33,6 @@ import pandas as pd
 import numpy as np
 
 from genometools.expression import ExpMatrix, ExpProfile
-from genometools.expression.visualize import ExpHeatmap
-from genometools.expression import cluster
 from genometools.enrichment import RankBasedGSEResult
 
 logger = logging.getLogger(__name__)
@@ -255,14 +253,33 @@ class GOPCASignature(object):
         `genometools.expression.ExpProfile`
             The expression signature.
         """
-        matrix = self.matrix.copy()
+        x = self._get_expression_values(standardize=standardize, center=center,
+                                        use_median=use_median)
+
+        return ExpProfile(label=self, genes=self.samples.copy(), x=x)
+
+    def _get_expression_values(self, out=None, standardize=False, center=True,
+                               use_median=True):
+        """Calculate the signature expression vector using plain arrays.
+
+        This is the array-level equivalent of :meth:`get_expression`. If
+        ``out`` is given, the result is written into it (e.g., into a row of a
+        preallocated signature matrix), avoiding the construction of
+        intermediate `ExpMatrix` and `ExpProfile` objects.
+        """
+        X = self.X
         if standardize:
-            matrix.standardize_genes(inplace=True)
+            # same as `ExpMatrix.standardize_genes()`
+            X = X - np.mean(X, axis=1)[:, np.newaxis]
+            X /= np.std(X, axis=1, ddof=1)[:, np.newaxis]
         elif center:
-            matrix.center_genes(use_median=use_median, inplace=True)
-        x = matrix.mean(axis=0).values
+            # same as `ExpMatrix.center_genes()`
+            if use_median:
+                X = X - np.median(X, axis=1)[:, np.newaxis]
+            else:
+                X = X - np.mean(X, axis=1)[:, np.newaxis]
 
-        return ExpProfile(label=self, genes=self.samples.copy(), x=x)
+        return np.mean(X, axis=0, out=out)
 
     def get_ordered_dict(self):
         elements = OrderedDict([
@@ -341,6 +358,9 @@ class GOPCASignature(object):
         assert isinstance(sample_cluster_metric, (str, _oldstr))
         assert isinstance(cluster_method, (str, _oldstr))
 
+        # these modules are slow to import, so we import them only when needed
+        from genometools.expression import cluster
+        from genometools.expression.visualize import ExpHeatmap
         from . import GOPCASignatureMatrix
         if sig_matrix is not None:
             assert isinstance(sig_matrix, GOPCASignatureMatrix)
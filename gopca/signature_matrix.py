@@ -28,13 +28,10 @@ import copy
 from collections import Iterable
 
 import six
-import pandas as pd
 import numpy as np
 from scipy.stats import pearsonr
 
 from genometools.expression import ExpProfile, ExpMatrix
-from genometools.expression import cluster
-from genometools.expression.visualize import ExpHeatmap, HeatmapGeneAnnotation
 
 # from .config import GOPCAParams
 from . import GOPCASignature
@@ -89,13 +86,25 @@ class GOPCASignatureMatrix(ExpMatrix):
         assert isinstance(cluster_signatures, bool)
         assert isinstance(cluster_samples, bool)
 
+        signatures = list(signatures)
+        if not signatures:
+            raise ValueError('Cannot generate a signature matrix without '
+                             'any signatures.')
+
         ### generate the expression matrix
-        matrix = ExpMatrix(pd.concat(
-            [sig.get_expression(standardize=standardize, center=center,
-                                use_median=use_median)
-             for sig in signatures],
-            axis=1
-        ).T)
+        # (we fill a preallocated array row by row, instead of concatenating
+        #  one `ExpProfile` per signature)
+        samples = signatures[0].samples
+        q, n = len(signatures), len(samples)
+        S = np.empty((q, n), dtype=signatures[0].X.dtype)
+        for i, sig in enumerate(signatures):
+            if not sig.samples.equals(samples):
+                raise ValueError('All signatures must have the same samples.')
+            sig._get_expression_values(
+                out=S[i], standardize=standardize, center=center,
+                use_median=use_median)
+
+        matrix = ExpMatrix(genes=signatures, samples=samples.copy(), X=S)
         matrix.genes.name = 'Signatures'
         matrix.samples.name = 'Samples'
 
@@ -104,6 +113,10 @@ class GOPCASignatureMatrix(ExpMatrix):
             cluster_samples = False
 
         ### clustering
+        if cluster_signatures or cluster_samples:
+            # scipy.cluster is slow to import, so we import it only when needed
+            from genometools.expression import cluster
+
         if cluster_signatures:
             # cluster signatures
             matrix = cluster.cluster_genes(
@@ -290,6 +303,9 @@ class GOPCASignatureMatrix(ExpMatrix):
                     colorbar_label=('Signature expression<br>'
                                     '(log<sub>2</sub>-scale)')):
         """Generate an `ExpHeatMap` instance."""
+        # plotly is slow to import, so we import it only when needed
+        from genometools.expression.visualize import ExpHeatmap, \
+                                                     HeatmapGeneAnnotation
 
         if matrix_kw is None:
             matrix_kw = {}
@@ -0,0 +1,313 @@
+# Copyright (c) 2016 Florian Wagner
+#
+# This file is part of GO-PCA.
+#
+# GO-PCA is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, Version 3,
+# as published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Module containing the `GOPCASweep` class.
+
+"""
+
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+from builtins import *
+
+import time
+import datetime
+import logging
+import itertools
+from collections import Iterable, OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from genometools.basic import GeneSetCollection
+from genometools.expression import ExpGenome
+from genometools.ontology import GeneOntology
+
+import gopca
+from . import GOPCAParams, GOPCAConfig, GOPCASignatureMatrix, GOPCARun
+from .go_pca import GOPCA
+from .instrumentation import GOPCAProfile
+
+logger = logging.getLogger(__name__)
+
+
+class GOPCASweep(GOPCA):
+    """A sweep of GO-PCA runs over a grid of parameter settings.
+
+    Running GO-PCA repeatedly on the same expression matrix and the same gene
+    sets, while only varying parameter settings, repeats a lot of work. This
+    class performs PCA only once, and caches the gene set enrichment results
+    for each principal component (PC), ranking direction, set of XL-mHG
+    parameters (``X``, ``L``, and the E-score p-value threshold) and maximum
+    gene set size. Results for stricter p-value thresholds are then obtained
+    by filtering the cached results, instead of testing the gene sets again.
+    Similarly, signatures are only generated once for settings that only
+    differ in thresholds applied before signature generation (e.g.,
+    ``escore_thresh``). The gene sets are restricted to the genes in the
+    expression matrix once for each setting of ``mHG_X_min`` and
+    ``gene_set_max_size`` (see `GOPCA._restrict_gene_sets`).
+
+    Parameters
+    ----------
+    matrix : `genometools.expression.ExpMatrix`
+        The expression matrix.
+    param_grid : Iterable of `GOPCAParams`
+        The parameter settings to use (one `GOPCARun` is generated for
+        each). See also :meth:`get_param_grid`.
+    gene_sets : `genometools.basic.GeneSetCollection`
+        The gene sets to use.
+    gene_ontology : `genometools.ontology.GeneOntology`, optional
+        The Gene Ontology (only used if the gene sets are based on GO
+        annotations). [None]
+    kwargs : dict
+        Additional keyword arguments for `GOPCA` (e.g., ``num_components``).
+    """
+    def __init__(self, matrix, param_grid, gene_sets, gene_ontology=None,
+                 **kwargs):
+
+        assert isinstance(param_grid, Iterable)
+        assert isinstance(gene_sets, GeneSetCollection)
+        if gene_ontology is not None:
+            assert isinstance(gene_ontology, GeneOntology)
+
+        configs = []
+        for params in param_grid:
+            assert isinstance(params, GOPCAParams)
+            configs.append(GOPCAConfig(params, gene_sets, gene_ontology))
+
+        super(GOPCASweep, self).__init__(matrix, configs, **kwargs)
+
+        self.gene_sets = gene_sets
+        self.gene_ontology = gene_ontology
+
+    @staticmethod
+    def get_param_grid(grid, params=None):
+        """Generate all combinations of the specified parameter values.
+
+        Parameters
+        ----------
+        grid : dict (str => list)
+            The values to use for each parameter.
+        params : `GOPCAParams`, optional
+            The settings to use for all parameters not included in ``grid``.
+            If ``None``, the default settings are used. [None]
+
+        Returns
+        -------
+        list of `GOPCAParams`
+            The parameter settings for each grid point.
+        """
+        assert isinstance(grid, dict)
+        if params is None:
+            params = GOPCAParams()
+        assert isinstance(params, GOPCAParams)
+
+        names = sorted(grid.keys())
+        param_grid = []
+        for values in itertools.product(*[grid[n] for n in names]):
+            point_params = GOPCAParams(params.params)
+            point_params.set_params(dict(zip(names, values)))
+            param_grid.append(point_params)
+        return param_grid
+
+    @staticmethod
+    def _get_enrichment_key(params):
+        """Returns the key under which enrichment results are cached.
+
+        The E-score p-value threshold effectively used is never lower than
+        the p-value threshold (see
+        `genometools.enrichment.GeneSetEnrichmentAnalysis`).
+        """
+        escore_pval_thresh = max(params.escore_pval_thresh,
+                                 params.pval_thresh)
+        return (params.mHG_X_frac, params.mHG_X_min, params.mHG_L,
+                escore_pval_thresh, params.gene_set_max_size)
+
+    @staticmethod
+    def _get_setup_key(params):
+        """Returns the key under which enrichment setups are cached.
+
+        The gene sets tested only depend on the parameters used to restrict
+        them (see `GOPCA._restrict_gene_sets`).
+        """
+        return (params.mHG_X_min, params.gene_set_max_size)
+
+    def run_sweep(self):
+        """Perform GO-PCA for all parameter settings.
+
+        The results are the same as those of `GOPCA.run` for each setting,
+        but the work shared between settings is only done once.
+
+        Parameters
+        ----------
+
+        Returns
+        -------
+        list of (`GOPCARun` or None)
+            The GO-PCA run for each parameter setting, or ``None`` if no
+            signatures were generated for a specific setting.
+        `pandas.DataFrame`
+            A summary table with the parameter settings, the number of
+            signatures generated and the execution time for each setting.
+            Returns ``None`` instead of the two objects if the sweep failed.
+        """
+        t0 = time.time()  # remember the start time
+        timestamp = str(datetime.datetime.utcnow())  # timestamp for the sweep
+
+        if not self.configs:
+            logger.error('No parameter settings specified. '
+                         'Aborting GO-PCA sweep.')
+            return None
+
+        if not self._finalize_configs():
+            logger.error('Invalid configuration settings. '
+                         'Aborting GO-PCA sweep.')
+            return None
+
+        p, n = self.matrix.shape
+        logger.info('Timestamp: %s', timestamp)
+        logger.info('Size of expression matrix: ' +
+                    'p=%d genes x n=%d samples.', p, n)
+        logger.info('Number of parameter settings: %d', len(self.configs))
+        expression_hash = self.matrix.hash
+        logger.info('Expression matrix hash: %s', expression_hash)
+
+        # determine the number of PCs and perform PCA (only once)
+        num_components = self._get_num_components()
+        if num_components == 0:
+            return None
+        W, Y, frac = self._perform_pca(num_components)
+
+        # test the gene sets only once, using the least stringent p-value
+        # threshold of all settings that share the same XL-mHG parameters
+        pval_thresh = {}
+        for config in self.configs:
+            key = self._get_enrichment_key(config.params)
+            pval_thresh[key] = max(pval_thresh.get(key, 0),
+                                   config.params.pval_thresh)
+
+        genome = ExpGenome.from_gene_names(self.matrix.genes.tolist())
+
+        setups = {}  # restricted gene sets and enrichment analysis
+        ranked_genes = {}
+        enrichment_cache = {}
+        signature_caches = {}  # one for each set of enrichment results
+        setup_time = time.time() - t0
+
+        runs = []
+        rows = []
+        for k, config in enumerate(self.configs):
+            t1 = time.time()
+            params = config.params
+            profile = GOPCAProfile()
+            profile.start_config(k)
+            logger.info('Generating GO-PCA signatures for parameter setting '
+                        '%d / %d...', k+1, len(self.configs))
+
+            setup_key = self._get_setup_key(params)
+            if setup_key not in setups:
+                with profile.phase('enrichment_setup'):
+                    setups[setup_key] = self._get_enrichment_setup(
+                        genome, config, self.matrix.genes)
+            gse_analysis, gene_set_groups = setups[setup_key]
+            self._count_gene_set_groups(profile, config.gene_sets,
+                                        gene_set_groups)
+
+            key = self._get_enrichment_key(params)
+            num_tests = 0
+            all_signatures = []
+            for d in range(num_components):
+                signatures = []
+                for pc in [d+1, -(d+1)]:
+                    try:
+                        genes = ranked_genes[pc]
+                    except KeyError:
+                        genes = self._get_ranked_genes(self.matrix, W, pc)
+                        ranked_genes[pc] = genes
+
+                    try:
+                        enriched = enrichment_cache[(pc,) + key]
+                    except KeyError:
+                        test_params = GOPCAParams(params.params)
+                        test_params.set_param('pval_thresh',
+                                              pval_thresh[key])
+                        test_params.set_param('escore_pval_thresh', key[3])
+                        with profile.phase('enrichment'):
+                            enriched = self._get_enriched_gene_sets(
+                                test_params, gse_analysis, genes)
+                            enriched = self._get_original_results(
+                                enriched, gene_set_groups)
+                        enrichment_cache[(pc,) + key] = enriched
+                        num_tests += 1
+
+                    # derive the results for this p-value threshold
+                    enriched = [enr for enr in enriched
+                                if enr.pval <= params.pval_thresh]
+                    signatures.extend(self._generate_pc_signatures(
+                        self.matrix, params, gse_analysis, W, pc,
+                        verbose=self.verbose, enriched=enriched,
+                        signature_cache=signature_caches.setdefault(key, {}),
+                        gene_set_groups=gene_set_groups, profile=profile))
+
+                # apply global filter (if enabled)
+                if not params.no_global_filter:
+                    before = len(signatures)
+                    with profile.phase('global_filter'):
+                        signatures = self._global_filter(
+                            params, signatures, all_signatures,
+                            self.gene_ontology)
+                    profile.count('dropped_global_filter',
+                                  before - len(signatures))
+                all_signatures.extend(signatures)
+                profile.count('signatures', len(signatures))
+
+            exec_time = time.time() - t1
+            profile.end_config()
+            profile.finish()
+            logger.info('Parameter setting %d generated %d signatures '
+                        '(%.2f s).', k+1, len(all_signatures), exec_time)
+
+            gopca_run = None
+            if all_signatures:
+                sig_matrix = GOPCASignatureMatrix.from_signatures(
+                    all_signatures)
+                gopca_run = GOPCARun(sig_matrix,
+                                     gopca.__version__, timestamp,
+                                     setup_time + exec_time,
+                                     expression_hash, [config.hash],
+                                     self.matrix.genes, self.matrix.samples,
+                                     W, Y, profile=profile)
+            else:
+                logger.warning('No signatures were generated for parameter '
+                               'setting %d.', k+1)
+            runs.append(gopca_run)
+
+            row = OrderedDict(config.user_params.params)
+            row['num_signatures'] = len(all_signatures)
+            row['num_enrichment_tests'] = num_tests
+            row['exec_time'] = exec_time
+            rows.append(row)
+
+        summary = pd.DataFrame(rows, index=pd.Index(
+            np.arange(len(rows)), name='Setting'))
+
+        total_time = time.time() - t0
+        logger.info('Shared PCA and setup time: %.2f s', setup_time)
+        logger.info('Number of enrichment analyses performed: %d '
+                    '(instead of %d).', len(enrichment_cache),
+                    2 * num_components * len(self.configs))
+        logger.info('This GO-PCA sweep took %.2f s.', total_time)
+
+        return runs, summary
@@ -34,12 +34,9 @@ import six
 import unicodecsv as csv
 
 import numpy as np
-from scipy.spatial.distance import pdist, squareform
-from scipy.cluster.hierarchy import linkage, dendrogram
-import sklearn
 
 from genometools import misc
-from genometools.expression import ExpMatrix, cluster
+from genometools.expression import ExpMatrix
 import gopca
 from gopca import GOPCASignatureMatrix
 from gopca import GOPCASignature
@@ -84,6 +81,38 @@ def get_logger(name='', log_stream=sys.stdout, log_file=None,
     return new_logger
 
 
+def parse_version(version):
+    """Convert a version string into a tuple of integers.
+
+    Only the leading numeric components are used (e.g., "0.17.1rc1" is
+    converted to ``(0, 17, 1)``). This avoids importing `pkg_resources`,
+    which is slow.
+
+    Parameters
+    ----------
+    version : str
+        The version string.
+
+    Returns
+    -------
+    tuple of int
+        The version.
+    """
+    components = []
+    for c in version.split('.'):
+        digits = ''
+        for char in c:
+            if not char.isdigit():
+                break
+            digits += char
+        if not digits:
+            break
+        components.append(int(digits))
+        if len(digits) < len(c):
+            break
+    return tuple(components)
+
+
 
 
 def simpleaxis(ax):
@@ -128,15 +157,12 @@ def get_standardized_matrix(X):
 
 
 def get_signature_expression(genes, X, sig_genes, standardize=True):
-    p_sig = len(sig_genes)
-    p, n = X.shape
-    S = np.zeros((p_sig, n), dtype=np.float64)
-    for i, g in enumerate(sig_genes):
-        idx = genes.index(g)
-        S[i, :] = X[idx, :]
-        S[i, :] -= np.mean(S[i, :])
-        if standardize:
-            S[i, :] /= np.std(S[i, :], ddof=1)
+    gene_index = dict((g, i) for i, g in enumerate(genes))
+    indices = [gene_index[g] for g in sig_genes]
+    S = np.asarray(X[indices, :], dtype=np.float64)
+    S -= np.mean(S, axis=1)[:, np.newaxis]
+    if standardize:
+        S /= np.std(S, axis=1, ddof=1)[:, np.newaxis]
     sig = np.mean(S, axis=0)
     return sig
 
@@ -275,6 +301,9 @@ def read_go_annotations(fn):
 
 
 def cluster_rows(S, metric='correlation', method='average', reverse=False):
+    # scipy.cluster is slow to import, so we import it only when needed
+    from scipy.spatial.distance import pdist, squareform
+    from scipy.cluster.hierarchy import linkage, dendrogram
     distxy = squareform(pdist(S, metric=metric))
     R = dendrogram(linkage(distxy, method=method), no_plot=True)
     order_rows = np.int64([int(l) for l in R['ivl']])
@@ -27,6 +27,12 @@ here = path.abspath(path.dirname(__file__))
 description = ('GO-PCA: An Unsupervised Method to Explore Gene Expression '
                'Data Using Prior Knowledge')
 
+# get the version without importing the package
+version_info = {}
+with io.open(path.join(here, 'gopca', '_version.py'), encoding='UTF-8') as fh:
+    exec(fh.read(), version_info)
+version = version_info['__version__']
+
 # get long description from file
 with io.open(path.join(here, 'README.rst'), encoding='UTF-8') as fh:
     long_description = fh.read()
@@ -60,7 +66,7 @@ if 'READTHEDOCS' not in os.environ:
 setup(
     name='gopca',
 
-    version='0.2.0',
+    version=version,
 
     description=description,
     long_description=long_description,
@@ -91,7 +97,7 @@ setup(
 
     # packages=find_packages(exclude=['contrib', 'docs', 'tests*']),
     # packages= ['gopca', 'gopca.scripts', 'gopca.plotting'],
-    packages=find_packages(exclude=['docs', 'tests*']),
+    packages=find_packages(exclude=['docs', 'tests*', 'benchmarks']),
 
     # libraries = [],
 
@@ -143,6 +149,12 @@ setup(
                 'gopca.cli.combine_signatures:main',
             'gopca_print_info.py = '
                 'gopca.cli.print_info:main',
+            'gopca_sweep.py = '
+                'gopca.cli.sweep:main',
+            'gopca_batch.py = '
+                'gopca.cli.batch:main',
+            'gopca_server.py = '
+                'gopca.cli.server:main',
         ],
     },
 )
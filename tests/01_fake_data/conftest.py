@@ -23,6 +23,7 @@ from builtins import str as text
 # import os
 # import shutil
 
+import sys
 import pytest
 import logging
 
@@ -42,6 +43,11 @@ logging.basicConfig(level=logging.INFO)
 
 logger = logging.getLogger(__name__)
 
+# test_aio.py uses "async" syntax, which cannot be parsed by Python < 3.5
+collect_ignore = []
+if sys.version_info < (3, 5):
+    collect_ignore.append('test_aio.py')
+
 
 @pytest.fixture(scope='session')
 def my_params():
@@ -77,6 +83,29 @@ def my_matrix():
     return matrix
 
 
+@pytest.fixture(scope='session')
+def my_module_matrix():
+    # random expression matrix with a module of 20 co-expressed genes
+    np.random.seed(0)
+    p, n = 100, 20
+    genes = ['g%d' % i for i in range(p)]
+    samples = ['s%d' % i for i in range(n)]
+    X = np.random.randn(p, n)
+    X[:20] += 5 * np.sign(np.random.randn(n))
+    matrix = ExpMatrix(genes=genes, samples=samples, X=X)
+    return matrix
+
+
+@pytest.fixture(scope='session')
+def my_module_gene_sets(my_module_matrix):
+    genes = my_module_matrix.genes.tolist()
+    gene_sets = GeneSetCollection([
+        GeneSet('Module', 'Planted module', genes[:20]),
+        GeneSet('Random', 'Random genes', genes[50:70]),
+    ])
+    return gene_sets
+
+
 @pytest.fixture(scope='session')
 def my_v():
     v = np.uint8([1,1,1,0,0,0])
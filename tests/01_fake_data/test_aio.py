@@ -0,0 +1,71 @@
+# Copyright (c) 2016 Florian Wagner
+#
+# This file is part of GO-PCA.
+#
+# GO-PCA is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, Version 3,
+# as published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+from builtins import *
+
+import pytest
+
+from gopca import GOPCA, GOPCARun
+
+# (only collected on Python 3.5 or later, see conftest.py)
+
+
+@pytest.fixture
+def my_async_gopca(my_params, my_module_matrix, my_module_gene_sets):
+    return GOPCA.simple_setup(my_module_matrix, my_params,
+                              my_module_gene_sets, num_components=2)
+
+
+def test_run_async(my_async_gopca):
+    import asyncio
+
+    async def collect():
+        job = my_async_gopca.run_async()
+        items = []
+        async for item in job:
+            items.append(item)
+        run = await job
+        return items, run
+
+    loop = asyncio.new_event_loop()
+    try:
+        items, run = loop.run_until_complete(collect())
+    finally:
+        loop.close()
+
+    assert isinstance(run, GOPCARun)
+    kinds = [kind for kind, _ in items]
+    assert kinds[:2] == ['phase', 'phase']
+    assert kinds.count('progress') == 2
+    signatures = [data[1] for kind, data in items if kind == 'signature']
+    assert len(signatures) == len(run.config_signatures[0])
+
+
+def test_run_async_timeout(my_async_gopca):
+    import asyncio
+
+    job = my_async_gopca.run_async(timeout=0)
+    loop = asyncio.new_event_loop()
+    try:
+        with pytest.raises(asyncio.TimeoutError):
+            loop.run_until_complete(job._wait())
+        assert job.done
+        # the run cannot be continued
+        assert loop.run_until_complete(job._wait()) is None
+    finally:
+        loop.close()
@@ -0,0 +1,71 @@
+# Copyright (c) 2016 Florian Wagner
+#
+# This file is part of GO-PCA.
+#
+# GO-PCA is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, Version 3,
+# as published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+from builtins import *
+
+import io
+import os
+
+import pytest
+
+from gopca import GOPCARun
+from gopca.batch import read_manifest, run_batch
+
+
+def test_manifest(tmpdir):
+    path = str(tmpdir.join('manifest.txt'))
+    with io.open(path, 'w', encoding='UTF-8') as ofh:
+        ofh.write('# expression files\n')
+        ofh.write('data/first.tsv\n')
+        ofh.write('\n')
+        ofh.write('/tmp/second.tsv\tmy_dataset\n')
+
+    datasets = read_manifest(path)
+    assert datasets == [
+        ('first', os.path.join(str(tmpdir), 'data', 'first.tsv')),
+        ('my_dataset', '/tmp/second.tsv'),
+    ]
+
+    with io.open(path, 'a', encoding='UTF-8') as ofh:
+        ofh.write('other/first.tsv\n')
+    with pytest.raises(ValueError):
+        read_manifest(path)
+
+
+def test_run_batch(my_params, my_module_matrix, my_module_gene_sets, tmpdir):
+    first = str(tmpdir.join('first.tsv'))
+    second = str(tmpdir.join('second.tsv'))
+    my_module_matrix.write_tsv(first)
+    my_module_matrix.iloc[:, :15].write_tsv(second)
+    datasets = [('first', first), ('second', second),
+                ('missing', str(tmpdir.join('missing.tsv')))]
+    output_dir = str(tmpdir.join('output'))
+
+    summary = run_batch(datasets, my_params, my_module_gene_sets, output_dir,
+                        num_processes=2, num_components=2)
+    assert summary.index.tolist() == ['first', 'second', 'missing']
+    assert summary['status'].tolist() == ['success', 'success', 'failed']
+    assert summary.loc['second', 'n'] == 15
+    assert summary.loc['missing', 'error']
+
+    for name in ['first', 'second']:
+        run_file = os.path.join(output_dir, '%s.pickle' % name)
+        assert summary.loc[name, 'run_file'] == run_file
+        run = GOPCARun.read_pickle(run_file)
+        assert run.sig_matrix.q == summary.loc[name, 'num_signatures']
+    assert sorted(os.listdir(output_dir)) == ['first.pickle', 'second.pickle']
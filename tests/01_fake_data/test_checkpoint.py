@@ -0,0 +1,85 @@
+# Copyright (c) 2016 Florian Wagner
+#
+# This file is part of GO-PCA.
+#
+# GO-PCA is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, Version 3,
+# as published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+from builtins import *
+
+import os
+
+import pytest
+import numpy as np
+
+from gopca import GOPCA
+from gopca.checkpoint import GOPCACheckpoint
+
+
+def test_checkpoint(tmpdir):
+    checkpoint = GOPCACheckpoint(str(tmpdir), 'key')
+    assert checkpoint.load('pca') is None
+
+    W = np.arange(6, dtype=np.float64).reshape(3, 2)
+    checkpoint.save('pca', (2, W))
+    checkpoint.save('config_0', (1, ['sig']))
+    num_components, W2 = checkpoint.load('pca')
+    assert num_components == 2
+    assert np.all(W2 == W)
+    assert checkpoint.load('config_0') == (1, ['sig'])
+
+    # no temporary files are left behind
+    assert sorted(os.listdir(checkpoint.path)) == \
+        ['config_0.pickle', 'pca.pickle']
+
+    checkpoint.clear()
+    assert not os.path.exists(checkpoint.path)
+    assert checkpoint.load('pca') is None
+
+
+class _Interrupt(Exception):
+    pass
+
+
+def test_resume(my_params, my_module_matrix, my_module_gene_sets, tmpdir):
+    checkpoint_dir = str(tmpdir)
+    M = GOPCA.simple_setup(my_module_matrix, my_params, my_module_gene_sets,
+                           num_components=2)
+    ref = M.run()
+
+    # interrupt the run after the first PC
+    def interrupt(event, **kwargs):
+        raise _Interrupt()
+
+    M.add_hook('progress', interrupt)
+    with pytest.raises(_Interrupt):
+        M.run(checkpoint_dir=checkpoint_dir)
+    M.remove_hook('progress', interrupt)
+    assert os.listdir(checkpoint_dir)
+
+    # the resumed run only processes the second PC
+    pcs = []
+
+    def record(event, **kwargs):
+        pcs.append(kwargs['pc'])
+
+    M.add_hook('progress', record)
+    run = M.run(checkpoint_dir=checkpoint_dir)
+    assert pcs == [2]
+    assert np.allclose(run.W, ref.W)
+    assert [sig.hash for sig in run.sig_matrix.signatures] == \
+        [sig.hash for sig in ref.sig_matrix.signatures]
+
+    # the checkpoint is removed once the run has completed
+    assert not os.listdir(checkpoint_dir)
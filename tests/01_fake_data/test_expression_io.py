@@ -0,0 +1,170 @@
+# Copyright (c) 2016 Florian Wagner
+#
+# This file is part of GO-PCA.
+#
+# GO-PCA is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, Version 3,
+# as published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+from builtins import str as text
+
+import os
+import io
+
+import pytest
+import numpy as np
+
+from genometools.expression import ExpMatrix
+from genometools.expression.filter import filter_variance
+
+from gopca.expression_io import read_expression_tsv, \
+                               read_expression_cached, \
+                               get_expression_cache_dir, \
+                               write_expression_npy, \
+                               write_cache
+
+
+def test_read(my_matrix, tmpdir):
+    path = text(tmpdir.join('expression.tsv'))
+    my_matrix.write_tsv(path)
+    for chunk_size in [1, 4, 5000]:
+        matrix = read_expression_tsv(path, chunk_size=chunk_size)
+        assert isinstance(matrix, ExpMatrix)
+        assert matrix.genes.tolist() == my_matrix.genes.tolist()
+        assert matrix.samples.tolist() == my_matrix.samples.tolist()
+        assert np.allclose(matrix.X, my_matrix.X)
+
+
+def test_variance_filter(tmpdir):
+    np.random.seed(0)
+    genes = ['g%d' % i for i in range(50)]
+    samples = ['s%d' % i for i in range(8)]
+    X = np.random.randn(50, 8) * np.random.rand(50, 1)
+    ref = ExpMatrix(genes=genes, samples=samples, X=X)
+    path = text(tmpdir.join('expression.tsv'))
+    ref.write_tsv(path)
+
+    matrix = read_expression_tsv(path, sel_var_genes=10, chunk_size=7)
+    expected = filter_variance(read_expression_tsv(path), 10)
+    assert matrix.genes.tolist() == expected.genes.tolist()
+    assert np.allclose(matrix.X, expected.X)
+
+
+def test_variance_filter_missing(tmpdir):
+    path = text(tmpdir.join('expression.tsv'))
+    with io.open(path, 'w', encoding='UTF-8') as ofh:
+        ofh.write('Genes\ts1\ts2\ts3\n')
+        ofh.write('na\tNA\tNA\tNA\n')
+        ofh.write('g1\t1.0\t2.0\t3.0\n')
+        ofh.write('g2\t0.0\tNA\t10.0\n')
+        ofh.write('g3\t1.0\t1.1\t1.2\n')
+
+    # the row without a defined variance does not block the filter
+    matrix = read_expression_tsv(path, sel_var_genes=2, chunk_size=1)
+    assert matrix.genes.tolist() == ['g1', 'g2']
+
+
+def test_invalid_row(tmpdir):
+    path = text(tmpdir.join('expression.tsv'))
+    with io.open(path, 'w', encoding='UTF-8') as ofh:
+        ofh.write('Genes\ts1\ts2\n')
+        ofh.write('g1\t1.0\t2.0\n')
+        ofh.write('g2\n')
+
+    with pytest.raises(ValueError) as excinfo:
+        read_expression_tsv(path)
+    assert 'line 3' in str(excinfo.value)
+
+
+def test_invalid_value(tmpdir):
+    path = text(tmpdir.join('expression.tsv'))
+    with io.open(path, 'w', encoding='UTF-8') as ofh:
+        ofh.write('Genes\ts1\ts2\n')
+        ofh.write('g1\t1.0\tNA\n')
+        ofh.write('g2\t2.0\tabc\n')
+
+    with pytest.raises(ValueError) as excinfo:
+        read_expression_tsv(path)
+    assert 'line 3, column 3' in str(excinfo.value)
+
+
+def test_cache(my_matrix, tmpdir):
+    path = text(tmpdir.join('expression.tsv'))
+    my_matrix.write_tsv(path)
+    cache_dir = text(tmpdir.mkdir('cache'))
+
+    matrix = read_expression_cached(path, cache_dir=cache_dir)
+    cache_path = get_expression_cache_dir(path, cache_dir=cache_dir)
+    assert os.path.isfile(os.path.join(cache_path, 'X.npy'))
+
+    # second read uses the cache
+    cached = read_expression_cached(path, cache_dir=cache_dir)
+    assert cached.genes.tolist() == matrix.genes.tolist()
+    assert cached.samples.tolist() == matrix.samples.tolist()
+    assert np.allclose(cached.X, matrix.X)
+
+    # modified file invalidates the cache
+    other = my_matrix.iloc[:-1]
+    other.write_tsv(path)
+    matrix = read_expression_cached(path, cache_dir=cache_dir)
+    assert matrix.p == other.p
+
+
+def test_out_of_core(my_matrix, tmpdir):
+    path = text(tmpdir.join('expression.tsv'))
+    my_matrix.write_tsv(path)
+
+    out_dir = text(tmpdir.mkdir('npy'))
+    write_expression_npy(path, out_dir, chunk_size=4)
+    X = np.load(os.path.join(out_dir, 'X.npy'))
+    assert np.allclose(X, my_matrix.X)
+
+    cache_dir = text(tmpdir.mkdir('cache'))
+    matrix = read_expression_cached(path, cache_dir=cache_dir,
+                                    out_of_core=True, chunk_size=4)
+    assert matrix.genes.tolist() == my_matrix.genes.tolist()
+    assert matrix.samples.tolist() == my_matrix.samples.tolist()
+    assert np.allclose(matrix.X, my_matrix.X)
+
+
+def test_out_of_core_dtype(my_matrix, tmpdir):
+    path = text(tmpdir.join('expression.tsv'))
+    my_matrix.write_tsv(path)
+    cache_dir = text(tmpdir.mkdir('cache'))
+
+    matrix = read_expression_cached(path, cache_dir=cache_dir,
+                                    out_of_core=True)
+    assert isinstance(matrix.X, np.memmap)
+    assert matrix.X.dtype == np.float64
+
+    # the float64 cache is not used for float32
+    matrix = read_expression_cached(path, cache_dir=cache_dir,
+                                    dtype=np.float32, out_of_core=True)
+    assert isinstance(matrix.X, np.memmap)
+    assert matrix.X.dtype == np.float32
+    assert np.allclose(matrix.X, my_matrix.X)
+    assert get_expression_cache_dir(path, cache_dir=cache_dir) != \
+        get_expression_cache_dir(path, cache_dir=cache_dir, dtype=np.float32)
+
+
+def test_write_cache_error(my_matrix, tmpdir):
+    path = text(tmpdir.join('expression.tsv'))
+    my_matrix.write_tsv(path)
+    cache_path = text(tmpdir.join('cache'))
+
+    def write_func(tmp_path):
+        raise RuntimeError('Failed to write cache.')
+
+    # errors are logged, but not raised
+    assert not write_cache(cache_path, path, write_func)
+    assert not os.path.exists(cache_path)
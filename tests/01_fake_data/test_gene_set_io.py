@@ -0,0 +1,84 @@
+# Copyright (c) 2016 Florian Wagner
+#
+# This file is part of GO-PCA.
+#
+# GO-PCA is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, Version 3,
+# as published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+from builtins import open
+from builtins import str as text
+
+from genometools.ontology import GeneOntology
+
+from gopca.gene_set_io import read_gene_sets_cached, read_ontology_cached
+
+_OBO = """format-version: 1.2
+
+[Term]
+id: GO:0000001
+name: root term
+namespace: biological_process
+def: "The root." []
+
+[Term]
+id: GO:0000002
+name: child term
+namespace: biological_process
+def: "A child." []
+synonym: "first child" EXACT []
+is_a: GO:0000001 ! root term
+
+[Term]
+id: GO:0000003
+name: grandchild term
+namespace: biological_process
+alt_id: GO:0000004
+def: "A grandchild." []
+is_a: GO:0000002 ! child term
+
+[Term]
+id: GO:0000005
+name: term without definition
+namespace: biological_process
+is_a: GO:0000001 ! root term
+
+"""
+
+
+def test_gene_sets(my_gene_sets, tmpdir):
+    path = text(tmpdir.join('gene_sets.tsv'))
+    my_gene_sets.write_tsv(path)
+    cache_dir = text(tmpdir.mkdir('cache'))
+    for _ in range(2):
+        # the second iteration reads the cache
+        gene_sets = read_gene_sets_cached(path, cache_dir=cache_dir)
+        assert gene_sets.hash == my_gene_sets.hash
+
+
+def test_ontology(tmpdir):
+    path = text(tmpdir.join('ontology.obo'))
+    with open(path, 'w') as ofh:
+        ofh.write(_OBO)
+    cache_dir = text(tmpdir.mkdir('cache'))
+    ref = GeneOntology.read_obo(path)
+    for _ in range(2):
+        ontology = read_ontology_cached(path, cache_dir=cache_dir)
+        assert ontology.hash == ref.hash
+        for term in ref:
+            other = ontology[term.id]
+            assert other.domain == term.domain
+            assert other.definition == term.definition
+            assert other.ancestors == term.ancestors
+            assert other.descendants == term.descendants
+            assert other.children == term.children
@@ -22,11 +22,13 @@ from builtins import int
 
 from copy import deepcopy
 
-# import pytest
+import pytest
+import numpy as np
 
-# from genometools.basic import GeneSetCollection
+from genometools.basic import GeneSet, GeneSetCollection
 from genometools.expression import ExpMatrix
-from gopca import GOPCAConfig, GOPCA
+from gopca import GOPCAParams, GOPCAConfig, GOPCA, GOPCASignature
+from gopca.go_pca import FLOAT32_LOADING_TOL
 
 
 def test_basic(my_gopca):
@@ -60,4 +62,189 @@ def test_simple_setup(my_gopca):
     config = my_gopca.configs[0]
     other = GOPCA.simple_setup(my_gopca.matrix,
                                config.user_params, config.gene_sets,
-                               config.gene_ontology)
\ No newline at end of file
+                               config.gene_ontology)
+
+
+def test_hooks(my_gopca):
+    M = deepcopy(my_gopca)
+    events = []
+
+    def func(event, **kwargs):
+        events.append(event)
+
+    M.add_hook('pca_start', func)
+    M._emit('pca_start')
+    assert events == ['pca_start']
+
+    M.remove_hook('pca_start', func)
+    assert not M._hooks
+    with pytest.raises(ValueError):
+        M.remove_hook('pca_start', func)
+    with pytest.raises(ValueError):
+        M.add_hook('no_such_event', func)
+
+
+def test_float32(my_config):
+    np.random.seed(0)
+    X = np.random.randn(50, 12)
+    genes = ['g%d' % i for i in range(50)]
+    samples = ['s%d' % i for i in range(12)]
+    matrix = ExpMatrix(genes=genes, samples=samples, X=X)
+
+    M64 = GOPCA(matrix, [my_config])
+    M32 = GOPCA(matrix, [my_config], dtype=np.float32)
+    assert M64.dtype == np.float64
+    assert M32.dtype == np.float32
+    assert M32.matrix.X.dtype == np.float32
+
+    W64, Y64, _ = M64._perform_pca(3)
+    W32, Y32, _ = M32._perform_pca(3)
+    assert W32.dtype == np.float32
+    assert Y32.dtype == np.float32
+
+    # loadings must agree up to the sign of each PC
+    signs = np.sign(np.sum(W64 * W32, axis=0))
+    assert np.all(np.abs(W64 - signs * W32) <= FLOAT32_LOADING_TOL)
+
+    with pytest.raises(AssertionError):
+        GOPCA(matrix, [my_config], dtype=np.int64)
+
+
+def test_pc_null_analytic(my_config):
+    thresh = GOPCA.get_pc_explained_variance_threshold_analytic(
+        1000, 50, 2.0)
+    assert 0 < thresh < 1
+    # the threshold must be above the average explained variance
+    assert thresh > 1 / 49
+
+    # plant one strong component in random noise
+    np.random.seed(0)
+    p, n = 500, 30
+    X = np.random.randn(p, n)
+    X[:50] += 5 * np.sign(np.random.randn(n))
+    genes = ['g%d' % i for i in range(p)]
+    samples = ['s%d' % i for i in range(n)]
+    matrix = ExpMatrix(genes=genes, samples=samples, X=X)
+
+    M = GOPCA(matrix, [my_config], pc_null_method='analytic')
+    assert M.estimate_num_components() == 1
+
+    with pytest.raises(AssertionError):
+        GOPCA(matrix, [my_config], pc_null_method='unknown')
+
+
+def test_update(my_params, my_module_matrix, my_module_gene_sets):
+    matrix = my_module_matrix
+    M = GOPCA.simple_setup(matrix.iloc[:, :15], my_params,
+                           my_module_gene_sets, num_components=2)
+    run = M.run()
+    assert run.gene_means.shape == (matrix.p, )
+    assert len(run.config_signatures) == 1
+
+    new_run, unchanged = M.update(run, matrix.iloc[:, 15:18])
+    assert new_run.samples == matrix.samples.tolist()[:18]
+    assert new_run.W.shape == run.W.shape
+    assert new_run.Y.shape == (18, 2)
+    assert np.allclose(new_run.gene_means,
+                       np.mean(matrix.X[:, :18], axis=1))
+    # the planted module is found again
+    assert 'Module' in [sig.gene_set.id for sig in unchanged]
+
+    with pytest.raises(ValueError):
+        # the samples are already part of the matrix
+        M.update(run, matrix.iloc[:, :5])
+
+    # update the stored run again, using a new instance
+    M = GOPCA.simple_setup(matrix.iloc[:, :18], my_params,
+                           my_module_gene_sets, num_components=2)
+    new_run, unchanged = M.update(new_run, matrix.iloc[:, 18:])
+    assert new_run.samples == matrix.samples.tolist()
+    assert new_run.Y.shape == (matrix.n, 2)
+    assert np.allclose(new_run.gene_means, np.mean(matrix.X, axis=1))
+    assert 'Module' in [sig.gene_set.id for sig in unchanged]
+
+
+def test_iter_signatures(my_params, my_module_matrix, my_module_gene_sets):
+    M = GOPCA.simple_setup(my_module_matrix, my_params, my_module_gene_sets,
+                           num_components=2)
+
+    stream = M.iter_signatures()
+    assert iter(stream) is stream
+    items = list(stream)
+    for k, sig in items:
+        assert k == 0
+        assert isinstance(sig, GOPCASignature)
+
+    # `run` collects the same signatures
+    run = M.run()
+    assert [sig.gene_set.id for _, sig in items] == \
+        [sig.gene_set.id for sig in run.config_signatures[0]]
+
+
+def test_restrict_gene_sets(my_params):
+    genes = ['g%d' % i for i in range(20)]
+    sets = [
+        GeneSet('A', 'Set A', genes[:6] + ['x1', 'x2']),
+        GeneSet('B', 'Set B', genes[:6] + ['x3']),  # same genes as A
+        GeneSet('C', 'Set C', genes[:3] + ['x4', 'x5', 'x6']),  # too small
+        GeneSet('D', 'Set D', genes),
+    ]
+    gene_sets = GeneSetCollection(sets)
+    params = GOPCAParams(my_params.params)
+
+    restricted, groups = GOPCA._restrict_gene_sets(params, gene_sets, genes)
+    restricted = list(restricted)
+    assert [gs.id for gs in restricted] == ['A', 'D']
+    assert restricted[0].genes == set(genes[:6])
+    assert groups['A'] == sets[:2]
+    assert groups['A'][0] is sets[0]
+
+    params.set_param('gene_set_max_size', 10)
+    restricted, groups = GOPCA._restrict_gene_sets(params, gene_sets, genes)
+    assert [gs.id for gs in restricted] == ['A']
+
+
+def test_original_results(my_rank_based_result):
+    gs = my_rank_based_result.gene_set
+    other = GeneSet('Other', 'Other gene set', gs.genes)
+    groups = {gs.id: [gs, other]}
+    results = GOPCA._get_original_results([my_rank_based_result], groups)
+    assert [enr.gene_set for enr in results] == [gs, other]
+    assert results[1].pval == my_rank_based_result.pval
+
+
+def test_gene_set_groups(my_params, my_module_matrix):
+    # run GO-PCA with two identical gene sets
+    matrix = my_module_matrix
+    genes = matrix.genes.tolist()
+    gene_sets = GeneSetCollection([
+        GeneSet('Module', 'Planted module', genes[:20] + ['x1']),
+        GeneSet('ModuleCopy', 'Copy of planted module', genes[:20]),
+    ])
+    params = GOPCAParams(my_params.params)
+    params.set_param('no_local_filter', True)
+    M = GOPCA.simple_setup(matrix, params, gene_sets, num_components=1)
+    events = []
+
+    def record(event, **kwargs):
+        events.append(event)
+
+    for event in ['signature_start', 'signature_built', 'signature_shared']:
+        M.add_hook(event, record)
+    run = M.run()
+    counters = run.profile.counters
+    assert counters['gene_sets'] == 2
+    assert counters['gene_set_groups'] == 1
+    assert counters['gene_sets_merged'] == 1
+
+    # shared signatures are not generated between start and built events
+    assert events.count('signature_start') == 1
+    assert events.count('signature_built') == 1
+    assert events.count('signature_shared') == 1
+    assert counters['signatures_shared'] == 1
+
+    # both gene sets generate (identical) signatures
+    signatures = run.config_signatures[0]
+    assert sorted(sig.gene_set.id for sig in signatures) == \
+        ['Module', 'ModuleCopy']
+    assert signatures[0].genes.tolist() == signatures[1].genes.tolist()
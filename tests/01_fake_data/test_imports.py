@@ -0,0 +1,42 @@
+# Copyright (c) 2016 Florian Wagner
+#
+# This file is part of GO-PCA.
+#
+# GO-PCA is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, Version 3,
+# as published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+from builtins import *
+
+import sys
+import subprocess
+
+import gopca
+from gopca import util
+from gopca._version import __version__
+
+
+def test_version():
+    assert gopca.__version__ == __version__
+    assert util.parse_version(__version__) >= (0, 2)
+    assert util.parse_version('0.17.1rc1') == (0, 17, 1)
+    assert util.parse_version('0.16') < util.parse_version('0.16.1')
+
+
+def test_lazy_imports():
+    # the slow dependencies should not be imported with the package
+    code = ('import sys, gopca, gopca.main, gopca.cli.print_info; '
+            'print(",".join(m for m in ["sklearn", "plotly", "xlsxwriter", '
+            '"scipy.cluster", "gopca.sweep"] if m in sys.modules))')
+    out = subprocess.check_output([sys.executable, '-c', code])
+    assert out.decode('UTF-8').strip() == ''
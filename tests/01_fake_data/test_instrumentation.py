@@ -0,0 +1,45 @@
+# Copyright (c) 2016 Florian Wagner
+#
+# This file is part of GO-PCA.
+#
+# GO-PCA is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, Version 3,
+# as published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+from builtins import *
+
+from gopca.instrumentation import GOPCAProfile
+
+
+def test_profile():
+    profile = GOPCAProfile()
+    for i in range(2):
+        with profile.phase('enrichment'):
+            pass
+    assert list(profile.phases.keys()) == ['enrichment']
+    wall, cpu = profile.phases['enrichment']
+    assert wall >= 0 and cpu >= 0
+
+    profile.start_config(0)
+    profile.count('enriched', 3)
+    profile.add_pc_time(0.5)
+    profile.end_config()
+    profile.count('enriched', 2)
+    profile.finish()
+
+    assert profile.counters['enriched'] == 5
+    assert len(profile.configs) == 1
+    assert profile.configs[0]['counters']['enriched'] == 3
+    assert profile.configs[0]['pc_times'] == [0.5]
+    assert profile.wall_time >= 0
+    assert isinstance(str(profile), str)
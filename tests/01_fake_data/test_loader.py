@@ -0,0 +1,95 @@
+# Copyright (c) 2016 Florian Wagner
+#
+# This file is part of GO-PCA.
+#
+# GO-PCA is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, Version 3,
+# as published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+from builtins import open
+from builtins import str as text
+
+import pytest
+import numpy as np
+
+from genometools.ontology import GeneOntology
+
+from gopca.loader import load_inputs, load_gene_sets_and_ontology
+
+
+_OBO = """format-version: 1.2
+
+[Term]
+id: GO:0000001
+name: root term
+namespace: biological_process
+def: "The root." []
+
+[Term]
+id: GO:0000002
+name: child term
+namespace: biological_process
+def: "A child." []
+is_a: GO:0000001 ! root term
+
+"""
+
+
+def test_load_inputs(my_matrix, my_gene_sets, tmpdir):
+    expression_file = text(tmpdir.join('expression.tsv'))
+    my_matrix.write_tsv(expression_file)
+    gene_set_file = text(tmpdir.join('gene_sets.tsv'))
+    my_gene_sets.write_tsv(gene_set_file)
+    ontology_file = text(tmpdir.join('ontology.obo'))
+    with open(ontology_file, 'w') as ofh:
+        ofh.write(_OBO)
+    cache_dir = text(tmpdir.mkdir('cache'))
+
+    for use_cache in [False, True]:
+        for use_processes in [False, True]:
+            matrix, gene_sets, ontology = load_inputs(
+                expression_file, gene_set_file, ontology_file,
+                use_cache=use_cache, cache_dir=cache_dir,
+                use_processes=use_processes)
+            assert matrix.genes.tolist() == my_matrix.genes.tolist()
+            assert np.allclose(matrix.X, my_matrix.X)
+            assert gene_sets.hash == my_gene_sets.hash
+            assert ontology.hash == GeneOntology.read_obo(ontology_file).hash
+
+    # the ontology is optional
+    _, _, ontology = load_inputs(expression_file, gene_set_file,
+                                 use_cache=False)
+    assert ontology is None
+
+    with pytest.raises(ValueError):
+        load_inputs(expression_file, gene_set_file, use_processes=True,
+                    out_of_core=True)
+
+
+def test_load_gene_sets_and_ontology(my_gene_sets, tmpdir):
+    gene_set_file = text(tmpdir.join('gene_sets.tsv'))
+    my_gene_sets.write_tsv(gene_set_file)
+    ontology_file = text(tmpdir.join('ontology.obo'))
+    with open(ontology_file, 'w') as ofh:
+        ofh.write(_OBO)
+    cache_dir = text(tmpdir.mkdir('cache'))
+
+    for use_cache in [False, True]:
+        gene_sets, ontology = load_gene_sets_and_ontology(
+            gene_set_file, ontology_file, use_cache=use_cache,
+            cache_dir=cache_dir)
+        assert gene_sets.hash == my_gene_sets.hash
+        assert ontology.hash == GeneOntology.read_obo(ontology_file).hash
+
+    _, ontology = load_gene_sets_and_ontology(gene_set_file)
+    assert ontology is None
@@ -117,4 +117,14 @@ def test_error(my_params):
     with pytest.raises(AttributeError):
         test = my_params['hello world']
     with pytest.raises(AttributeError):
-        test = my_params.get_param_default('hello world')
\ No newline at end of file
+        test = my_params.get_param_default('hello world')
+
+
+def test_hash(my_params):
+    # `gene_set_max_size` is left out of the hash at its default value
+    other = deepcopy(my_params)
+    assert other.gene_set_max_size == 0
+    other.set_param('gene_set_max_size', 500)
+    assert other.hash != my_params.hash
+    other.set_param('gene_set_max_size', 0)
+    assert other.hash == my_params.hash
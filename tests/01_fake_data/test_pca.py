@@ -0,0 +1,107 @@
+# Copyright (c) 2016 Florian Wagner
+#
+# This file is part of GO-PCA.
+#
+# GO-PCA is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, Version 3,
+# as published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+from builtins import *
+
+import numpy as np
+from sklearn.decomposition import PCA
+
+from gopca.pca import GramPCA, create_pca, get_permuted_gram_matrix, \
+                      update_pca
+
+
+def test_gram_pca():
+    np.random.seed(0)
+    X = np.random.randn(12, 200)  # samples x genes
+    k = 4
+
+    gram = GramPCA(n_components=k)
+    Y = gram.fit_transform(X)
+    ref = PCA(n_components=k)
+    Y_ref = ref.fit_transform(X)
+
+    assert Y.shape == (12, k)
+    assert gram.components_.shape == (k, 200)
+    assert np.allclose(gram.explained_variance_ratio_,
+                       ref.explained_variance_ratio_)
+    assert np.allclose(gram.explained_variance_, ref.explained_variance_)
+
+    # results must agree up to the sign of each component
+    signs = np.sign(np.sum(Y * Y_ref, axis=0))
+    assert np.allclose(Y, signs * Y_ref)
+    assert np.allclose(gram.components_, signs[:, np.newaxis] *
+                       ref.components_)
+    assert np.allclose(gram.transform(X), Y)
+
+    # largest absolute score of each component is positive
+    max_abs_rows = np.argmax(np.abs(Y), axis=0)
+    assert np.all(Y[max_abs_rows, range(k)] > 0)
+
+
+def test_chunks():
+    np.random.seed(0)
+    X = np.random.randn(10, 103)  # samples x genes
+
+    for standardize in [False, True]:
+        full = GramPCA(n_components=3, standardize=standardize)
+        Y = full.fit_transform(X)
+        chunked = GramPCA(n_components=3, chunk_size=25,
+                          standardize=standardize)
+        assert np.allclose(chunked.fit_transform(X), Y)
+        assert np.allclose(chunked.components_, full.components_)
+        assert np.allclose(chunked.explained_variance_ratio_,
+                           full.explained_variance_ratio_)
+        assert np.allclose(chunked.transform(X), Y)
+
+    # the same permutations are used, independent of the chunk size
+    np.random.seed(1)
+    G = get_permuted_gram_matrix(X.T)
+    np.random.seed(1)
+    assert np.allclose(get_permuted_gram_matrix(X.T, chunk_size=25), G)
+
+
+def test_create_pca():
+    assert isinstance(create_pca(2, 1000, 20), GramPCA)
+    assert not isinstance(create_pca(2, 20, 1000), GramPCA)
+    assert isinstance(create_pca(2, 20, 1000, chunk_size=10), GramPCA)
+
+
+def test_update_pca():
+    np.random.seed(0)
+    # rank-3 expression matrix (genes x samples) with different gene means
+    p, n, k = 200, 15, 3
+    X = np.dot(np.random.randn(p, k), np.random.randn(k, n)) + \
+        np.random.randn(p)[:, np.newaxis]
+
+    pca = GramPCA(n_components=k)
+    Y = pca.fit_transform(X[:, :10].T)
+    W = pca.components_.T
+    W_upd, Y_upd, mean_upd = update_pca(W, Y, pca.mean_, X[:, 10:])
+    assert W_upd.shape == (p, k)
+    assert Y_upd.shape == (n, k)
+    assert np.allclose(mean_upd, np.mean(X, axis=1))
+
+    # the update is exact for data of rank k
+    ref = GramPCA(n_components=k)
+    Y_ref = ref.fit_transform(X.T)
+    signs = np.sign(np.sum(W_upd * ref.components_.T, axis=0))
+    assert np.allclose(W_upd, signs * ref.components_.T)
+    assert np.allclose(Y_upd, signs * Y_ref)
+
+    # signs agree with the original loadings
+    assert np.all(np.sum(W * W_upd, axis=0) > 0)
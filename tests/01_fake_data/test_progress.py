@@ -0,0 +1,44 @@
+# Copyright (c) 2016 Florian Wagner
+#
+# This file is part of GO-PCA.
+#
+# GO-PCA is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, Version 3,
+# as published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+from builtins import *
+
+import os
+import io
+import json
+
+from gopca.progress import ProgressWriter
+
+
+def test_writer():
+    r, w = os.pipe()
+    writer = ProgressWriter(w)
+    writer('pca_start', num_components=2)
+    writer('progress', config=1, num_configs=1, pc=1, num_components=2,
+           gene_sets_tested=10, signatures=1, elapsed=1.0, eta=1.0)
+    writer.close()
+    os.close(w)
+
+    with io.open(r, encoding='UTF-8') as fh:
+        lines = fh.read().splitlines()
+    assert len(lines) == 2
+    events = [json.loads(l) for l in lines]
+    assert events[0]['event'] == 'pca_start'
+    assert events[1]['event'] == 'progress'
+    assert events[1]['pc'] == 1
+    assert events[1]['eta'] == 1.0
@@ -0,0 +1,86 @@
+# Copyright (c) 2016 Florian Wagner
+#
+# This file is part of GO-PCA.
+#
+# GO-PCA is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, Version 3,
+# as published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+from builtins import *
+
+import os
+import time
+
+import numpy as np
+
+from gopca import GOPCAParams, GOPCA
+from gopca.result_cache import GOPCAResultCache
+
+
+def test_cache(tmpdir):
+    cache = GOPCAResultCache(str(tmpdir))
+    assert cache.get('a') is None
+
+    cache.put('a', [1, 2, 3])
+    assert cache.get('a') == [1, 2, 3]
+    assert cache.size > 0
+
+    cache.clear()
+    assert cache.get('a') is None
+    assert cache.size == 0
+
+
+def test_eviction(tmpdir):
+    data = np.zeros(1000, dtype=np.float64)  # ~8 KB
+    cache = GOPCAResultCache(str(tmpdir), max_size=20000)
+
+    cache.put('a', data)
+    cache.put('b', data)
+    # make "a" the most recently used run
+    t = time.time()
+    os.utime(os.path.join(str(tmpdir), 'b.pickle'), (t - 10, t - 10))
+    assert cache.get('a') is not None
+
+    cache.put('c', data)
+    assert cache.get('b') is None
+    assert cache.get('a') is not None
+    assert cache.get('c') is not None
+
+
+def test_run(my_params, my_module_matrix, my_module_gene_sets, tmpdir):
+    cache = GOPCAResultCache(str(tmpdir))
+    M = GOPCA.simple_setup(my_module_matrix, my_params, my_module_gene_sets,
+                           num_components=2)
+    events = []
+
+    def record(event, **kwargs):
+        events.append(event)
+
+    M.add_hook('pca_start', record)
+    run = M.run(result_cache=cache)
+    assert events == ['pca_start']
+
+    # the second run is retrieved from the cache
+    cached = M.run(result_cache=cache)
+    assert events == ['pca_start']
+    assert cached.hash == run.hash
+
+    # different parameters do not match the cached run
+    params = GOPCAParams(my_params.params)
+    params.set_param('escore_thresh', 1.0)
+    M = GOPCA.simple_setup(my_module_matrix, params, my_module_gene_sets,
+                           num_components=2)
+    M.add_hook('pca_start', record)
+    other = M.run(result_cache=cache)
+    assert events == ['pca_start', 'pca_start']
+    assert other.config_hashes != run.config_hashes
@@ -0,0 +1,72 @@
+# Copyright (c) 2016 Florian Wagner
+#
+# This file is part of GO-PCA.
+#
+# GO-PCA is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, Version 3,
+# as published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+from builtins import *
+
+import pytest
+import numpy as np
+
+from genometools.expression import ExpMatrix
+from gopca import GOPCASignatureMatrix, GOPCARun
+from gopca import util
+from gopca.scoring import GOPCASignatureScorer
+
+
+def test_scorer(my_matrix, my_signature, my_other_signature):
+    signatures = [my_signature, my_other_signature]
+    for kwargs in [{}, {'use_median': False}, {'standardize': True},
+                   {'center': False}]:
+        scorer = GOPCASignatureScorer(signatures, **kwargs)
+        assert isinstance(repr(scorer), str)
+        assert scorer.q == 2
+        assert scorer.p == len(my_signature.genes)
+
+        # scoring the original samples reproduces the signature expression
+        S = scorer.score(my_matrix)
+        assert isinstance(S, GOPCASignatureMatrix)
+        assert S.q == 2
+        for i, sig in enumerate(signatures):
+            assert np.allclose(S.X[i], sig.get_expression(**kwargs).values)
+
+        # the result does not depend on the chunk size
+        assert np.allclose(scorer.score(my_matrix, chunk_size=1).X, S.X)
+
+    with pytest.raises(ValueError):
+        scorer.score(my_matrix.iloc[3:])
+
+
+def test_score_samples(my_matrix, my_sig_matrix):
+    W = np.zeros((my_matrix.p, 1))
+    Y = np.zeros((my_matrix.n, 1))
+    run = GOPCARun(my_sig_matrix, '0.0.0', 'timestamp', 0.0, 'hash', [],
+                   my_matrix.genes, my_matrix.samples, W, Y)
+
+    new_samples = ExpMatrix(genes=my_matrix.genes, samples=['n1', 'n2'],
+                            X=np.ones((my_matrix.p, 2)))
+    S = run.score_samples(new_samples)
+    assert S.q == my_sig_matrix.q
+    assert S.samples.tolist() == ['n1', 'n2']
+    assert run.get_scorer() is run.get_scorer()
+
+
+def test_get_signature_expression(my_matrix, my_signature):
+    sig = util.get_signature_expression(
+        my_matrix.genes.tolist(), my_matrix.X, my_signature.genes.tolist(),
+        standardize=False)
+    assert np.allclose(
+        sig, my_signature.get_expression(use_median=False).values)
@@ -0,0 +1,164 @@
+# Copyright (c) 2016 Florian Wagner
+#
+# This file is part of GO-PCA.
+#
+# GO-PCA is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, Version 3,
+# as published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+from builtins import *
+
+import json
+import time
+import threading
+
+from six.moves.urllib import request
+from six.moves.urllib.error import HTTPError
+import pytest
+
+from gopca.server import GOPCAServer
+
+
+@pytest.fixture
+def my_server(my_gene_sets):
+    server = GOPCAServer({'my_gene_sets': my_gene_sets}, num_workers=1)
+    server.start()
+    yield server
+    server.shutdown()
+
+
+def _get_url(server, path):
+    return 'http://%s:%d%s' % (server.address + (path,))
+
+
+def test_collections(my_server):
+    fh = request.urlopen(_get_url(my_server, '/collections'))
+    data = json.loads(fh.read().decode('UTF-8'))
+    assert data == ['my_gene_sets']
+
+
+def test_invalid_job(my_server, my_matrix):
+    job = {
+        'collection': 'unknown',
+        'matrix': {
+            'genes': my_matrix.genes.tolist(),
+            'samples': my_matrix.samples.tolist(),
+            'X': my_matrix.X.tolist(),
+        }
+    }
+    req = request.Request(_get_url(my_server, '/jobs'),
+                          data=json.dumps(job).encode('UTF-8'))
+    with pytest.raises(HTTPError) as err:
+        request.urlopen(req)
+    assert err.value.code == 400
+
+    with pytest.raises(HTTPError) as err:
+        request.urlopen(_get_url(my_server, '/jobs/unknown'))
+    assert err.value.code == 404
+
+
+def _get_module_job(matrix):
+    return {
+        'collection': 'module',
+        'matrix': {
+            'genes': matrix.genes.tolist(),
+            'samples': matrix.samples.tolist(),
+            'X': matrix.X.tolist(),
+        },
+        'num_components': 2,
+    }
+
+
+def _post(server, path, data):
+    req = request.Request(_get_url(server, path),
+                          data=json.dumps(data).encode('UTF-8'))
+    return json.loads(request.urlopen(req).read().decode('UTF-8'))
+
+
+def test_job(my_module_matrix, my_module_gene_sets):
+    server = GOPCAServer({'module': my_module_gene_sets}, num_workers=1)
+    server.start()
+    try:
+        job = _get_module_job(my_module_matrix)
+        job_id = _post(server, '/jobs', job)['id']
+        for _ in range(600):
+            fh = request.urlopen(_get_url(server, '/jobs/%s' % job_id))
+            status = json.loads(fh.read().decode('UTF-8'))
+            if status['status'] != 'running':
+                break
+            time.sleep(0.1)
+        assert status['status'] == 'done'
+        result = status['result']
+        assert result['samples'] == my_module_matrix.samples.tolist()
+        assert len(result['W'][0]) == 2
+        assert 'Module' in result['signatures']['gene_set_id']
+
+        # the finished job has been removed
+        with pytest.raises(HTTPError) as err:
+            request.urlopen(_get_url(server, '/jobs/%s' % job_id))
+        assert err.value.code == 404
+
+        # run the job directly
+        status = _post(server, '/run', job)
+        assert status['status'] == 'done'
+        assert status['result']['signatures'] == result['signatures']
+        assert not server._jobs
+    finally:
+        server.shutdown()
+
+
+def test_max_jobs(my_module_matrix, my_module_gene_sets):
+    server = GOPCAServer({'module': my_module_gene_sets}, num_workers=1,
+                         max_jobs=1)
+    server.start()
+    try:
+        job = _get_module_job(my_module_matrix)
+        first = server.submit(job)
+        server.wait(first)
+        second = server.submit(job)
+        # the result of the first job was never retrieved
+        assert list(server._jobs.keys()) == [second]
+        server.wait(second)
+        assert server.get_job_status(second)['status'] == 'done'
+    finally:
+        server.shutdown()
+
+
+def test_max_jobs_run(my_module_matrix, my_module_gene_sets):
+    # jobs run via "/run" are never dropped, even if there are too many jobs
+    server = GOPCAServer({'module': my_module_gene_sets}, num_workers=2,
+                         max_jobs=1)
+    server.start()
+    try:
+        job = _get_module_job(my_module_matrix)
+        statuses = []
+
+        def run():
+            statuses.append(_post(server, '/run', job)['status'])
+
+        def submit():
+            _post(server, '/jobs', job)
+
+        threads = [threading.Thread(target=f) for f in [run, submit] * 3]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert statuses == ['done'] * 3
+        # only the jobs submitted via "/jobs" are kept
+        assert len(server._jobs) <= 3
+        for job_id in list(server._jobs.keys()):
+            server.wait(job_id)
+            assert server.get_job_status(job_id)['status'] == 'done'
+    finally:
+        server.shutdown()
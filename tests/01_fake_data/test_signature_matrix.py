@@ -23,6 +23,7 @@ from builtins import str as text
 from copy import deepcopy
 
 import pytest
+import numpy as np
 
 from plotly import graph_objs as go
 
@@ -67,3 +68,16 @@ def test_heatmap(my_sig_matrix, my_signature):
         show_sample_labels=True,
     )
     assert isinstance(fig, go.graph_objs.Figure)
+
+
+def test_from_signatures(my_signature, my_other_signature):
+    signatures = [my_signature, my_other_signature]
+    for kw in [{}, {'use_median': False}, {'standardize': True}]:
+        sig_matrix = GOPCASignatureMatrix.from_signatures(
+            signatures, cluster_signatures=False, cluster_samples=False, **kw)
+        assert sig_matrix.signatures.tolist() == signatures
+        for sig, x in zip(signatures, sig_matrix.X):
+            assert np.allclose(x, sig.get_expression(**kw).values)
+
+    with pytest.raises(ValueError):
+        GOPCASignatureMatrix.from_signatures([])
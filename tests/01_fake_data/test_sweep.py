@@ -0,0 +1,100 @@
+# Copyright (c) 2016 Florian Wagner
+#
+# This file is part of GO-PCA.
+#
+# GO-PCA is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, Version 3,
+# as published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+from builtins import *
+
+import pytest
+import numpy as np
+
+from gopca import GOPCAParams, GOPCAConfig, GOPCA
+from gopca.sweep import GOPCASweep
+from gopca.cli.sweep import parse_grid
+
+
+def test_param_grid(my_params):
+    grid = {'pval_thresh': [1e-6, 1e-8], 'escore_thresh': [2.0, 4.0, 6.0]}
+    param_grid = GOPCASweep.get_param_grid(grid, my_params)
+    assert len(param_grid) == 6
+    for params in param_grid:
+        assert isinstance(params, GOPCAParams)
+        assert params.sig_corr_thresh == my_params.sig_corr_thresh
+    assert set((p.pval_thresh, p.escore_thresh) for p in param_grid) == \
+        set((x, y) for x in grid['pval_thresh'] for y in grid['escore_thresh'])
+
+
+def test_parse_grid():
+    grid = parse_grid(['pval_thresh=1e-6,1e-8', 'no_local_filter=yes,no'])
+    assert grid == {'pval_thresh': [1e-6, 1e-8],
+                    'no_local_filter': [True, False]}
+    with pytest.raises(ValueError):
+        parse_grid(['unknown=1,2'])
+    # the ontology is only read once
+    with pytest.raises(ValueError):
+        parse_grid(['go_part_of_cc_only=yes,no'])
+
+
+def test_setup(my_matrix, my_gene_sets):
+    param_grid = GOPCASweep.get_param_grid({'pval_thresh': [1e-6, 1e-8]})
+    sweep = GOPCASweep(my_matrix, param_grid, my_gene_sets)
+    assert len(sweep.configs) == 2
+    for config in sweep.configs:
+        assert isinstance(config, GOPCAConfig)
+
+
+def test_enrichment_key():
+    params1 = GOPCAParams({'pval_thresh': 1e-6, 'escore_thresh': 2.0})
+    params2 = GOPCAParams({'pval_thresh': 1e-8, 'escore_thresh': 4.0})
+    # stricter thresholds are derived from the same enrichment results
+    assert GOPCASweep._get_enrichment_key(params1) == \
+        GOPCASweep._get_enrichment_key(params2)
+    params3 = GOPCAParams({'pval_thresh': 1e-3})
+    assert GOPCASweep._get_enrichment_key(params1) != \
+        GOPCASweep._get_enrichment_key(params3)
+    params4 = GOPCAParams({'gene_set_max_size': 100})
+    assert GOPCASweep._get_enrichment_key(params1) != \
+        GOPCASweep._get_enrichment_key(params4)
+
+
+def _get_signature_data(run):
+    return sorted((sig.pc, sig.gene_set_id, sig.pval, tuple(sig.genes))
+                  for sig in run.sig_matrix.signatures)
+
+
+def test_run_sweep(my_params, my_module_matrix, my_module_gene_sets):
+    grid = {'pval_thresh': [1e-6, 1e-10], 'escore_thresh': [1.0, 4.0],
+            'gene_set_max_size': [0, 20]}
+    param_grid = GOPCASweep.get_param_grid(grid, my_params)
+    sweep = GOPCASweep(my_module_matrix, param_grid, my_module_gene_sets,
+                       num_components=2)
+    runs, summary = sweep.run_sweep()
+    assert len(runs) == len(param_grid)
+    assert summary.shape[0] == len(param_grid)
+    assert any(run is not None for run in runs)
+
+    # reusing results does not change them
+    for params, run in zip(param_grid, runs):
+        M = GOPCA.simple_setup(my_module_matrix, params, my_module_gene_sets,
+                               num_components=2)
+        if run is None:
+            assert not list(M.iter_signatures())
+            continue
+        ref = M.run()
+        assert np.allclose(run.W, ref.W)
+        assert _get_signature_data(run) == _get_signature_data(ref)
+        assert run.profile.counters['gene_set_groups'] == \
+            ref.profile.counters['gene_set_groups']